@@ -0,0 +1,119 @@
+''' Measure and compare with the baseline '''
+import json
+import math
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable
+
+from models.base import record_commands
+
+BASELINE = Path(__file__).parent / 'baseline.json'
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ''' Percentile in nearest-rank
+
+    Args:
+        values (list): The values.
+        percent (float): In `0` ~ `100`.
+
+    Returns:
+        Return the value.
+
+    '''
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank-1]
+
+
+def measure(func: Callable[[], Any], rounds: int = 10) -> dict[str, Any]:
+    ''' Measure the latency and Mongo commands
+
+    The first call is for warm up and not measured.
+
+    Args:
+        func (Callable): The function to call.
+        rounds (int): The numbers of rounds.
+
+    Returns:
+        Return `p50_ms`, `p95_ms` and the max `queries` in one call.
+
+    '''
+    func()
+
+    durations = []
+    queries = 0
+    for _ in range(rounds):
+        with record_commands() as stats:
+            start = perf_counter()
+            func()
+            durations.append(perf_counter() - start)
+
+        queries = max(queries, stats.count)
+
+    return {'p50_ms': round(percentile(durations, 50) * 1000, 3),
+            'p95_ms': round(percentile(durations, 95) * 1000, 3),
+            'queries': queries}
+
+
+def load_baseline() -> dict[str, Any]:
+    ''' Load the baseline
+
+    Returns:
+        Return `{'<scale>': {'<name>': {...}}}`.
+
+    '''
+    if not BASELINE.exists():
+        return {}
+
+    return dict(json.loads(BASELINE.read_text(encoding='utf8')))
+
+
+def save_baseline(results: dict[str, Any]) -> None:
+    ''' Save the results as the baseline, merge with the exists scales.
+
+    Args:
+        results (dict): The results in `{'<scale>': {'<name>': {...}}}`.
+
+    '''
+    baseline = load_baseline()
+    for scale, datas in results.items():
+        baseline.setdefault(scale, {}).update(datas)
+
+    BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n',
+                        encoding='utf8')
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any],
+            tolerance: float, slack_ms: float = 5.0) -> list[str]:
+    ''' Compare with the baseline
+
+    The Mongo queries and the external `calls`, if there are, can not be more
+    than the baseline, and the `p95_ms` can not be more than
+    `baseline * tolerance + slack_ms`.
+
+    Args:
+        result (dict): The result from [benchmarks.bench.measure][].
+        baseline (dict): The baseline.
+        tolerance (float): The ratio of the latency.
+        slack_ms (float): The absolute slack of the latency.
+
+    Returns:
+        Return the regressions.
+
+    '''
+    regressions = []
+    if result['queries'] > baseline['queries']:
+        regressions.append(
+            f"queries: {result['queries']} > baseline {baseline['queries']}")
+
+    if 'calls' in baseline and result.get('calls', 0) > baseline['calls']:
+        regressions.append(
+            f"calls: {result['calls']} > baseline {baseline['calls']}")
+
+    limit = baseline['p95_ms'] * tolerance + slack_ms
+    if result['p95_ms'] > limit:
+        regressions.append(
+            f"p95: {result['p95_ms']}ms > {limit:.3f}ms (baseline {baseline['p95_ms']}ms)")
+
+    return regressions
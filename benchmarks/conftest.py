@@ -0,0 +1,174 @@
+''' The fixtures for benchmarks
+
+Run with `pytest benchmarks`, the options:
+
+- `--scales`: The data scales to run, in `small`, `medium`, `large`.
+- `--rounds`: The rounds of each endpoint.
+- `--latency-tolerance`: The ratio of the `p95` latency to the baseline.
+- `--update-baseline`: Save the results as the baseline, not to compare.
+- `--recipients`: The numbers of recipients for the Celery tasks.
+- `--task-rounds`: The rounds of each task scenario.
+
+'''
+import os
+from typing import Any, Generator
+
+import pytest
+
+import setting
+from benchmarks.bench import save_baseline
+from cmdtools.seed import Seeder
+from models.base import MOCK_DB_STORE, DBBase
+from models.projectdb import ProjectDB
+from models.senderdb import SenderCampaignDB
+from models.usessiondb import USessionDB
+from module.mc import MC
+from tests.fakes import FakeMemcached
+
+SCALES = {
+    'small': {'users': 200, 'projects': 2, 'teams': 6},
+    'medium': {'users': 1000, 'projects': 3, 'teams': 8},
+    'large': {'users': 5000, 'projects': 5, 'teams': 12},
+}
+
+RESULTS = pytest.StashKey[dict[str, dict[str, Any]]]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    ''' Add options '''
+    group = parser.getgroup('benchmarks')
+    group.addoption('--scales', default='small',
+                    help='The data scales, in small, medium, large.')
+    group.addoption('--rounds', type=int, default=10,
+                    help='The rounds of each endpoint.')
+    group.addoption('--latency-tolerance', type=float, default=2.0,
+                    help='The ratio of the p95 latency to the baseline.')
+    group.addoption('--update-baseline', action='store_true',
+                    help='Save the results as the baseline.')
+    group.addoption('--recipients', default='100',
+                    help='The numbers of recipients for the Celery tasks, split by `,`.')
+    group.addoption('--task-rounds', type=int, default=3,
+                    help='The rounds of each task scenario.')
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    ''' Init the results '''
+    config.stash[RESULTS] = {}
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    ''' Parametrize the scales '''
+    if 'scale' in metafunc.fixturenames:
+        metafunc.parametrize(
+            'scale', metafunc.config.getoption('--scales').split(','),
+            indirect=True, scope='session')
+
+    if 'recipients' in metafunc.fixturenames:
+        metafunc.parametrize(
+            'recipients',
+            [int(num) for num in metafunc.config.getoption('--recipients').split(',')],
+            indirect=True, scope='session')
+
+
+def drop_mock_collections() -> None:
+    ''' Clear all the collections in `mongomock`
+
+    The collections are in the shared `MOCK_DB_STORE`, not in the database
+    of each client, so clear them by the collection names in the store.
+
+    '''
+    if setting.MONGO_MOCK and MOCK_DB_STORE is not None:
+        for name in MOCK_DB_STORE.list_created_collection_names():
+            DBBase(name).delete_many({})
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    ''' Save the baseline '''
+    if session.config.getoption('--update-baseline') and session.config.stash[RESULTS]:
+        save_baseline(session.config.stash[RESULTS])
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: pytest.Config) -> None:
+    ''' Report the results '''
+    results = config.stash[RESULTS]
+    if not results:
+        return
+
+    terminalreporter.section('benchmarks')
+    terminalreporter.write_line(
+        f"{'scale':<10} {'name':<44} {'p50 ms':>10} {'p95 ms':>10} {'queries':>8} "
+        f"{'calls':>6} {'per sec':>8}")
+    for scale_name, datas in results.items():
+        for name, result in datas.items():
+            terminalreporter.write_line(
+                f"{scale_name:<10} {name:<44} {result['p50_ms']:>10.3f} "
+                f"{result['p95_ms']:>10.3f} {result['queries']:>8} "
+                f"{result.get('calls', ''):>6} {result.get('per_sec', ''):>8}")
+            for task_name, task in result.get('tasks', {}).items():
+                terminalreporter.write_line(
+                    f"{'':<10}   {task_name:<42} {task['p50_ms']:>10.3f} "
+                    f"{task['p95_ms']:>10.3f} {'x' + str(task['count']):>8}")
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory: pytest.TempPathFactory) -> Generator[Any, None, None]:
+    ''' The flask app with the fake memcached
+
+    `main.py` writes the log into `./log/`, so run it in a temporary directory.
+
+    '''
+    workdir = tmp_path_factory.mktemp('app')
+    (workdir / 'log').mkdir()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    with pytest.MonkeyPatch.context() as patch:
+        mem_cache = FakeMemcached()
+        patch.setattr(MC, 'get_client', staticmethod(lambda: mem_cache))
+
+        import main  # pylint: disable=import-outside-toplevel
+        main.app.config['TESTING'] = True
+
+        yield main.app
+
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def scale(request: pytest.FixtureRequest) -> dict[str, Any]:
+    ''' Seed the datas in scale
+
+    With `mongomock`, the collections are dropped before seeding. The
+    `pid`, `tid` are the last project and the first team, the user is
+    the project owner and the team chief.
+
+    '''
+    name = request.param
+    drop_mock_collections()
+
+    seeded = Seeder(seed=2022, prefix=f'bench{name}', **SCALES[name]).run()
+    pid = seeded['pids'][-1]
+    tid = [_tid for _pid, _tid in seeded['teams'] if _pid == pid][0]
+    project = ProjectDB(pid='').find_one({'_id': pid})
+    uid = project['owners'][0]
+
+    return {
+        'name': name,
+        'pid': pid,
+        'tid': tid,
+        'uid': uid,
+        'sid': USessionDB().find_one({'uid': uid, 'alive': True})['_id'],
+        'cid': SenderCampaignDB().find_one(
+            {'created.pid': pid, 'created.tid': tid})['_id'],
+    }
+
+
+@pytest.fixture(scope='session')
+def client(app: Any, scale: dict[str, Any]) -> Any:  # pylint: disable=redefined-outer-name
+    ''' The test client, login as the user in scale '''
+    test_client = app.test_client()
+    test_client.environ_base['wsgi.url_scheme'] = 'https'
+    with test_client.session_transaction() as session:
+        session['sid'] = scale['sid']
+
+    return test_client
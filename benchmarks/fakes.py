@@ -0,0 +1,268 @@
+''' The in-process fakes for benchmarks '''
+import json
+import re
+from collections import Counter
+from threading import Lock
+from typing import Any, Callable, Optional
+from uuid import uuid4
+
+import httplib2  # type: ignore
+from googleapiclient import errors  # type: ignore
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+
+
+class SESRecorder:  # pylint: disable=too-few-public-methods
+    ''' Record the raw mails instead of sending by SES
+
+    Replace the [module.awsses.AWSSES.send_raw_email][].
+
+    Attributes:
+        mails (list): The raw mails in `str`.
+        calls (Counter): The numbers of calls.
+
+    '''
+
+    def __init__(self) -> None:
+        self.mails: list[str] = []
+        self.calls: Counter[str] = Counter()
+        self.lock = Lock()
+
+    def send_raw_email(self, ses: Any, **kwargs: Any) -> dict[str, Any]:
+        ''' The same arguments as [module.awsses.AWSSES.send_raw_email][] '''
+        raw = kwargs.get('data_str')
+        if raw is None:
+            raw = (kwargs['data'] if 'data' in kwargs else ses.raw_mail(**kwargs)).as_string()
+
+        with self.lock:
+            self.mails.append(raw)
+            self.calls['send_raw_email'] += 1
+
+        return {'MessageId': uuid4().hex, 'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+class StubAdapter(BaseAdapter):
+    ''' The transport adapter for [requests.Session][] to route into handlers
+
+    The handler receives the `match` and the `request`, and returns
+    `(status code, json data)`.
+
+    Attributes:
+        calls (Counter): The numbers of calls in route name.
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.routes: list[tuple[str, str, re.Pattern[str], Callable[..., Any]]] = []
+        self.calls: Counter[str] = Counter()
+        self.lock = Lock()
+
+    def route(self, name: str, method: str, pattern: str, handler: Callable[..., Any]) -> None:
+        ''' Add route
+
+        Args:
+            name (str): Route name for counting.
+            method (str): HTTP method.
+            pattern (str): The regex of the url path.
+            handler (Callable): The handler.
+
+        '''
+        self.routes.append((name, method, re.compile(pattern), handler))
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:  # pylint: disable=arguments-differ,unused-argument
+        ''' Send '''
+        url = str(request.url).split('?', 1)[0]
+        for name, method, pattern, handler in self.routes:
+            match = pattern.search(url)
+            if request.method == method and match:
+                with self.lock:
+                    self.calls[name] += 1
+                    status, data = handler(match, request)
+
+                return self.make_response(request=request, status=status, data=data)
+
+        return self.make_response(request=request, status=404, data={})
+
+    @staticmethod
+    def make_response(request: PreparedRequest, status: int, data: Any) -> Response:
+        ''' Make the [requests.Response][] in json '''
+        resp = Response()
+        resp.status_code = status
+        resp._content = json.dumps(data).encode('utf8')  # pylint: disable=protected-access
+        resp.headers['Content-Type'] = 'application/json'
+        resp.encoding = 'utf8'
+        resp.url = str(request.url)
+        resp.request = request
+        return resp
+
+    def close(self) -> None:
+        ''' Close '''
+
+
+def query_args(request: PreparedRequest) -> dict[str, str]:
+    ''' Parse the query string
+
+    Args:
+        request (PreparedRequest): The request.
+
+    Returns:
+        Return the args.
+
+    '''
+    if '?' not in str(request.url):
+        return {}
+
+    return dict(arg.split('=', 1) for arg in str(request.url).split('?', 1)[1].split('&'))
+
+
+class MattermostStub(StubAdapter):
+    ''' Mattermost API stub
+
+    Args:
+        users (list): The users in `{'id', 'username', 'email'}`.
+
+    Attributes:
+        channels (dict): The members in channel id.
+        positions (dict): The patched positions in user id.
+
+    '''
+
+    def __init__(self, users: list[dict[str, str]]) -> None:
+        super().__init__()
+        self.users = users
+        self.channels: dict[str, list[str]] = {}
+        self.positions: dict[str, str] = {}
+
+        self.route('users.stats', 'GET', r'/users/stats$',
+                   lambda match, req: (200, {'total_users_count': len(self.users)}))
+        self.route('users', 'GET', r'/users$', self.get_users)
+        self.route('users.patch', 'PUT', r'/users/(\w+)/patch$', self.put_users_patch)
+        self.route('channels.members', 'GET', r'/channels/(\w+)/members$',
+                   self.get_channel_members)
+        self.route('channels.members.add', 'POST', r'/channels/(\w+)/members$',
+                   self.post_channel_member)
+        self.route('channels.direct', 'POST', r'/channels/direct$',
+                   lambda match, req: (201, {'id': uuid4().hex[:26]}))
+        self.route('posts', 'POST', r'/posts$',
+                   lambda match, req: (201, {'id': uuid4().hex[:26]}))
+        self.route('teams.invite', 'POST', r'/teams/(\w+)/invite/email$',
+                   lambda match, req: (200, {'status': 'OK'}))
+
+    def get_users(self, match: re.Match[str], request: PreparedRequest) -> tuple[int, Any]:  # pylint: disable=unused-argument
+        ''' GET /users '''
+        args = query_args(request)
+        page, per_page = int(args.get('page', 0)), int(args.get('per_page', 60))
+        return 200, self.users[page*per_page:(page+1)*per_page]
+
+    def put_users_patch(self, match: re.Match[str], request: PreparedRequest) -> tuple[int, Any]:
+        ''' PUT /users/<id>/patch '''
+        self.positions[match.group(1)] = json.loads(request.body or '{}')['position']
+        return 200, {'id': match.group(1)}
+
+    def get_channel_members(self, match: re.Match[str],
+                            request: PreparedRequest) -> tuple[int, Any]:
+        ''' GET /channels/<id>/members '''
+        args = query_args(request)
+        page, per_page = int(args.get('page', 0)), int(args.get('per_page', 60))
+        members = self.channels.get(match.group(1), [])[page*per_page:(page+1)*per_page]
+        return 200, [{'channel_id': match.group(1), 'user_id': mid} for mid in members]
+
+    def post_channel_member(self, match: re.Match[str],
+                            request: PreparedRequest) -> tuple[int, Any]:
+        ''' POST /channels/<id>/members '''
+        mid = json.loads(request.body or '{}')['user_id']
+        members = self.channels.setdefault(match.group(1), [])
+        if mid not in members:
+            members.append(mid)
+
+        return 201, {'channel_id': match.group(1), 'user_id': mid}
+
+
+class IPInfoStub(StubAdapter):
+    ''' ipinfo API stub '''
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.route('batch', 'POST', r'/batch$', self.post_batch)
+        self.route('info', 'GET', r'/([\d.]+)$',
+                   lambda match, req: (200, self.make_info(match.group(1))))
+
+    @staticmethod
+    def make_info(ip_address: str) -> dict[str, Any]:
+        ''' Make info '''
+        return {'ip': ip_address, 'city': 'Taipei', 'region': 'Taipei',
+                'country': 'TW', 'org': 'AS0 Example'}
+
+    def post_batch(self, match: re.Match[str],  # pylint: disable=unused-argument
+                   request: PreparedRequest) -> tuple[int, Any]:
+        ''' POST /batch '''
+        return 200, {ip: self.make_info(ip) for ip in json.loads(request.body or '[]')}
+
+
+class FakeRequest:  # pylint: disable=too-few-public-methods
+    ''' The request of Google API client '''
+
+    def __init__(self, directory: 'FakeDirectory', name: str,
+                 func: Callable[[], Any]) -> None:
+        self.directory = directory
+        self.name = name
+        self.func = func
+
+    def execute(self) -> Any:
+        ''' execute '''
+        with self.directory.lock:
+            self.directory.calls[self.name] += 1
+            return self.func()
+
+
+class FakeDirectory:
+    ''' Google Workspace Directory API fake for [module.gsuite.GSuite][]
+
+    Attributes:
+        groups_data (dict): The members in group email.
+        calls (Counter): The numbers of calls.
+
+    '''
+
+    def __init__(self) -> None:
+        self.groups_data: dict[str, set[str]] = {}
+        self.calls: Counter[str] = Counter()
+        self.lock = Lock()
+
+    def groups(self) -> 'FakeDirectory':
+        ''' groups resource '''
+        return self
+
+    def members(self) -> 'FakeDirectory':
+        ''' members resource '''
+        return self
+
+    def get(self, groupKey: Optional[str] = None,  # pylint: disable=invalid-name
+            memberKey: Optional[str] = None) -> FakeRequest:  # pylint: disable=invalid-name
+        ''' groups.get / members.get '''
+        if memberKey is None:
+            return FakeRequest(self, 'groups.get', lambda: {
+                'id': groupKey, 'email': groupKey,
+                'directMembersCount': len(self.groups_data.setdefault(str(groupKey), set()))})
+
+        def member_get() -> dict[str, str]:
+            if memberKey not in self.groups_data.get(str(groupKey), set()):
+                raise errors.HttpError(httplib2.Response({'status': 404}), b'{}')
+
+            return {'email': str(memberKey), 'role': 'MEMBER'}
+
+        return FakeRequest(self, 'members.get', member_get)
+
+    def insert(self, groupKey: str, body: dict[str, Any]) -> FakeRequest:  # pylint: disable=invalid-name
+        ''' members.insert '''
+        def member_insert() -> dict[str, Any]:
+            self.groups_data.setdefault(groupKey, set()).add(body['email'])
+            return body
+
+        return FakeRequest(self, 'members.insert', member_insert)
+
+    def delete(self, groupKey: str, memberKey: str) -> FakeRequest:  # pylint: disable=invalid-name
+        ''' members.delete '''
+        return FakeRequest(self, 'members.delete',
+                           lambda: self.groups_data.setdefault(groupKey, set()).discard(memberKey))
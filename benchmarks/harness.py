@@ -0,0 +1,182 @@
+''' The harness to run the Celery tasks eagerly against the in-process fakes '''
+from collections import Counter
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+import pytest
+from celery.signals import task_postrun, task_prerun
+
+from benchmarks.bench import percentile
+from benchmarks.fakes import (FakeDirectory, IPInfoStub, MattermostStub,
+                              SESRecorder)
+from celery_task.celery_main import app
+from models.base import record_commands
+from module.awsses import AWSSES
+from module.gsuite import GSuite
+from module.ipinfo import IPInfo
+from module.mail_template import MailTemplate
+from module.mattermost_bot import MattermostBot
+from module.mc import MC
+from tests.fakes import FakeMemcached
+
+
+class TaskTimer:
+    ''' Record the duration of each task by the `task_prerun`, `task_postrun` signals
+
+    The durations are inclusive, the eager sub tasks are in their parent's.
+
+    Attributes:
+        durations (dict): List of durations in task name.
+
+    '''
+
+    def __init__(self) -> None:
+        self.durations: dict[str, list[float]] = {}
+        self.starts: dict[str, float] = {}
+
+    def prerun(self, task_id: str, **kwargs: Any) -> None:  # pylint: disable=unused-argument
+        ''' task_prerun '''
+        self.starts[task_id] = perf_counter()
+
+    def postrun(self, task_id: str, task: Any, **kwargs: Any) -> None:  # pylint: disable=unused-argument
+        ''' task_postrun '''
+        if task_id in self.starts:
+            self.durations.setdefault(task.name, []).append(
+                perf_counter() - self.starts.pop(task_id))
+
+    def __enter__(self) -> 'TaskTimer':
+        task_prerun.connect(self.prerun, weak=False)
+        task_postrun.connect(self.postrun, weak=False)
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        task_prerun.disconnect(self.prerun)
+        task_postrun.disconnect(self.postrun)
+
+
+class Services:
+    ''' The fakes of the external services
+
+    Args:
+        mattermost_users (list): The users in Mattermost stub.
+
+    '''
+
+    def __init__(self, mattermost_users: list[dict[str, str]]) -> None:
+        self.ses = SESRecorder()
+        self.mattermost = MattermostStub(users=mattermost_users)
+        self.directory = FakeDirectory()
+        self.ipinfo = IPInfoStub()
+        self.mem_cache = FakeMemcached()
+
+    def calls(self) -> Counter[str]:
+        ''' All the external calls
+
+        Returns:
+            Return the calls in `<service>.<name>`.
+
+        '''
+        result: Counter[str] = Counter()
+        for service, calls in (('ses', self.ses.calls), ('mattermost', self.mattermost.calls),
+                               ('gsuite', self.directory.calls), ('ipinfo', self.ipinfo.calls)):
+            for name, count in calls.items():
+                result[f'{service}.{name}'] += count
+
+        return result
+
+    def reset_calls(self) -> None:
+        ''' Reset the calls '''
+        for calls in (self.ses.calls, self.mattermost.calls,
+                      self.directory.calls, self.ipinfo.calls):
+            calls.clear()
+
+    def install(self, patch: pytest.MonkeyPatch) -> None:
+        ''' Install the fakes, and run the Celery tasks eagerly
+
+        Args:
+            patch (MonkeyPatch): The [pytest.MonkeyPatch][].
+
+        '''
+        ses, mattermost, directory, ipinfo = self.ses, self.mattermost, self.directory, self.ipinfo
+        mattermost_init = MattermostBot.__init__
+        ipinfo_init = IPInfo.__init__
+
+        def init_mattermost(bot: MattermostBot, *args: Any, **kwargs: Any) -> None:
+            mattermost_init(bot, *args, **kwargs)
+            for prefix in ('http://', 'https://'):
+                bot.mount(prefix, mattermost)
+
+        def init_ipinfo(session: IPInfo, *args: Any, **kwargs: Any) -> None:
+            ipinfo_init(session, *args, **kwargs)
+            for prefix in ('http://', 'https://'):
+                session.mount(prefix, ipinfo)
+
+        def init_gsuite(gsuite: GSuite, *args: Any, **kwargs: Any) -> None:  # pylint: disable=unused-argument
+            gsuite.service = directory
+
+        patch.setattr(AWSSES, 'send_raw_email',
+                      lambda awsses, **kwargs: ses.send_raw_email(awsses, **kwargs))  # pylint: disable=unnecessary-lambda
+        patch.setattr(MattermostBot, '__init__', init_mattermost)
+        patch.setattr(IPInfo, '__init__', init_ipinfo)
+        patch.setattr(GSuite, '__init__', init_gsuite)
+        patch.setattr(MC, 'get_client', staticmethod(lambda: self.mem_cache))
+        patch.setattr(MailTemplate, 'path',
+                      str(Path(__file__).parent.parent / 'templates' / 'mail'))
+        patch.setattr(app.conf, 'task_always_eager', True)
+        patch.setattr(app.conf, 'task_eager_propagates', True)
+        MailTemplate.init()
+
+
+def run_scenario(services: Services, run: Callable[[], Any],  # pylint: disable=too-many-arguments
+                 setup: Optional[Callable[[], Any]] = None,
+                 rounds: int = 3, items: int = 1) -> dict[str, Any]:
+    ''' Run the scenario in rounds, the first round is for warm up and not measured.
+
+    Args:
+        services (Services): The fakes.
+        run (Callable): To call the tasks.
+        setup (Callable): Optional. To prepare the datas before each round, not measured.
+        rounds (int): The numbers of rounds.
+        items (int): The numbers of recipients for the throughput.
+
+    Returns:
+        Return `p50_ms`, `p95_ms` of one round, `per_sec` of the items, and the
+            max `queries`, `calls` in one round, `tasks` for the durations
+            of each task, `services` for the calls of each service.
+
+    '''
+    if setup is not None:
+        setup()
+
+    run()
+
+    durations = []
+    queries = 0
+    calls: Counter[str] = Counter()
+    with TaskTimer() as timer:
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+
+            services.reset_calls()
+            with record_commands() as stats:
+                start = perf_counter()
+                run()
+                durations.append(perf_counter() - start)
+
+            queries = max(queries, stats.count)
+            calls = calls | services.calls()
+
+    return {
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'per_sec': round(items / percentile(durations, 50), 1),
+        'queries': queries,
+        'calls': sum(calls.values()),
+        'services': dict(sorted(calls.items())),
+        'tasks': {name: {'count': len(values) // rounds,
+                         'p50_ms': round(percentile(values, 50) * 1000, 3),
+                         'p95_ms': round(percentile(values, 95) * 1000, 3)}
+                  for name, values in sorted(timer.durations.items())},
+    }
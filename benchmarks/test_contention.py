@@ -0,0 +1,82 @@
+''' Benchmarks of the contention
+
+The hundreds of users join one task at the same time, in the threads, the
+task can not be overbooked. The `queries` are all the Mongo commands of the
+joins in one round, the later joins see the task full in the cached slots,
+and are rejected by one read without the writes.
+
+'''
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Generator
+
+import pytest
+
+from benchmarks.bench import compare, load_baseline, percentile
+from benchmarks.conftest import RESULTS, drop_mock_collections
+from models.base import record_commands
+from models.tasksdb import TasksDB
+from module.mc import MC
+from module.tasks import Tasks
+from tests.fakes import FakeMemcached
+
+JOINS = 300
+LIMIT = 20
+WORKERS = 32
+
+
+@pytest.fixture(scope='module')
+def task() -> Generator[dict[str, Any], None, None]:
+    ''' One task with the limit, and the fake memcached '''
+    drop_mock_collections()
+
+    with pytest.MonkeyPatch.context() as patch:
+        mem_cache = FakeMemcached()
+        patch.setattr(MC, 'get_client', staticmethod(lambda: mem_cache))
+
+        yield Tasks.add(pid='contention', body={
+            'title': 'Booth', 'cate': '', 'desc': '', 'limit': LIMIT,
+            'starttime': datetime(2022, 7, 30, 9, 0), 'created_by': 'bench'})
+
+
+def test_tasks_join(request: pytest.FixtureRequest,
+                    task: dict[str, Any]) -> None:  # pylint: disable=redefined-outer-name
+    ''' The concurrent joins to one task '''
+    def join(uid: str) -> bool:
+        return Tasks.join(pid='contention', task_id=task['_id'], uid=uid) is not None
+
+    durations = []
+    queries = 0
+    for _ in range(request.config.getoption('--task-rounds')):
+        TasksDB().update_one({'_id': task['_id']}, {'$set': {'people': []}})
+        MC.get_client().delete(Tasks.slots_key(task['_id']))
+
+        with record_commands() as stats:
+            start = perf_counter()
+            with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+                futures = [executor.submit(copy_context().run, join, f'u{num:04d}')
+                           for num in range(JOINS)]
+                joined = [future.result() for future in futures]
+            durations.append(perf_counter() - start)
+
+        queries = max(queries, stats.count)
+        assert sum(joined) == LIMIT
+        assert len(TasksDB().find_one({'_id': task['_id']})['people']) == LIMIT
+
+    result = {'p50_ms': round(percentile(durations, 50) * 1000, 3),
+              'p95_ms': round(percentile(durations, 95) * 1000, 3),
+              'queries': queries, 'calls': JOINS}
+    request.config.stash[RESULTS].setdefault('contention', {})['tasks_join'] = result
+
+    if request.config.getoption('--update-baseline'):
+        return
+
+    baseline = load_baseline().get('contention', {}).get('tasks_join')
+    if baseline is None:
+        pytest.skip(f'no baseline for contention/tasks_join: {result}')
+
+    regressions = compare(result=result, baseline=baseline,
+                          tolerance=request.config.getoption('--latency-tolerance'))
+    assert not regressions, 'contention/tasks_join: ' + '; '.join(regressions)
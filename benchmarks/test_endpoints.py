@@ -0,0 +1,51 @@
+''' Benchmarks of the heaviest endpoints '''
+from typing import Any, Optional
+
+import pytest
+
+from benchmarks.bench import compare, load_baseline, measure
+from benchmarks.conftest import RESULTS
+
+FORM_CASES = ('volunteer_certificate', 'traffic_fee', 'accommodation',
+              'appreciation', 'clothes', 'parking_card', 'drink')
+
+ENDPOINTS: list[tuple[str, str, str, Optional[dict[str, Any]]]] = [
+    ('team_members', 'POST', '/team/{pid}/{tid}/members', {'casename': 'get'}),
+    ('team_members_page', 'GET', '/team/{pid}/{tid}/members', None),
+    ('project_teams', 'GET', '/project/{pid}/', None),
+    *[(f'project_form_{case}', 'POST', '/project/{pid}/form/api', {'case': case})
+      for case in FORM_CASES],
+    ('api_members', 'GET', '/api/members?pid={pid}', None),
+    ('tasks_query', 'POST', '/tasks/{pid}', {'casename': 'query'}),
+    ('tasks_counts', 'POST', '/tasks/{pid}', {'casename': 'counts'}),
+    ('expense', 'POST', '/expense/{pid}', {'casename': 'get'}),
+    ('budget', 'POST', '/budget/{pid}', {'casename': 'get'}),
+    ('sender_receiver', 'POST', '/sender/{pid}/{tid}/campaign/{cid}/receiver',
+     {'casename': 'getinit'}),
+    ('sender_receiver_page', 'GET', '/sender/{pid}/{tid}/campaign/{cid}/receiver', None),
+]
+
+
+@pytest.mark.parametrize('name,method,path,json', ENDPOINTS, ids=[e[0] for e in ENDPOINTS])
+def test_endpoint(request: pytest.FixtureRequest, client: Any, scale: dict[str, Any],  # pylint: disable=too-many-arguments
+                  name: str, method: str, path: str, json: Optional[dict[str, Any]]) -> None:
+    ''' Measure the endpoint and compare with the baseline '''
+    url = path.format(**scale)
+
+    def call() -> None:
+        resp = client.open(url, method=method, json=json)
+        assert resp.status_code == 200, f'{method} {url}: {resp.status_code}'
+
+    result = measure(call, rounds=request.config.getoption('--rounds'))
+    request.config.stash[RESULTS].setdefault(scale['name'], {})[name] = result
+
+    if request.config.getoption('--update-baseline'):
+        return
+
+    baseline = load_baseline().get(scale['name'], {}).get(name)
+    if baseline is None:
+        pytest.skip(f'no baseline for {scale["name"]}/{name}: {result}')
+
+    regressions = compare(result=result, baseline=baseline,
+                          tolerance=request.config.getoption('--latency-tolerance'))
+    assert not regressions, f'{scale["name"]}/{name}: ' + '; '.join(regressions)
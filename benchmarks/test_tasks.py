@@ -0,0 +1,206 @@
+''' Benchmarks of the Celery tasks
+
+The tasks run eagerly against the fakes in [benchmarks.fakes][], each
+scenario sends to the `--recipients` users.
+
+'''
+from time import time
+from typing import Any, Callable, Generator, Optional
+
+import pytest
+
+from benchmarks.bench import compare, load_baseline
+from benchmarks.conftest import RESULTS, drop_mock_collections
+from benchmarks.harness import Services, run_scenario
+from celery_task.task_ipinfo import ipinfo_update_usession
+from celery_task.task_mail_sys import (mail_member_add, mail_member_del,
+                                       mail_member_deny, mail_member_waiting)
+from celery_task.task_sendermailer import sender_mailer_start
+from celery_task.task_service_sync import (
+    service_sync_gsuite_memberchange, service_sync_gsuite_team_leader,
+    service_sync_gsuite_team_members, service_sync_mattermost_memberchange,
+    service_sync_mattermost_projectuserin_channel,
+    service_sync_mattermost_users, service_sync_mattermost_users_position)
+from cmdtools.seed import Seeder
+from models.ipinfodb import IPInfoDB
+from models.mattermostdb import MattermostUsersDB, MattermostUsersPositionDB
+from models.oauth_db import OAuthDB
+from models.projectdb import ProjectDB
+from models.senderdb import SenderCampaignDB
+from models.teamdb import TeamDB, TeamMemberChangedDB
+from module.outbox import MEMBER_CHANGED, MEMBER_CHANGED_CONSUMERS, Outbox
+from models.usessiondb import USessionDB
+
+Scenario = tuple[Optional[Callable[[], Any]], Callable[[], Any], tuple[str, ...]]
+
+
+@pytest.fixture(scope='session')
+def recipients(request: pytest.FixtureRequest) -> int:
+    ''' The numbers of recipients '''
+    return int(request.param)
+
+
+@pytest.fixture(scope='session')
+def task_env(recipients: int) -> Generator[dict[str, Any], None, None]:  # pylint: disable=redefined-outer-name
+    ''' Seed the datas for the recipients, and install the fakes
+
+    The project is in action with the Mattermost channel and the mailing
+    lists, all the users are in Mattermost and synced.
+
+    '''
+    drop_mock_collections()
+
+    seeded = Seeder(seed=2022, users=recipients+50, projects=1, teams=4,
+                    prefix=f'task{recipients}').run()
+    pid = seeded['pids'][-1]
+    tids = [tid for _pid, tid in seeded['teams'] if _pid == pid]
+
+    ProjectDB(pid='').update_one({'_id': pid}, {'$set': {
+        'action_date': time() + 86400*30,
+        'mattermost_ch_id': 'channel0000',
+        'mailling_staff': f'staff@{pid}.example.org',
+        'mailling_leader': f'leader@{pid}.example.org',
+    }})
+    for tid in tids:
+        TeamDB(pid=pid, tid=tid).update_one(
+            {'pid': pid, 'tid': tid}, {'$set': {'mailling': f'{tid}@{pid}.example.org'}})
+
+    mails = {oauth['owner']: oauth['_id'] for oauth in OAuthDB().find(
+        {'owner': {'$in': seeded['uids']}}, {'owner': 1})}
+    services = Services(mattermost_users=[
+        {'id': f'mm{uid}', 'username': uid, 'email': mails[uid]} for uid in seeded['uids']])
+    for user in services.mattermost.users:
+        MattermostUsersDB().add(data=user)
+
+    with pytest.MonkeyPatch.context() as patch:
+        services.install(patch)
+        yield {'pid': pid, 'tid': tids[0], 'uids': seeded['uids'][:recipients],
+               'mails': mails, 'services': services, 'recipients': recipients}
+
+
+def mark_changed_done() -> None:
+    ''' Skip all the member changed records for all the consumers '''
+    for consumer in MEMBER_CHANGED_CONSUMERS:
+        Outbox(name=MEMBER_CHANGED, consumer=consumer).skip()
+
+
+def sender_campaign(env: dict[str, Any]) -> Scenario:
+    ''' One campaign to all the recipients '''
+    campaign = SenderCampaignDB().find_one({'created.pid': env['pid']})
+    user_datas = [{'name': f'V{num:06d}', 'mail': env['mails'][uid]}
+                  for num, uid in enumerate(env['uids'])]
+
+    def run() -> None:
+        sender_mailer_start.apply(kwargs={
+            'campaign_data': campaign, 'team_name': env['tid'], 'user_datas': user_datas,
+            'layout': '1', 'source': None})
+
+    return None, run, ('ses.send_raw_email', )
+
+
+def mail_member(env: dict[str, Any]) -> Scenario:
+    ''' The recipients are in waiting, add, deny and del equally '''
+    uids = env['uids']
+
+    def setup() -> None:
+        mark_changed_done()
+        TeamMemberChangedDB().make_record(pid=env['pid'], tid=env['tid'], action={
+            'waiting': uids[0::4], 'add': uids[1::4], 'deny': uids[2::4], 'del': uids[3::4]})
+
+    def run() -> None:
+        for task in (mail_member_waiting, mail_member_add, mail_member_deny, mail_member_del,
+                     service_sync_mattermost_memberchange):
+            task.apply()
+
+    return setup, run, ('ses.send_raw_email', 'mattermost.posts',
+                        'mattermost.channels.members.add')
+
+
+def gsuite(env: dict[str, Any]) -> Scenario:
+    ''' The recipients are added or removed, then sync the team and leaders '''
+    uids = env['uids']
+    directory = env['services'].directory
+
+    def setup() -> None:
+        mark_changed_done()
+        directory.groups_data.clear()
+        directory.groups_data[f"{env['tid']}@{env['pid']}.example.org"] = {
+            env['mails'][uid] for uid in uids[1::2]}
+        TeamMemberChangedDB().make_record(pid=env['pid'], tid=env['tid'], action={
+            'add': uids[0::2], 'del': uids[1::2]})
+
+    def run() -> None:
+        service_sync_gsuite_memberchange.apply()
+        service_sync_gsuite_team_members.apply(kwargs={'pid': env['pid'], 'tid': env['tid']})
+        service_sync_gsuite_team_leader.apply(kwargs={'pid': env['pid']})
+
+    return setup, run, ('gsuite.members.insert', 'gsuite.members.delete')
+
+
+def mattermost(env: dict[str, Any]) -> Scenario:
+    ''' Sync the users, the channel members and the positions from empty '''
+    stub = env['services'].mattermost
+
+    def setup() -> None:
+        MattermostUsersDB().delete_many({})
+        MattermostUsersPositionDB().delete_many({})
+        stub.channels.clear()
+
+    def run() -> None:
+        service_sync_mattermost_users.apply(kwargs={'force': True})
+        service_sync_mattermost_projectuserin_channel.apply()
+        service_sync_mattermost_users_position.apply(kwargs={'force': True})
+
+    return setup, run, ('mattermost.users', 'mattermost.channels.members.add',
+                        'mattermost.users.patch')
+
+
+def ipinfo(env: dict[str, Any]) -> Scenario:
+    ''' Update the ipinfo of all the sessions without the cache '''
+    services = env['services']
+
+    def setup() -> None:
+        USessionDB().update_many({}, {'$unset': {'ipinfo': 1}})
+        IPInfoDB().delete_many({})
+        services.mem_cache.flush_all()
+
+    def run() -> None:
+        ipinfo_update_usession.apply()
+
+    return setup, run, ('ipinfo.batch', )
+
+
+SCENARIOS = {
+    'sender_campaign': sender_campaign,
+    'mail_member': mail_member,
+    'gsuite': gsuite,
+    'mattermost': mattermost,
+    'ipinfo': ipinfo,
+}
+
+
+@pytest.mark.parametrize('name', list(SCENARIOS))
+def test_task(request: pytest.FixtureRequest, task_env: dict[str, Any],  # pylint: disable=redefined-outer-name
+              name: str) -> None:
+    ''' Run the scenario and compare with the baseline '''
+    setup, run, expected = SCENARIOS[name](task_env)
+    result = run_scenario(services=task_env['services'], run=run, setup=setup,
+                          rounds=request.config.getoption('--task-rounds'),
+                          items=task_env['recipients'])
+
+    missing = [call for call in expected if not result['services'].get(call)]
+    assert not missing, f'{name}: no calls to {missing}, {result["services"]}'
+
+    scale_name = f"tasks-{task_env['recipients']}"
+    request.config.stash[RESULTS].setdefault(scale_name, {})[name] = result
+
+    if request.config.getoption('--update-baseline'):
+        return
+
+    baseline = load_baseline().get(scale_name, {}).get(name)
+    if baseline is None:
+        pytest.skip(f'no baseline for {scale_name}/{name}: {result}')
+
+    regressions = compare(result=result, baseline=baseline,
+                          tolerance=request.config.getoption('--latency-tolerance'))
+    assert not regressions, f'{scale_name}/{name}: ' + '; '.join(regressions)
@@ -1,13 +1,24 @@
 ''' Celery '''
 from __future__ import absolute_import, unicode_literals
 
+import shutil
+from contextlib import ExitStack
+from pathlib import Path
+from time import perf_counter
+
 from celery import Celery
 from celery.schedules import crontab
-from celery.signals import task_failure
+from celery.signals import (task_failure, task_postrun, task_prerun,
+                            task_retry, worker_init, worker_process_init)
 from kombu import Exchange, Queue
 
 import setting
+from models.base import record_commands
 from module.awsses import AWSSES
+from module.mail_template import MailTemplate
+from module.mc import record_calls
+from module.metrics import REGISTRY, start_exporter
+from module.profiler import Profiler
 
 app = Celery(
     main='celery_task',
@@ -83,6 +94,24 @@ app.conf.beat_schedule = {
             'routing_key': 'cs.servicesync.gsuite.memberchange',
         },
     },
+    'service_sync.mattermost.memberchange': {
+        'task': 'servicesync.mattermost.memberchange',
+        'schedule': crontab(minute='*/5'),
+        'kwargs': {},
+        'options': {
+            'exchange': 'COSCUP-SECRETARY',
+            'routing_key': 'cs.servicesync.mattermost.memberchange',
+        },
+    },
+    'service_sync.outbox.compact': {
+        'task': 'servicesync.outbox.compact',
+        'schedule': crontab(hour='21', minute='37'),
+        'kwargs': {},
+        'options': {
+            'exchange': 'COSCUP-SECRETARY',
+            'routing_key': 'cs.servicesync.outbox.compact',
+        },
+    },
     'service_sync.mattermost.users': {
         'task': 'servicesync.mattermost.users',
         'schedule': crontab(minute='12'),
@@ -167,6 +196,30 @@ app.conf.beat_schedule = {
 }
 
 
+#: The running tasks in `task_id`, for the metrics and the profiler.
+RUNNING = {}
+
+PROFILER = Profiler(kind='task', directory=setting.PROFILE_DIR,
+                    root=str(Path(__file__).parent.parent))
+
+
+@worker_init.connect
+def on_worker_init(**kwargs):  # pylint: disable=unused-argument
+    ''' init the metrics directory and the exporter in the main process '''
+    if setting.METRICS_DIR:
+        REGISTRY.directory = f'{setting.METRICS_DIR}/celery'
+        shutil.rmtree(REGISTRY.directory, ignore_errors=True)
+
+    if setting.METRICS_CELERY_PORT:
+        start_exporter(registry=REGISTRY, port=setting.METRICS_CELERY_PORT)
+
+
+@worker_process_init.connect
+def on_worker_process_init(**kwargs):  # pylint: disable=unused-argument
+    ''' init the shared resources in each worker process '''
+    MailTemplate.init()
+
+
 @task_failure.connect
 def on_failure(**kwargs):
     ''' on failure '''
@@ -179,3 +232,37 @@ einfo: <pre>{kwargs['einfo'].traceback}</pre><br>
 request: <pre>{kwargs['sender'].request}</pre>""",
     )
     ses.send_raw_email(data=raw_mail)
+
+
+@task_prerun.connect
+def on_task_prerun(task_id, task, **kwargs):  # pylint: disable=unused-argument
+    ''' start recording and the sampled profiler of the task '''
+    stack = ExitStack()
+    RUNNING[task_id] = (stack, stack.enter_context(record_commands()),
+                        stack.enter_context(record_calls()), perf_counter(),
+                        PROFILER.start(task.name))
+
+
+@task_postrun.connect
+def on_task_postrun(task_id, task, state=None, **kwargs):  # pylint: disable=unused-argument
+    ''' observe the task duration, MongoDB commands, memcached gets, and save the profile '''
+    if task_id not in RUNNING:
+        return
+
+    stack, mongo, mem_cache, start, sampler = RUNNING.pop(task_id)
+    stack.close()
+
+    if sampler is not None:
+        PROFILER.save(sampler=sampler, name=task.name)
+
+    REGISTRY.inc('celery_tasks_total', task=task.name, state=state)
+    REGISTRY.observe('celery_task_duration_seconds', perf_counter() - start, task=task.name)
+    REGISTRY.observe_commands(mongo)
+    REGISTRY.observe_cache(mem_cache)
+    REGISTRY.dump()
+
+
+@task_retry.connect
+def on_task_retry(sender, **kwargs):  # pylint: disable=unused-argument
+    ''' count the retries '''
+    REGISTRY.inc('celery_task_retries_total', task=sender.name)
@@ -16,10 +16,35 @@ logger = get_task_logger(__name__)
           autoretry_for=(Exception, ), retry_backoff=True, max_retries=5,
           routing_key='cs.ipinfo.update.usession', exchange='COSCUP-SECRETARY')
 def ipinfo_update_usession(sender):
-    ''' IPInfo update usession '''
+    ''' IPInfo update usession, group the sessions by IP '''
+    ips: dict[str, list[str]] = {}
     for user in USession.get_no_ipinfo():
-        ipinfo_update_usession_one.apply_async(
-            kwargs={'ip': user['header']['X-Real-Ip'], 'sid': user['_id']})
+        ip_address = user.get('header', {}).get('X-Real-Ip')
+        if not ip_address:
+            continue
+
+        ips.setdefault(ip_address, []).append(user['_id'])
+
+    items = list(ips.items())
+    for num in range(0, len(items), 500):
+        ipinfo_update_usession_batch.apply_async(
+            kwargs={'ips': dict(items[num:num+500])})
+
+    logger.info('ips: %s, sessions: %s',
+                len(ips), sum(len(sids) for sids in ips.values()))
+
+
+@app.task(bind=True, name='ipinfo.update.usession.batch',
+          autoretry_for=(Exception, ), retry_backoff=True, max_retries=5,
+          routing_key='cs.ipinfo.update.usession.batch', exchange='COSCUP-SECRETARY')
+def ipinfo_update_usession_batch(sender, **kwargs):
+    ''' update sessions ipinfo in batch, `ips` is in `{ip: [sid, ...]}` '''
+    infos = IPInfo(setting.IPINFO_TOKEN).lookup(
+        ip_addresses=list(kwargs['ips']))
+
+    for ip_address, sids in kwargs['ips'].items():
+        if ip_address in infos:
+            USession.update_ipinfo_many(sids=sids, data=infos[ip_address])
 
 
 @app.task(bind=True, name='ipinfo.update.usession.one',
@@ -29,15 +54,15 @@ def ipinfo_update_usession_one(sender, **kwargs):
     ''' update session ipinfo '''
     logger.info(kwargs)
 
-    resp = IPInfo(setting.IPINFO_TOKEN).get_info(ip_address=kwargs['ip'])
-    USession.update_ipinfo(sid=kwargs['sid'], data=resp.json())
+    infos = IPInfo(setting.IPINFO_TOKEN).lookup(ip_addresses=[kwargs['ip'], ])
+    if kwargs['ip'] in infos:
+        USession.update_ipinfo(sid=kwargs['sid'], data=infos[kwargs['ip']])
 
 
 @app.task(bind=True, name='session.daily.clean',
           autoretry_for=(Exception, ), retry_backoff=True, max_retries=5,
           routing_key='cs.session.daily.clean', exchange='COSCUP-SECRETARY')
 def session_daily_clean(sender):
-    ''' Daily clean session '''
-    clean = USession.clean()
-    logger.info('matched: %s, modified: %s, raw_result: %s',
-                clean.matched_count, clean.modified_count, clean.raw_result)
+    ''' Daily clean session, move the past sessions into archive '''
+    archived = USession.archive()
+    logger.info('archived: %s', archived)
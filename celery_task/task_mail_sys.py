@@ -4,16 +4,15 @@ from __future__ import absolute_import, unicode_literals
 
 from bson.objectid import ObjectId
 from celery.utils.log import get_task_logger
-from jinja2 import Environment, FileSystemLoader
 
 import setting
 from celery_task.celery_main import app
-from celery_task.task_service_sync import (service_sync_mattermost_add_channel,
-                                           service_sync_mattermost_invite)
+from celery_task.task_service_sync import service_sync_mattermost_invite
 from models.mailletterdb import MailLetterDB
 from models.teamdb import TeamMemberChangedDB
-from module.awsses import AWSSES
+from module.mail_template import MailTemplate
 from module.mattermost_bot import MattermostTools
+from module.outbox import MEMBER_CHANGED, Outbox
 from module.project import Project
 from module.tasks import Tasks, TasksStar
 from module.team import Team
@@ -36,7 +35,7 @@ def mail_sys_test(sender, **kwargs):
           routing_key='cs.mail.sys.weberror', exchange='COSCUP-SECRETARY')
 def mail_sys_weberror(sender, **kwargs):
     ''' mail sys weberror '''
-    ses = AWSSES(setting.AWS_ID, setting.AWS_KEY, setting.AWS_SES_FROM)
+    ses = MailTemplate.awsses()
 
     raw_mail = ses.raw_mail(
         to_addresses=[setting.ADMIN_To, ],
@@ -52,57 +51,62 @@ def mail_sys_weberror(sender, **kwargs):
           routing_key='cs.mail.member.waiting', exchange='COSCUP-SECRETARY')
 def mail_member_waiting(sender):
     ''' mail member waiting '''
-    template = Environment(loader=FileSystemLoader(
-        './templates/mail')).get_template('./base_member_waiting.html')
+    # pylint: disable=too-many-locals
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mail.member.waiting')
+    with outbox.process() as leased:
+        if not leased:
+            return
 
-    team_member_change_db = TeamMemberChangedDB()
-    awsses = AWSSES(
-        aws_access_key_id=setting.AWS_ID,
-        aws_secret_access_key=setting.AWS_KEY,
-        source=setting.AWS_SES_FROM)
+        raws = outbox.read(cases=('waiting', ))
+        if not raws:
+            return
 
-    for raw in team_member_change_db.find(
-        {'done.mail': {'$exists': False}, 'case': 'waiting'},
-            sort=(('create_at', 1), )):
-        team = Team.get(raw['pid'], raw['tid'])
+        teams = Team.get_many(keys=[(raw['pid'], raw['tid']) for raw in raws])
 
-        uids = []
-        uids.extend(team['chiefs'])
-        uids.append(raw['uid'])
+        uids = set()
+        for raw in raws:
+            uids.add(raw['uid'])
+            uids.update(teams[(raw['pid'], raw['tid'])]['chiefs'])
 
-        users = User.get_info(uids=uids)
+        users = User.get_info(uids=list(uids))
 
+        template = MailTemplate.get_template('./base_member_waiting.html')
+        awsses = MailTemplate.awsses()
         mmt = MattermostTools(token=setting.MATTERMOST_BOT_TOKEN,
                               base_url=setting.MATTERMOST_BASEURL)
 
-        for uid in team['chiefs']:
-            body = template.render(
-                name=users[uid]['profile']['badge_name'],
-                uid=raw['uid'],
-                apply_name=users[raw['uid']]['profile']['badge_name'],
-                team_name=team['name'], pid=team['pid'], tid=team['tid'], )
+        for raw in raws:
+            team = teams[(raw['pid'], raw['tid'])]
+
+            for uid in team['chiefs']:
+                body = template.render(
+                    name=users[uid]['profile']['badge_name'],
+                    uid=raw['uid'],
+                    apply_name=users[raw['uid']]['profile']['badge_name'],
+                    team_name=team['name'], pid=team['pid'], tid=team['tid'], )
+
+                raw_mail = awsses.raw_mail(
+                    to_addresses=(dict(
+                        name=users[uid]['profile']['badge_name'],
+                        mail=users[uid]['oauth']['email']), ),
+                    subject=f"申請加入通知信 - {users[raw['uid']]['profile']['badge_name']}",
+                    body=body,
+                )
 
-            raw_mail = awsses.raw_mail(
-                to_addresses=(dict(
-                    name=users[uid]['profile']['badge_name'], mail=users[uid]['oauth']['email']), ),
-                subject=f"申請加入通知信 - {users[raw['uid']]['profile']['badge_name']}",
-                body=body,
-            )
+                send_member_mail(raw_mail=raw_mail.as_string(), rid=str(raw['_id']))
 
-            resp = mail_member_send.apply_async(
-                kwargs={'raw_mail': raw_mail.as_string(), 'rid': str(raw['_id'])})
-            logger.info(resp)
+                mid = mmt.find_possible_mid(uid=uid)
+                if mid:
+                    channel_info = mmt.create_a_direct_message(
+                        users=(mid, setting.MATTERMOST_BOT_ID)).json()
 
-            mid = mmt.find_possible_mid(uid=uid)
-            if mid:
-                channel_info = mmt.create_a_direct_message(
-                    users=(mid, setting.MATTERMOST_BOT_ID)).json()
+                    resp = mmt.posts(
+                        channel_id=channel_info['id'],
+                        message=f"收到 **{users[raw['uid']]['profile']['badge_name']}** 申請加入 **{team['name']}**，前往 [管理組員](https://volunteer.coscup.org/team/{team['pid']}/{team['tid']}/edit_user)",  # pylint: disable=line-too-long
+                    )
+                    logger.info(resp.json())
 
-                resp = mmt.posts(
-                    channel_id=channel_info['id'],
-                    message=f"收到 **{users[raw['uid']]['profile']['badge_name']}** 申請加入 **{team['name']}**，前往 [管理組員](https://volunteer.coscup.org/team/{team['pid']}/{team['tid']}/edit_user)",  # pylint: disable=line-too-long
-                )
-                logger.info(resp.json())
+            outbox.mark(raw)
 
 
 @app.task(bind=True, name='mail.member.deny',
@@ -110,38 +114,43 @@ def mail_member_waiting(sender):
           routing_key='cs.mail.member.deny', exchange='COSCUP-SECRETARY')
 def mail_member_deny(sender):
     ''' mail member deny '''
-    tplenv = Environment(loader=FileSystemLoader('./templates/mail'))
-    template = tplenv.get_template('./base_member_deny.html')
-
-    team_member_change_db = TeamMemberChangedDB()
-    awsses = AWSSES(
-        aws_access_key_id=setting.AWS_ID,
-        aws_secret_access_key=setting.AWS_KEY,
-        source=setting.AWS_SES_FROM)
-
-    for raw in team_member_change_db.find(
-        {'done.mail': {'$exists': False}, 'case': 'deny'},
-            sort=(('create_at', 1), )):
-        team = Team.get(raw['pid'], raw['tid'])
-        project = Project().get(pid=team['pid'])
-
-        user = User.get_info(uids=(raw['uid'], ))[raw['uid']]
-        body = template.render(
-            name=user['profile']['badge_name'],
-            team_name=team['name'],
-            project_name=project['name'],
-            pid=team['pid'], )
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mail.member.deny')
+    with outbox.process() as leased:
+        if not leased:
+            return
 
-        raw_mail = awsses.raw_mail(
-            to_addresses=(
-                dict(name=user['profile']['badge_name'], mail=user['oauth']['email']), ),
-            subject=f"申請加入 {team['name']} 未核准",
-            body=body,
-        )
+        raws = outbox.read(cases=('deny', ))
+        if not raws:
+            return
 
-        resp = mail_member_send.apply_async(
-            kwargs={'raw_mail': raw_mail.as_string(), 'rid': str(raw['_id'])})
-        logger.info(resp)
+        teams = Team.get_many(keys=[(raw['pid'], raw['tid']) for raw in raws])
+        projects = Project.get_many(pids=[raw['pid'] for raw in raws])
+        users = User.get_info(uids=list({raw['uid'] for raw in raws}))
+
+        template = MailTemplate.get_template('./base_member_deny.html')
+        awsses = MailTemplate.awsses()
+
+        for raw in raws:
+            team = teams[(raw['pid'], raw['tid'])]
+            project = projects[team['pid']]
+
+            user = users[raw['uid']]
+            body = template.render(
+                name=user['profile']['badge_name'],
+                team_name=team['name'],
+                project_name=project['name'],
+                pid=team['pid'], )
+
+            raw_mail = awsses.raw_mail(
+                to_addresses=(
+                    dict(name=user['profile']['badge_name'], mail=user['oauth']['email']), ),
+                subject=f"申請加入 {team['name']} 未核准",
+                body=body,
+            )
+
+            send_member_mail(raw_mail=raw_mail.as_string(), rid=str(raw['_id']))
+
+            outbox.mark(raw)
 
 
 @app.task(bind=True, name='mail.member.add',
@@ -149,38 +158,39 @@ def mail_member_deny(sender):
           routing_key='cs.mail.member.add', exchange='COSCUP-SECRETARY')
 def mail_member_add(sender):
     ''' mail member add '''
-    tplenv = Environment(loader=FileSystemLoader('./templates/mail'))
-    template = tplenv.get_template('./base_member_add.html')
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mail.member.add')
+    with outbox.process() as leased:
+        if not leased:
+            return
 
-    team_member_change_db = TeamMemberChangedDB()
-    awsses = AWSSES(
-        aws_access_key_id=setting.AWS_ID,
-        aws_secret_access_key=setting.AWS_KEY,
-        source=setting.AWS_SES_FROM)
+        raws = outbox.read(cases=('add', ))
+        if not raws:
+            return
 
-    for raw in team_member_change_db.find(
-        {'done.mail': {'$exists': False}, 'case': 'add'},
-            sort=(('create_at', 1), )):
-        team = Team.get(raw['pid'], raw['tid'])
+        teams = Team.get_many(keys=[(raw['pid'], raw['tid']) for raw in raws])
+        users = User.get_info(uids=list({raw['uid'] for raw in raws}))
 
-        user = User.get_info(uids=(raw['uid'], ))[raw['uid']]
+        template = MailTemplate.get_template('./base_member_add.html')
+        awsses = MailTemplate.awsses()
 
-        body = template.render(
-            name=user['profile']['badge_name'],
-            team_name=team['name'], pid=team['pid'], tid=team['tid'], )
+        for raw in raws:
+            team = teams[(raw['pid'], raw['tid'])]
+            user = users[raw['uid']]
 
-        raw_mail = awsses.raw_mail(
-            to_addresses=(
-                dict(name=user['profile']['badge_name'], mail=user['oauth']['email']), ),
-            subject=f"申請加入 {team['name']} 核准",
-            body=body,
-        )
+            body = template.render(
+                name=user['profile']['badge_name'],
+                team_name=team['name'], pid=team['pid'], tid=team['tid'], )
 
-        resp = mail_member_send.apply_async(
-            kwargs={'raw_mail': raw_mail.as_string(), 'rid': str(raw['_id'])})
-        service_sync_mattermost_add_channel.apply_async(
-            kwargs={'pid': raw['pid'], 'uids': (raw['uid'], )})
-        logger.info(resp)
+            raw_mail = awsses.raw_mail(
+                to_addresses=(
+                    dict(name=user['profile']['badge_name'], mail=user['oauth']['email']), ),
+                subject=f"申請加入 {team['name']} 核准",
+                body=body,
+            )
+
+            send_member_mail(raw_mail=raw_mail.as_string(), rid=str(raw['_id']))
+
+            outbox.mark(raw)
 
 
 @app.task(bind=True, name='mail.member.del',
@@ -188,36 +198,39 @@ def mail_member_add(sender):
           routing_key='cs.mail.member.del', exchange='COSCUP-SECRETARY')
 def mail_member_del(sender):
     ''' mail member del '''
-    tplenv = Environment(loader=FileSystemLoader('./templates/mail'))
-    template = tplenv.get_template('./base_member_del.html')
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mail.member.del')
+    with outbox.process() as leased:
+        if not leased:
+            return
 
-    team_member_change_db = TeamMemberChangedDB()
-    awsses = AWSSES(
-        aws_access_key_id=setting.AWS_ID,
-        aws_secret_access_key=setting.AWS_KEY,
-        source=setting.AWS_SES_FROM)
+        raws = outbox.read(cases=('del', ))
+        if not raws:
+            return
 
-    for raw in team_member_change_db.find(
-        {'done.mail': {'$exists': False}, 'case': 'del'},
-            sort=(('create_at', 1), )):
-        team = Team.get(raw['pid'], raw['tid'])
+        teams = Team.get_many(keys=[(raw['pid'], raw['tid']) for raw in raws])
+        users = User.get_info(uids=list({raw['uid'] for raw in raws}))
 
-        user = User.get_info(uids=(raw['uid'], ))[raw['uid']]
+        template = MailTemplate.get_template('./base_member_del.html')
+        awsses = MailTemplate.awsses()
 
-        body = template.render(
-            name=user['profile']['badge_name'],
-            team_name=team['name'], )
+        for raw in raws:
+            team = teams[(raw['pid'], raw['tid'])]
+            user = users[raw['uid']]
 
-        raw_mail = awsses.raw_mail(
-            to_addresses=(
-                dict(name=user['profile']['badge_name'], mail=user['oauth']['email']), ),
-            subject=f"您已被移除 {team['name']} 的組員資格！",
-            body=body,
-        )
+            body = template.render(
+                name=user['profile']['badge_name'],
+                team_name=team['name'], )
 
-        resp = mail_member_send.apply_async(
-            kwargs={'raw_mail': raw_mail.as_string(), 'rid': str(raw['_id'])})
-        logger.info(resp)
+            raw_mail = awsses.raw_mail(
+                to_addresses=(
+                    dict(name=user['profile']['badge_name'], mail=user['oauth']['email']), ),
+                subject=f"您已被移除 {team['name']} 的組員資格！",
+                body=body,
+            )
+
+            send_member_mail(raw_mail=raw_mail.as_string(), rid=str(raw['_id']))
+
+            outbox.mark(raw)
 
 
 @app.task(bind=True, name='mail.member.welcome',
@@ -225,14 +238,6 @@ def mail_member_del(sender):
           routing_key='cs.mail.member.welcom', exchange='COSCUP-SECRETARY')
 def mail_member_welcome(sender):
     ''' mail member welcome '''
-    tplenv = Environment(loader=FileSystemLoader('./templates/mail'))
-    template = tplenv.get_template('./welcome.html')
-
-    awsses = AWSSES(
-        aws_access_key_id=setting.AWS_ID,
-        aws_secret_access_key=setting.AWS_KEY,
-        source=setting.AWS_SES_FROM)
-
     uids = []
     for user in MailLetterDB().need_to_send(code='welcome'):
         uids.append(user['_id'])
@@ -243,6 +248,9 @@ def mail_member_welcome(sender):
     service_sync_mattermost_invite.apply_async(kwargs={'uids': uids})
     users = User.get_info(uids=uids)
 
+    template = MailTemplate.get_template('./welcome.html')
+    awsses = MailTemplate.awsses()
+
     for uid in uids:
         logger.info('uid: %s', uid)
         body = template.render(
@@ -268,44 +276,100 @@ def mail_member_welcome(sender):
           routing_key='cs.mail.member.send', exchange='COSCUP-SECRETARY')
 def mail_member_send(sender, **kwargs):
     ''' mail member send '''
-    team_member_change_db = TeamMemberChangedDB()
-    awsses = AWSSES(
-        aws_access_key_id=setting.AWS_ID,
-        aws_secret_access_key=setting.AWS_KEY,
-        source=setting.AWS_SES_FROM)
+    send_member_mail(raw_mail=kwargs['raw_mail'], rid=kwargs['rid'])
+
+
+def send_member_mail(raw_mail, rid):
+    ''' Send the mail of the member change, and mark it done
 
-    resp = awsses.send_raw_email(data_str=kwargs['raw_mail'])
+    The member change consumers send in the loop, and mark the record in
+    the outbox after it is sent, the failed one is kept for the retry.
+
+    '''
+    resp = MailTemplate.awsses().send_raw_email(data_str=raw_mail)
     logger.info(resp)
     if resp['ResponseMetadata']['HTTPStatusCode'] != 200:
         raise Exception('HTTPStatusCode not `200`, do retry')
 
-    team_member_change_db.find_one_and_update(
-        {'_id': ObjectId(kwargs['rid'])}, {'$set': {'done.mail': True}})
+    TeamMemberChangedDB().find_one_and_update(
+        {'_id': ObjectId(rid)}, {'$set': {'done.mail': True}})
 
 
 @app.task(bind=True, name='mail.tasks.star',
           autoretry_for=(Exception, ), retry_backoff=True, max_retries=5,
           routing_key='cs.mail.tasks.star', exchange='COSCUP-SECRETARY')
 def mail_tasks_star(sender, **kwargs):
-    ''' mail tasks star '''
+    ''' mail tasks star in digest
+
+    The new tasks queued by [module.tasks.TasksStar.queue_notify][] are sent
+    in one mail per star user, and in chunks by `mail_tasks_star_batch`.
+
+    '''
     pid = kwargs['pid']
-    task_id = kwargs['task_id']
 
-    task = Tasks.get_with_pid(pid=pid, _id=task_id)
+    if 'task_id' in kwargs:
+        TasksStar.queue_notify(pid=pid, task_id=kwargs['task_id'])
 
     uids = []
     for user in TasksStar.get(pid=pid):
         uids.append(user['uid'])
 
-    logger.info(uids)
+    users = []
+    for user_info in User.get_info(uids=uids).values():
+        users.append({
+            'name': user_info['profile']['badge_name'],
+            'mail': user_info['oauth']['email'],
+        })
+
+    # claim after the users are resolved, the pending tasks are kept for
+    # the retry if it fails before.
+    task_ids = TasksStar.claim_notify(pid=pid)
+    if not task_ids:
+        return
 
-    users = User.get_info(uids=uids)
-    for user_info in users.items():
-        user = {}
-        user['name'] = user_info['profile']['badge_name']
-        user['mail'] = user_info['oauth']['email']
-        mail_tasks_star_one.apply_async(kwargs={
-            'pid': pid, 'task_id': task_id, 'user': user, 'task': task})
+    logger.info('task_ids: %s, uids: %s', task_ids, uids)
+
+    for num in range(0, len(users), 50):
+        mail_tasks_star_batch.apply_async(kwargs={
+            'pid': pid, 'task_ids': task_ids, 'users': users[num:num+50]})
+
+
+@app.task(bind=True, name='mail.tasks.star.batch',
+          autoretry_for=(Exception, ), retry_backoff=True, max_retries=5,
+          routing_key='cs.mail.tasks.star.batch', exchange='COSCUP-SECRETARY')
+def mail_tasks_star_batch(sender, **kwargs):
+    ''' mail tasks star in batch
+
+    If it fails in sending, retry with the users not sent yet, not the
+    whole batch.
+
+    '''
+    tasks = list(Tasks.get_by_ids(pid=kwargs['pid'], task_ids=kwargs['task_ids']))
+    if not tasks:
+        return
+
+    template = MailTemplate.get_template('./tasks_star.html')
+    awsses = MailTemplate.awsses()
+
+    if len(tasks) == 1:
+        subject = f"有一筆新志工任務 - {tasks[0]['title']} [{tasks[0]['_id']}]"
+    else:
+        subject = f"有 {len(tasks)} 筆新志工任務 - {tasks[0]['title']} 等"
+
+    for num, user in enumerate(kwargs['users']):
+        raw_mail = awsses.raw_mail(
+            to_addresses=(user, ),
+            subject=subject,
+            body=template.render(name=user['name'], tasks=tasks),
+        )
+
+        try:
+            resp = awsses.send_raw_email(data=raw_mail)
+        except Exception as error:
+            raise sender.retry(
+                kwargs={**kwargs, 'users': kwargs['users'][num:]}, exc=error) from error
+
+        logger.info(resp)
 
 
 @app.task(bind=True, name='mail.tasks.star.one',
@@ -315,15 +379,10 @@ def mail_tasks_star_one(sender, **kwargs):
     ''' mail tasks star one '''
     logger.info(kwargs)
 
-    tplenv = Environment(loader=FileSystemLoader('./templates/mail'))
-    template = tplenv.get_template('./tasks_star.html')
-
-    awsses = AWSSES(
-        aws_access_key_id=setting.AWS_ID,
-        aws_secret_access_key=setting.AWS_KEY,
-        source=setting.AWS_SES_FROM)
+    template = MailTemplate.get_template('./tasks_star.html')
+    awsses = MailTemplate.awsses()
 
-    body = template.render(name=kwargs['user']['name'], task=kwargs['task'])
+    body = template.render(name=kwargs['user']['name'], tasks=[kwargs['task'], ])
 
     raw_mail = awsses.raw_mail(
         to_addresses=(kwargs['user'], ),
@@ -8,9 +8,11 @@ from celery.utils.log import get_task_logger
 
 import setting
 from celery_task.celery_main import app
-from models.mattermostdb import MattermostUsersDB
-from models.teamdb import TeamDB, TeamMemberChangedDB
+from models.mattermostdb import (MattermostChannelSyncDB, MattermostUsersDB,
+                                 MattermostUsersPositionDB)
+from models.teamdb import TeamDB
 from module.mattermost_bot import MattermostBot, MattermostTools
+from module.outbox import MEMBER_CHANGED, MEMBER_CHANGED_CONSUMERS, Outbox
 from module.project import Project
 from module.service_sync import SyncGSuite
 from module.team import Team
@@ -48,65 +50,51 @@ def service_sync_mattermost_users(sender, **kwargs):
           routing_key='cs.servicesync.gsuite.memberchange', exchange='COSCUP-SECRETARY')
 def service_sync_gsuite_memberchange(sender):
     ''' Sync gsuite member change '''
-    team_member_change_db = TeamMemberChangedDB()
     sync_gsuite = None
-    for raw in team_member_change_db.find(
-        {'done.gsuite_team': {'$exists': False},
-            'case': {'$in': ('add', 'del')}},
-            sort=(('create_at', 1), )):
-        team = Team.get(raw['pid'], raw['tid'])
-
-        if 'mailling' not in team or not team['mailling']:
-            team_member_change_db.find_one_and_update(
-                {'_id': raw['_id']}, {'$set': {'done.gsuite_team': True}})
-            continue
-
-        if sync_gsuite is None:
-            sync_gsuite = SyncGSuite(
-                credentialfile=setting.GSUITE_JSON, with_subject=setting.GSUITE_ADMIN)
-
-        user = User(uid=raw['uid']).get()
-        if raw['case'] == 'add':
-            sync_gsuite.add_users_into_group(
-                group=team['mailling'], users=(user['mail'], ))
-            team_member_change_db.find_one_and_update(
-                {'_id': raw['_id']}, {'$set': {'done.gsuite_team': True}})
-
-        elif raw['case'] == 'del':
-            sync_gsuite.del_users_from_group(
-                group=team['mailling'], users=(user['mail'], ))
-            team_member_change_db.find_one_and_update(
-                {'_id': raw['_id']}, {'$set': {'done.gsuite_team': True}})
-
-    for raw in team_member_change_db.find(
-        {'done.gsuite_staff': {'$exists': False},
-            'case': {'$in': ('add', 'del')}},
-            sort=(('create_at', 1), )):
-        project = Project.get(raw['pid'])
-
-        if 'mailling_staff' not in project or not project['mailling_staff']:
-            team_member_change_db.find_one_and_update(
-                {'_id': raw['_id']}, {'$set': {'done.gsuite_staff': True}})
-            continue
-
-        if sync_gsuite is None:
-            sync_gsuite = SyncGSuite(
-                credentialfile=setting.GSUITE_JSON, with_subject=setting.GSUITE_ADMIN)
-
-        user = User(uid=raw['uid']).get()
-        if raw['case'] == 'add':
-            sync_gsuite.add_users_into_group(
-                group=project['mailling_staff'], users=(user['mail'], ))
-            team_member_change_db.find_one_and_update(
-                {'_id': raw['_id']}, {'$set': {'done.gsuite_staff': True}})
-
-        elif raw['case'] == 'del':
-            if not Team.participate_in(uid=raw['uid'], pid=raw['pid']):
-                sync_gsuite.del_users_from_group(
-                    group=project['mailling_staff'], users=(user['mail'], ))
-
-            team_member_change_db.find_one_and_update(
-                {'_id': raw['_id']}, {'$set': {'done.gsuite_staff': True}})
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='gsuite.team')
+    with outbox.process() as leased:
+        raws = outbox.read(cases=('add', 'del')) if leased else []
+        teams = Team.get_many(keys=[(raw['pid'], raw['tid']) for raw in raws])
+        for raw in raws:
+            team = teams.get((raw['pid'], raw['tid']))
+            if team and 'mailling' in team and team['mailling']:
+                if sync_gsuite is None:
+                    sync_gsuite = SyncGSuite(
+                        credentialfile=setting.GSUITE_JSON, with_subject=setting.GSUITE_ADMIN)
+
+                user = User(uid=raw['uid']).get()
+                if raw['case'] == 'add':
+                    sync_gsuite.add_users_into_group(
+                        group=team['mailling'], users=(user['mail'], ))
+
+                elif raw['case'] == 'del':
+                    sync_gsuite.del_users_from_group(
+                        group=team['mailling'], users=(user['mail'], ))
+
+            outbox.mark(raw)
+
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='gsuite.staff')
+    with outbox.process() as leased:
+        raws = outbox.read(cases=('add', 'del')) if leased else []
+        projects = Project.get_many(pids=[raw['pid'] for raw in raws])
+        for raw in raws:
+            project = projects.get(raw['pid'])
+            if project and 'mailling_staff' in project and project['mailling_staff']:
+                if sync_gsuite is None:
+                    sync_gsuite = SyncGSuite(
+                        credentialfile=setting.GSUITE_JSON, with_subject=setting.GSUITE_ADMIN)
+
+                user = User(uid=raw['uid']).get()
+                if raw['case'] == 'add':
+                    sync_gsuite.add_users_into_group(
+                        group=project['mailling_staff'], users=(user['mail'], ))
+
+                elif raw['case'] == 'del':
+                    if not Team.is_participant(uid=raw['uid'], pid=raw['pid']):
+                        sync_gsuite.del_users_from_group(
+                            group=project['mailling_staff'], users=(user['mail'], ))
+
+            outbox.mark(raw)
 
 
 @app.task(bind=True, name='servicesync.gsuite.team_members',
@@ -201,6 +189,34 @@ def service_sync_mattermost_add_channel(sender, **kwargs):
             logger.info(resp.json())
 
 
+@app.task(bind=True, name='servicesync.mattermost.memberchange',
+          autoretry_for=(Exception, ), retry_backoff=True, max_retries=5,
+          routing_key='cs.servicesync.mattermost.memberchange', exchange='COSCUP-SECRETARY')
+def service_sync_mattermost_memberchange(sender):
+    ''' Sync the added members into the project channel '''
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mattermost.channel')
+    with outbox.process() as leased:
+        if not leased:
+            return
+
+        uids: dict[str, list[str]] = {}
+        for raw in outbox.read(cases=('add', )):
+            uids.setdefault(raw['pid'], []).append(raw['uid'])
+
+        for pid, pid_uids in uids.items():
+            service_sync_mattermost_add_channel.apply_async(
+                kwargs={'pid': pid, 'uids': list(dict.fromkeys(pid_uids))})
+
+
+@app.task(bind=True, name='servicesync.outbox.compact',
+          autoretry_for=(Exception, ), retry_backoff=True, max_retries=5,
+          routing_key='cs.servicesync.outbox.compact', exchange='COSCUP-SECRETARY')
+def service_sync_outbox_compact(sender):
+    ''' Daily delete the member changes processed by all the consumers '''
+    deleted = Outbox.compact(name=MEMBER_CHANGED, consumers=list(MEMBER_CHANGED_CONSUMERS))
+    logger.info('deleted: %s', deleted)
+
+
 @app.task(bind=True, name='servicesync.mattermost.projectuserin.channel',
           autoretry_for=(Exception, ), retry_backoff=True, max_retries=2,
           routing_key='cs.servicesync.mattermost.projectuserin.channel',
@@ -218,24 +234,41 @@ def service_sync_mattermost_projectuserin_channel(sender):
 
     mmt = MattermostTools(token=setting.MATTERMOST_BOT_TOKEN,
                           base_url=setting.MATTERMOST_BASEURL)
+    channel_sync_db = MattermostChannelSyncDB()
     for pid, value in pids.items():
         uids = set()
         for team in Team.list_by_pid(pid=pid):
             uids.update(team['chiefs'])
             uids.update(team['members'])
 
+        in_channel = {member['user_id']
+                      for member in mmt.get_channel_members_loop(channel_id=value)}
+
+        missing = []
         for uid in uids:
             mid = mmt.find_possible_mid(uid=uid)
-            if mid:
-                resp = mmt.post_user_to_channel(channel_id=value, uid=mid)
-                logger.info(resp.json())
+            if mid and mid not in in_channel:
+                missing.append(mid)
+
+        for resp in mmt.post_users_to_channel(channel_id=value, uids=missing):
+            logger.info(resp.json())
+
+        channel_sync_db.add(channel_id=value, pid=pid,
+                            members=len(in_channel), added=len(missing))
+        logger.info('pid: %s, in channel: %s, added: %s',
+                    pid, len(in_channel), len(missing))
 
 
 @app.task(bind=True, name='servicesync.mattermost.users.position',
           autoretry_for=(Exception, ), retry_backoff=True, max_retries=2,
           routing_key='cs.servicesync.mattermost.users.position', exchange='COSCUP-SECRETARY')
 def service_sync_mattermost_users_position(sender, **kwargs):
-    ''' Sync mattermost users position '''
+    ''' Sync mattermost users position
+
+    Only the users whose position changed since the last push will be patched,
+    set `force` in kwargs to push all.
+
+    '''
     # pylint: disable=too-many-locals,too-many-branches
     pids = []
     for project in Project.all():
@@ -245,6 +278,7 @@ def service_sync_mattermost_users_position(sender, **kwargs):
     if not pids:
         return
 
+    positions = {}
     for pid in pids:
         users = {}
         for team in Team.list_by_pid(pid=pid):
@@ -266,17 +300,32 @@ def service_sync_mattermost_users_position(sender, **kwargs):
 
                 users[member].append(f'{team_name}(組員)')
 
-        mmt = MattermostTools(token=setting.MATTERMOST_BOT_TOKEN,
-                              base_url=setting.MATTERMOST_BASEURL)
-        mmb = MattermostBot(token=setting.MATTERMOST_BOT_TOKEN,
-                            base_url=setting.MATTERMOST_BASEURL)
-
         for uid, value in users.items():
-            mid = mmt.find_possible_mid(uid=uid)
-            if not mid:
-                continue
-
             position = [pid, ]
             position.extend(value)
             position.append(f'[{uid}]')
-            mmb.put_users_patch(uid=mid, position=' '.join(position))
+            positions[uid] = ' '.join(position)
+
+    mmt = MattermostTools(token=setting.MATTERMOST_BOT_TOKEN,
+                          base_url=setting.MATTERMOST_BASEURL)
+
+    mid_positions = {}
+    for uid, mid in MattermostTools.find_possible_mids(uids=list(positions)).items():
+        mid_positions[mid] = positions[uid]
+
+    position_db = MattermostUsersPositionDB()
+    pushed = {}
+    if 'force' not in kwargs:
+        pushed = position_db.get_hashes(mids=list(mid_positions))
+
+    num = 0
+    for mid, position in mid_positions.items():
+        if pushed.get(mid) == position_db.make_hash(position):
+            continue
+
+        resp = mmt.put_users_patch(uid=mid, position=position)
+        if resp.ok:
+            position_db.add(mid=mid, position=position)
+            num += 1
+
+    logger.info('position patched: %s, total: %s', num, len(mid_positions))
@@ -1,7 +1,16 @@
 ''' db '''
+import os
+import sys
+from typing import Any
+
 import click
 
 from models.index import make_index as make_db_index
+from models.query_shape import advise as advise_shapes
+from models.query_shape import format_keys, record_shapes
+from models.teamdb import TeamPlanDB
+from module.outbox import Outbox
+from module.team import Team
 
 
 @click.group()
@@ -19,4 +28,98 @@ def make_index() -> None:
         '[x] Make indexs for all collections', fg='green', bold=True))
 
 
+@click.command(name='membership')
+@click.option('--pid', default=None, help='Project id, all projects if not set.')
+def membership(pid: str) -> None:
+    ''' Rebuild the membership and the roster from teams '''
+    click.echo(click.style(
+        '[...] Rebuild the membership and the roster ...', fg='green', bold=True))
+    num = Team.rebuild_membership(pid=pid)
+    click.echo(click.style(
+        f'[x] Rebuild the membership of {num} teams', fg='green', bold=True))
+
+
+class ShapePlugin:
+    ''' The pytest plugin to record the query shapes in the session '''
+
+    def __init__(self) -> None:
+        self.stats: Any = None
+        self._record: Any = None
+
+    def pytest_sessionstart(self) -> None:
+        ''' Start to record '''
+        self._record = record_shapes()
+        self.stats = self._record.__enter__()  # pylint: disable=unnecessary-dunder-call
+
+    def pytest_sessionfinish(self) -> None:
+        ''' Stop to record '''
+        self._record.__exit__(None, None, None)
+
+
+@click.command(name='advise')
+@click.option('--suite', type=click.Choice(['tests', 'benchmarks']), default='tests',
+              show_default=True, help='The suite to run.')
+@click.option('--explain/--no-explain', default=True, show_default=True,
+              help='Explain the queries, only with the real mongod.')
+@click.option('--all', 'show_all', is_flag=True, help='Show the covered shapes.')
+@click.argument('pytest_args', nargs=-1)
+def advise(suite: str, explain: bool, show_all: bool, pytest_args: tuple[str, ...]) -> None:
+    ''' Run the suite and advise the missing or redundant indexes '''
+    # pytest is a dev dependency, not in the images installed by `--no-dev`.
+    import pytest  # pylint: disable=import-outside-toplevel
+
+    click.echo(click.style(
+        f'[...] Record the query shapes in {suite} ...', fg='green', bold=True))
+    # `python3 cmdtools/main.py` puts `cmdtools/` first, the suites import the root `main.py`.
+    sys.path.insert(0, os.getcwd())
+    plugin = ShapePlugin()
+    pytest.main([suite, '-q', '-p', 'no:cacheprovider', *pytest_args], plugins=[plugin])
+
+    for advice in advise_shapes(plugin.stats, explain=explain):
+        lines = []
+        for shape, count, status, keys, plan in advice.shapes:
+            if show_all or status in ('missing', 'partial') or plan == 'COLLSCAN':
+                lines.append(f'  [{status}] {shape} x{count}, index: {format_keys(keys)}'
+                             f"{f', plan: {plan}' if plan else ''}")
+
+        lines.extend(f'  [suggest] {format_keys(keys)}' for keys in advice.missing)
+        lines.extend(f'  [redundant] {format_keys(keys)}, prefix of {format_keys(other)}'
+                     for keys, other in advice.redundant)
+        lines.extend(f'  [unused] {format_keys(keys)}' for keys in advice.unused)
+
+        if lines:
+            click.echo(click.style(advice.collection, bold=True))
+            click.echo('\n'.join(lines))
+
+
+@click.command(name='outbox')
+def outbox() -> None:
+    ''' Migrate the member changes into the outbox with `seq` and checkpoints
+
+    Run it before deploying the workers with the outbox. It is safe to run
+    after them, the records they have done are skipped.
+
+    '''
+    click.echo(click.style(
+        '[...] Migrate the member changes ...', fg='green', bold=True))
+    num = Outbox.migrate_member_changed()
+    click.echo(click.style(
+        f'[x] Migrate {num} member changes', fg='green', bold=True))
+
+
+@click.command(name='plan_calendar')
+@click.option('--pid', default=None, help='Project id, all projects if not set.')
+def plan_calendar(pid: str) -> None:
+    ''' Rebuild the team plan calendar from the plans '''
+    click.echo(click.style(
+        '[...] Rebuild the team plan calendar ...', fg='green', bold=True))
+    num = TeamPlanDB().rebuild_calendar(pid=pid)
+    click.echo(click.style(
+        f'[x] Rebuild the calendar of {num} teams', fg='green', bold=True))
+
+
+main.add_command(cmd=advise)
 main.add_command(cmd=make_index)
+main.add_command(cmd=membership)
+main.add_command(cmd=outbox)
+main.add_command(cmd=plan_calendar)
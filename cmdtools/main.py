@@ -1,7 +1,7 @@
 ''' cmd tools '''
 import click
 
-from cmdtools import db, dev
+from cmdtools import db, dev, profiling, seed
 
 
 @click.group(name='cmd groups')
@@ -11,6 +11,8 @@ def main() -> None:
 
 main.add_command(cmd=db.main, name='db')
 main.add_command(cmd=dev.main, name='dev')
+main.add_command(cmd=profiling.main, name='profile')
+main.add_command(cmd=seed.main, name='seed')
 
 if __name__ == '__main__':
     main()
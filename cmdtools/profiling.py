@@ -0,0 +1,75 @@
+''' profiling '''
+import re
+from pathlib import Path
+from typing import Optional
+
+import click
+
+import setting
+from module.profiler import ProfileConfig, aggregate, top_frames
+
+
+@click.group()
+def main() -> None:
+    ''' The sampling profiler of the requests and the Celery tasks '''
+
+
+@click.command(name='enable')
+@click.option('--every', default=0, show_default=True, help='Sample 1-in-N requests.')
+@click.option('--pattern', default='', help='Sample the request paths match the regex.')
+@click.option('--tasks-every', default=0, show_default=True, help='Sample 1-in-N tasks.')
+@click.option('--tasks-pattern', default='', help='Sample the task names match the regex.')
+@click.option('--expire', default=3600, show_default=True, help='Disable after seconds.')
+def enable(every: int, pattern: str, tasks_every: int,  # pylint: disable=too-many-arguments
+           tasks_pattern: str, expire: int) -> None:
+    ''' Enable the profiler in all the web and worker processes '''
+    for regex in (pattern, tasks_pattern):
+        if regex:
+            re.compile(regex)
+
+    ProfileConfig.set(config={'every': every, 'pattern': pattern,
+                              'tasks_every': tasks_every, 'tasks_pattern': tasks_pattern},
+                      expire=expire)
+    click.echo(click.style(
+        f'[x] Enabled in {expire}s, it takes up to {ProfileConfig.ttl}s to apply.',
+        fg='green', bold=True))
+
+
+@click.command(name='disable')
+def disable() -> None:
+    ''' Disable the profiler '''
+    ProfileConfig.delete()
+    click.echo(click.style('[x] Disabled', fg='green', bold=True))
+
+
+@click.command(name='report')
+@click.option('--dir', 'directory', default=setting.PROFILE_DIR, show_default=True,
+              help='The directory of the samples.')
+@click.option('--kind', type=click.Choice(['all', 'web', 'task']), default='all',
+              show_default=True, help='The kind of the samples.')
+@click.option('--match', default='', help='Only the files whose names match the regex.')
+@click.option('--output', default=None, help='Save the collapsed stacks into the file.')
+@click.option('--top', default=20, show_default=True, help='Numbers of the top frames.')
+def report(directory: str, kind: str, match: str,  # pylint: disable=too-many-arguments
+           output: Optional[str], top: int) -> None:
+    ''' Aggregate the samples into one collapsed stack file for flamegraph '''
+    files = sorted(file for file in Path(directory).glob('*.folded')
+                   if (kind == 'all' or file.name.startswith(f'{kind}-')) and
+                   (not match or re.search(match, file.name)))
+    stacks = aggregate(files)
+    total = sum(stacks.values())
+
+    if output:
+        Path(output).write_text(
+            ''.join(f'{stack} {num}\n' for stack, num in sorted(stacks.items())),
+            encoding='utf8')
+
+    click.echo(click.style(
+        f'[x] {len(files)} profiles, {total} samples', fg='green', bold=True))
+    for frame, self_num, total_num in top_frames(stacks, limit=top):
+        click.echo(f'{self_num/total*100:6.2f}% {total_num/total*100:6.2f}%  {frame}')
+
+
+main.add_command(cmd=enable)
+main.add_command(cmd=disable)
+main.add_command(cmd=report)
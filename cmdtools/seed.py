@@ -0,0 +1,530 @@
+''' seed '''
+from datetime import datetime, timedelta
+from random import Random
+from typing import Any
+
+import click
+from bson.objectid import ObjectId
+from pymongo.operations import ReplaceOne
+
+from models.base import DBBase
+from models.budgetdb import BudgetDB
+from models.expensedb import ExpenseDB
+from models.formdb import FormDB
+from models.oauth_db import OAuthDB
+from models.projectdb import ProjectDB
+from models.senderdb import SenderCampaignDB, SenderReceiverDB
+from models.tasksdb import TasksDB, TasksStarDB
+from models.teamdb import TeamDB, TeamMembershipDB, TeamMemberTagsDB
+from models.users_db import UsersDB
+from models.usessiondb import USessionDB
+from models.waitlistdb import WaitListDB
+from module.dietary_habit import DietaryHabit
+from module.roster import Roster
+
+TEAMS = ('coordinator', 'secretary', 'program', 'field', 'documentary',
+         'it', 'marketing', 'financial', 'sponsor', 'photo', 'streaming', 'design')
+
+TAGS = ('早班', '午班', '晚班', '攝影', '司機', '機動')
+
+CLOTHES = ('XS', 'S', 'M', 'L', 'XL', '2XL', '3XL')
+
+LOCATIONS = ('台北', '新北', '桃園', '新竹', '台中', '台南', '高雄', '花蓮')
+
+#: The default `now` of the datasets, `2022-07-01T00:00:00Z`.
+EPOCH = 1656633600.0
+
+#: The expires of the alive sessions, to login with the datasets in any `now`.
+ALIVE_UNTIL = datetime(2100, 1, 1)
+
+
+class Seeder:  # pylint: disable=too-many-instance-attributes
+    ''' Synthetic data generator
+
+    All of the ids and values are generated from the `seed`, so the same
+    arguments will make the same datasets. Every document is saved by
+    `_id` in upsert, run it again will not make the duplicated data.
+
+    Args:
+        seed (int): The random seed.
+        users (int): The numbers of users.
+        projects (int): The numbers of projects, one project per year.
+        teams (int): The numbers of teams per project.
+        batch (int): The numbers of documents in one bulk write.
+        prefix (str): The prefix of project id and user's mail.
+        now (float): The timestamp the datasets are made at, default is
+            the fixed [cmdtools.seed.EPOCH][], not the current time.
+
+    Attributes:
+        counts (dict): The numbers of documents are written in collection name.
+
+    '''
+
+    def __init__(self, seed: int = 2022, users: int = 1000, projects: int = 5,  # pylint: disable=too-many-arguments
+                 teams: int = 8, batch: int = 1000, prefix: str = 'seed',
+                 now: float = EPOCH) -> None:
+        self.rng = Random(seed)
+        self.users = users
+        self.projects = projects
+        self.teams = min(teams, len(TEAMS))
+        self.batch = batch
+        self.prefix = prefix
+        self.now = now
+        self.counts: dict[str, int] = {}
+        self._ids: set[str] = set()
+
+    def make_id(self) -> str:
+        ''' Make an unique id in 8 hex chars
+
+        Returns:
+            Return the id.
+
+        '''
+        while True:
+            _id = f'{self.rng.getrandbits(32):08x}'
+            if _id not in self._ids:
+                self._ids.add(_id)
+                return _id
+
+    def make_oid(self) -> ObjectId:
+        ''' Make an `ObjectId`
+
+        Returns:
+            Return the [bson.objectid.ObjectId][].
+
+        '''
+        return ObjectId(self.rng.getrandbits(96).to_bytes(12, 'big'))
+
+    def make_code(self, head: str) -> str:
+        ''' Make a short code like the budget / expense code
+
+        Args:
+            head (str): The head of the code.
+
+        Returns:
+            Return the code.
+
+        '''
+        return f"{head}-{''.join(self.rng.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=4))}"
+
+    def write(self, collection: DBBase, datas: list[dict[str, Any]]) -> None:
+        ''' Write datas in bulk
+
+        Args:
+            collection (DBBase): The collection.
+            datas (list): List of documents, must have the `_id`.
+
+        '''
+        for i in range(0, len(datas), self.batch):
+            collection.bulk_write(
+                [ReplaceOne({'_id': data['_id']}, data, upsert=True)
+                 for data in datas[i:i+self.batch]],
+                ordered=False)
+
+        self.counts[collection.name] = self.counts.get(
+            collection.name, 0) + len(datas)
+
+    def run(self) -> dict[str, Any]:
+        ''' Generate all datasets
+
+        Returns:
+            Return the generated ids in `uids`, `pids`, `teams` for
+                the benchmarks or tests to pick up.
+
+        '''
+        uids = self.make_users()
+        pids = []
+        teams = []
+        last_year = datetime.fromtimestamp(self.now).year
+        for year in range(last_year - self.projects + 1, last_year + 1):
+            pid, project_teams = self.make_project(uids=uids, year=year)
+            pids.append(pid)
+            teams.extend(project_teams)
+
+        self.make_sessions(uids=uids)
+
+        return {'uids': uids, 'pids': pids, 'teams': teams}
+
+    def make_users(self) -> list[str]:
+        ''' Make users and their oauth records
+
+        Returns:
+            List of `uid`.
+
+        '''
+        users: list[dict[str, Any]] = []
+        oauths = []
+        for num in range(self.users):
+            uid = self.make_id()
+            mail = f'{self.prefix}-{num:06d}@example.org'
+            name = f'Volunteer {num:06d}'
+            users.append({
+                '_id': uid,
+                'mail': mail,
+                'created_at': int(self.now) - self.rng.randint(0, 86400*365*8),
+                'profile': {
+                    'badge_name': f'V{num:06d}',
+                    'intro': f'Hi, I am volunteer {num}.',
+                },
+                'profile_real': {
+                    'name': name,
+                    'phone': f'09{self.rng.randint(0, 99999999):08d}',
+                    'roc_id': f'A{self.rng.randint(100000000, 299999999)}',
+                    'dietary_habit': [self.rng.choice(list(DietaryHabit.ITEMS))],
+                    'birthday': f'{self.rng.randint(1970, 2005)}-{self.rng.randint(1, 12):02d}-01',
+                    'company': self.rng.choice(('', 'COSCUP', 'Example Inc.')),
+                },
+            })
+            oauths.append({
+                '_id': mail,
+                'owner': uid,
+                'data': {
+                    'id': f'{self.rng.getrandbits(64):021d}',
+                    'email': mail,
+                    'verified_email': True,
+                    'name': name,
+                    'given_name': 'Volunteer',
+                    'family_name': f'{num:06d}',
+                    'picture': f'https://example.org/avatar/{uid}.png',
+                    'locale': 'zh-TW',
+                },
+            })
+
+        self.write(UsersDB(), users)
+        self.write(OAuthDB(), oauths)
+
+        return [user['_id'] for user in users]
+
+    def make_project(self, uids: list[str], year: int) -> tuple[str, list[tuple[str, str]]]:
+        ''' Make a project with teams and the relevant datas
+
+        Args:
+            uids (list): List of `uid` to pick up.
+            year (int): The year of the project.
+
+        Returns:
+            Return the `pid` and the list of `(pid, tid)`.
+
+        '''
+        # pylint: disable=too-many-locals
+        pid = f'{self.prefix}{year}'
+        action_date = datetime(year, 7, 30)
+        volunteers = self.rng.sample(
+            uids, k=min(len(uids), max(self.teams*3, int(len(uids)*0.6))))
+        owners = volunteers[:2]
+
+        self.write(ProjectDB(pid=''), [{
+            '_id': pid,
+            'name': f'SEED {year}',
+            'action_date': action_date.timestamp(),
+            'desc': f'Synthetic project in {year}.',
+            'owners': owners,
+            'created_at': (action_date - timedelta(days=180)).timestamp(),
+        }])
+
+        teams = []
+        members_in: dict[str, list[str]] = {}
+        per_team = max(3, len(volunteers) // self.teams)
+        team_datas = []
+        tags_datas = []
+        for num, tid in enumerate(TEAMS[:self.teams]):
+            team_uids = volunteers[num*per_team:(num+1)*per_team] or \
+                self.rng.sample(volunteers, k=min(len(volunteers), 3))
+            chiefs = team_uids[:self.rng.randint(1, 2)]
+            members = team_uids[len(chiefs):]
+            tags = [{'id': self.make_id(), 'name': name}
+                    for name in self.rng.sample(TAGS, k=3)]
+
+            team_datas.append({
+                '_id': self.make_oid(),
+                'pid': pid,
+                'tid': tid,
+                'name': tid.capitalize(),
+                'owners': owners,
+                'chiefs': chiefs,
+                'members': members,
+                'desc': f'The {tid} team in {year}.',
+                'tag_members': tags,
+                'created_at': (action_date - timedelta(days=150)).timestamp(),
+            })
+
+            for uid in members:
+                if self.rng.random() < 0.3:
+                    tags_datas.append({
+                        '_id': self.make_oid(),
+                        'pid': pid, 'tid': tid, 'uid': uid,
+                        'tags': [tag['id'] for tag in self.rng.sample(
+                            tags, k=self.rng.randint(1, 2))],
+                    })
+
+            teams.append((pid, tid))
+            members_in[tid] = chiefs + members
+
+        self.write(TeamDB(pid='', tid=''), team_datas)
+        for team in team_datas:
+            TeamMembershipDB().sync(team)
+
+        Roster.save(pid=pid)
+        self.write(TeamMemberTagsDB(), tags_datas)
+
+        all_members = [uid for team_uids in members_in.values()
+                       for uid in team_uids]
+        self.make_waitlist(pid=pid, uids=uids, members_in=members_in)
+        self.make_forms(pid=pid, uids=all_members)
+        self.make_budgets(pid=pid, year=year, members_in=members_in)
+        self.make_tasks(pid=pid, action_date=action_date,
+                        uids=all_members, owners=owners)
+        self.make_sender(pid=pid, members_in=members_in)
+
+        return pid, teams
+
+    def make_waitlist(self, pid: str, uids: list[str], members_in: dict[str, list[str]]) -> None:
+        ''' Make the waitlist, half of them are still in waiting
+
+        Args:
+            pid (str): Project id.
+            uids (list): List of `uid` to pick up.
+            members_in (dict): The members in `tid`.
+
+        '''
+        datas = []
+        for tid, team_uids in members_in.items():
+            for uid in self.rng.sample(uids, k=min(len(uids), max(1, len(team_uids)//2))):
+                data = {'_id': self.make_oid(), 'pid': pid, 'tid': tid, 'uid': uid,
+                        'note': f'I want to join {tid}.'}
+                result = self.rng.choice(('', 'approval', 'deny'))
+                if result:
+                    data['result'] = result
+
+                datas.append(data)
+
+        self.write(WaitListDB(), datas)
+
+    def make_forms(self, pid: str, uids: list[str]) -> None:
+        ''' Make the forms
+
+        Args:
+            pid (str): Project id.
+            uids (list): List of `uid` in the project.
+
+        '''
+        datas = []
+        for uid in uids:
+            cases = {
+                'appreciation': {
+                    'available': True,
+                    'key': self.rng.choice(('oauth', 'badge_name', 'real_name')),
+                    'value': f'V-{uid}'},
+                'clothes': {'clothes': self.rng.choice(CLOTHES)},
+                'traffic_fee': {
+                    'apply': self.rng.random() < 0.3,
+                    'fee': self.rng.choice((0, 150, 300, 600, 1200)),
+                    'fromwhere': self.rng.choice(LOCATIONS),
+                    'howto': 'HSR'},
+                'accommodation': {
+                    'key': self.rng.choice(('yes-longtraffic', 'yes', 'no', 'no', 'no')),
+                    'status': False},
+                'volunteer_certificate': {'value': self.rng.random() < 0.5},
+                'drink': {'y18': self.rng.random() < 0.7},
+                'parking_card': {
+                    'carno': f'ABC-{self.rng.randint(0, 9999):04d}',
+                    'dates': self.rng.sample(('Day 1', 'Day 2'), k=self.rng.randint(0, 2))},
+            }
+            for case, data in cases.items():
+                if self.rng.random() < 0.8:
+                    datas.append({'_id': self.make_oid(), 'case': case,
+                                  'pid': pid, 'uid': uid, 'data': data})
+
+        self.write(FormDB(), datas)
+
+    def make_budgets(self, pid: str, year: int, members_in: dict[str, list[str]]) -> None:
+        ''' Make the budgets and expenses
+
+        Args:
+            pid (str): Project id.
+            year (int): The year of the project.
+            members_in (dict): The members in `tid`.
+
+        '''
+        budgets = []
+        expenses = []
+        for tid, team_uids in members_in.items():
+            for num in range(self.rng.randint(3, 10)):
+                budget: dict[str, Any] = {
+                    '_id': self.make_id(),
+                    'pid': pid,
+                    'tid': tid,
+                    'bid': f'{tid[:2].upper()}{num:03d}',
+                    'name': f'{tid} budget {num}',
+                    'uid': team_uids[0],
+                    'currency': self.rng.choice(('TWD', 'TWD', 'TWD', 'USD')),
+                    'total': self.rng.randint(10, 2000) * 100,
+                    'paydate': f'{year}-{self.rng.randint(1, 7):02d}-{self.rng.randint(1, 28):02d}',
+                    'desc': f'Budget {num} for {tid}.',
+                    'estimate': '',
+                    'code': self.make_code('B'),
+                    'enabled': True,
+                    'create_at': datetime(year, 1, 1) + timedelta(days=num),
+                }
+                budgets.append(budget)
+
+                for _ in range(self.rng.randint(0, 3)):
+                    uid = self.rng.choice(team_uids)
+                    expenses.append({
+                        '_id': self.make_id(),
+                        'pid': pid,
+                        'tid': tid,
+                        'request': {
+                            'buid': budget['_id'],
+                            'desc': f"Expense of {budget['name']}",
+                            'paydate': budget['paydate'],
+                            'code': budget['code'],
+                        },
+                        'invoices': [{
+                            'currency': budget['currency'],
+                            'name': f'Invoice {i}',
+                            'status': self.rng.choice(('not_send', 'sent', 'no_invoice')),
+                            'total': self.rng.randint(1, budget['total']),
+                            'received': self.rng.random() < 0.5,
+                        } for i in range(self.rng.randint(1, 3))],
+                        'bank': {'branch': '', 'code': '000', 'name': '', 'no': ''},
+                        'status': self.rng.choice(('1', '2', '3')),
+                        'note': {'myself': '', 'to_create': ''},
+                        'code': self.make_code('E'),
+                        'relevant_code': [],
+                        'create_by': uid,
+                        'create_at': budget['create_at'] + timedelta(days=30),
+                    })
+
+        self.write(BudgetDB(), budgets)
+        self.write(ExpenseDB(), expenses)
+
+    def make_tasks(self, pid: str, action_date: datetime,  # pylint: disable=too-many-arguments
+                   uids: list[str], owners: list[str]) -> None:
+        ''' Make the tasks and the star users
+
+        Args:
+            pid (str): Project id.
+            action_date (datetime): The event date.
+            uids (list): List of `uid` in the project.
+            owners (list): The project owners.
+
+        '''
+        tasks = []
+        for num in range(self.rng.randint(20, 50)):
+            starttime = action_date + timedelta(
+                days=self.rng.randint(-30, 2), hours=self.rng.randint(8, 20))
+            limit = self.rng.randint(1, 10)
+            tasks.append({
+                '_id': self.make_id(),
+                'pid': pid,
+                'title': f'Task {num}',
+                'cate': self.rng.choice(('場佈', '搬運', '採買', '接待')),
+                'desc': f'The task {num} in {pid}.',
+                'limit': limit,
+                'people': self.rng.sample(uids, k=min(len(uids), self.rng.randint(0, limit))),
+                'starttime': starttime,
+                'endtime': starttime + timedelta(hours=self.rng.randint(1, 4)),
+                'created_by': self.rng.choice(owners),
+                'created_at': starttime - timedelta(days=14),
+            })
+
+        self.write(TasksDB(), tasks)
+        self.write(TasksStarDB(), [
+            {'_id': self.make_oid(), 'pid': pid, 'uid': uid,
+             'created_at': action_date - timedelta(days=60)}
+            for uid in self.rng.sample(uids, k=len(uids)//4)])
+
+    def make_sender(self, pid: str, members_in: dict[str, list[str]]) -> None:
+        ''' Make the sender campaigns and receivers
+
+        Args:
+            pid (str): Project id.
+            members_in (dict): The members in `tid`.
+
+        '''
+        campaigns = []
+        receivers = []
+        for tid, team_uids in members_in.items():
+            cid = f'{self.rng.getrandbits(128):032x}'
+            campaigns.append({
+                '_id': cid,
+                'name': f'{tid} campaign',
+                'created': {'pid': pid, 'tid': tid, 'uid': team_uids[0],
+                            'at': self.now - 86400*30},
+                'receiver': {'teams': [tid], 'users': [],
+                             'team_w_tags': {}, 'all_users': False},
+                'mail': {'subject': f'Hi {tid}', 'content': 'Hello!',
+                         'preheader': '', 'layout': '1'},
+            })
+            for num in range(self.rng.randint(10, 50)):
+                receivers.append({
+                    '_id': self.make_oid(), 'pid': pid, 'cid': cid,
+                    'data': {'name': f'Receiver {num}',
+                             'mail': f'{self.prefix}-r{num:04d}@example.org'}})
+
+        self.write(SenderCampaignDB(), campaigns)
+        self.write(SenderReceiverDB(), receivers)
+
+    def make_sessions(self, uids: list[str]) -> None:
+        ''' Make the sessions, the last one for each user is alive
+
+        The alive sessions are expired at [cmdtools.seed.ALIVE_UNTIL][], not
+        after `alive_days` from `now`, so they can be used to login.
+
+        Args:
+            uids (list): List of `uid`.
+
+        '''
+        ips = [f'10.{self.rng.randint(0, 255)}.{self.rng.randint(0, 255)}.'
+               f'{self.rng.randint(1, 254)}' for _ in range(max(1, len(uids)//5))]
+        datas = []
+        for uid in uids:
+            for num in range(self.rng.randint(1, 4), -1, -1):
+                created_at = self.now - num*86400*7 - self.rng.randint(0, 3600)
+                ip_address = self.rng.choice(ips)
+                datas.append({
+                    '_id': f'{self.rng.getrandbits(128):032x}',
+                    'uid': uid,
+                    'header': {'X-Real-Ip': ip_address, 'X-Forwarded-For': ip_address,
+                               'User-Agent': 'seed'},
+                    'created_at': created_at,
+                    'alive': num == 0,
+                    'expires_at': ALIVE_UNTIL if num == 0 else
+                    datetime.utcfromtimestamp(created_at) + timedelta(days=USessionDB.alive_days),
+                })
+
+        self.write(USessionDB(), datas)
+
+
+@click.group()
+def main() -> None:
+    ''' Make the synthetic datasets '''
+
+
+@click.command(name='make')
+@click.option('--seed', 'seed_num', default=2022, show_default=True, help='Random seed.')
+@click.option('--users', default=1000, show_default=True, help='Numbers of users.')
+@click.option('--projects', default=5, show_default=True, help='Numbers of projects.')
+@click.option('--teams', default=8, show_default=True, help='Numbers of teams per project.')
+@click.option('--batch', default=1000, show_default=True, help='Documents per bulk write.')
+@click.option('--prefix', default='seed', show_default=True, help='Prefix of pid and mail.')
+@click.option('--now', default=EPOCH, show_default=True,
+              help='The timestamp the datasets are made at.')
+def make(seed_num: int, users: int, projects: int, teams: int,  # pylint: disable=too-many-arguments
+         batch: int, prefix: str, now: float) -> None:
+    ''' Make the datasets of users, projects, teams and the relevant datas '''
+    click.echo(click.style(
+        f'[...] Seeding with seed: {seed_num} ...', fg='green', bold=True))
+
+    seeder = Seeder(seed=seed_num, users=users, projects=projects,
+                    teams=teams, batch=batch, prefix=prefix, now=now)
+    seeder.run()
+
+    for name, count in seeder.counts.items():
+        click.echo(f'   {name:<20} {count:>8}')
+
+    click.echo(click.style('[x] Done', fg='green', bold=True))
+
+
+main.add_command(cmd=make)
@@ -10,8 +10,9 @@ from urllib.parse import parse_qs, urlparse
 import arrow
 import google_auth_oauthlib.flow
 from apiclient import discovery
-from flask import (Flask, g, got_request_exception, redirect, render_template,
-                   request, session, url_for)
+from flask import (Flask, Response, before_render_template, g,
+                   got_request_exception, redirect, render_template, request,
+                   session, template_rendered, url_for)
 from markdown import markdown
 
 import setting
@@ -19,7 +20,10 @@ from celery_task.task_mail_sys import mail_sys_weberror
 from models.mailletterdb import MailLetterDB
 from module.mattermost_bot import MattermostTools
 from module.mc import MC
+from module.metrics import REGISTRY, render
 from module.oauth import OAuth
+from module.profiler import Profiler
+from module.timing import RequestTiming
 from module.team import Team
 from module.users import User
 from module.usession import USession
@@ -72,8 +76,15 @@ NO_NEED_LOGIN_PATH = {
     '/robots.txt',
     '/api/members',
     '/telegram/r',
+    '/metrics',
 }
 
+if setting.METRICS_DIR:
+    REGISTRY.directory = f'{setting.METRICS_DIR}/web'
+
+PROFILER = Profiler(kind='web', directory=setting.PROFILE_DIR,
+                    root=str(Path(__file__).parent))
+
 
 # For development mode.
 # if `./view/dev.py` is exist, Append the `/dev` path into.
@@ -85,6 +96,13 @@ if Path('/app/view/dev.py').exists():
     NO_NEED_LOGIN_PATH.add('/dev/cookie')
 
 
+@app.before_request
+def timing_start():
+    ''' Start the request timing and the sampled profiler, before all the others '''
+    g.timing = RequestTiming()  # pylint: disable=assigning-non-slot
+    g.profile = PROFILER.start(request.path)  # pylint: disable=assigning-non-slot
+
+
 @app.before_request
 def need_login():
     ''' need_login '''
@@ -161,6 +179,66 @@ def no_store(response):
     return response
 
 
+@app.after_request
+def timing_end(response):
+    ''' Add the `Server-Timing` header, and log the slow request '''
+    sampler = g.pop('profile', None)
+    if sampler is not None:
+        PROFILER.save(sampler=sampler, name=request.endpoint or 'not_found')
+
+    timing = g.pop('timing', None)
+    if timing is None:
+        return response
+
+    timing.stop()
+    response.headers['Server-Timing'] = timing.server_timing()
+
+    endpoint = request.endpoint or 'not_found'
+    REGISTRY.inc('http_requests_total', endpoint=endpoint,
+                 method=request.method, status=response.status_code)
+    REGISTRY.observe('http_request_duration_seconds', timing.total, endpoint=endpoint)
+    REGISTRY.observe_commands(timing.mongo)
+    REGISTRY.observe_cache(timing.mc)
+    REGISTRY.dump()
+
+    view_args = request.view_args or {}
+    timing.log_slow(
+        threshold_ms=setting.SLOW_REQUEST_MS,
+        method=request.method, path=request.path, endpoint=request.endpoint,
+        status=response.status_code, pid=view_args.get('pid'), tid=view_args.get('tid'),
+        uid=g.get('user', {}).get('account', {}).get('_id'))
+
+    return response
+
+
+@app.teardown_request
+def timing_teardown(exception):  # pylint: disable=unused-argument
+    ''' Stop the request timing when `after_request` is not called '''
+    sampler = g.pop('profile', None)
+    if sampler is not None:
+        PROFILER.save(sampler=sampler, name=request.endpoint or 'not_found')
+
+    timing = g.pop('timing', None)
+    if timing is not None:
+        timing.stop()
+
+
+def timing_render_start(sender, **extra):  # pylint: disable=unused-argument
+    ''' Template render start '''
+    if 'timing' in g:
+        g.timing.render_start()
+
+
+def timing_render_end(sender, **extra):  # pylint: disable=unused-argument
+    ''' Template render end '''
+    if 'timing' in g:
+        g.timing.render_end()
+
+
+before_render_template.connect(timing_render_start, app)
+template_rendered.connect(timing_render_end, app)
+
+
 @app.route('/')
 def index():
     ''' index '''
@@ -177,7 +255,7 @@ def index():
         if len(g.user['account']['profile']['intro']) > 100:
             check['profile'] = True
 
-    if list(Team.participate_in(uid=g.user['account']['_id'])):
+    if Team.is_participant(uid=g.user['account']['_id']):
         check['participate_in'] = True
 
     if MattermostTools.find_possible_mid(uid=g.user['account']['_id']):
@@ -294,6 +372,27 @@ def robots():
 Allow: /'''
 
 
+@app.route('/metrics')
+def metrics():
+    ''' The metrics in the Prometheus text format
+
+    Only for the `Authorization: Bearer {METRICS_TOKEN}`, or from localhost
+    directly if the token is not set.
+
+    '''
+    if setting.METRICS_TOKEN:
+        allowed = request.headers.get('Authorization') == f'Bearer {setting.METRICS_TOKEN}'
+    else:
+        allowed = request.remote_addr in ('127.0.0.1', '::1') and \
+            'X-Real-Ip' not in request.headers and 'X-Forwarded-For' not in request.headers
+
+    if not allowed:
+        return Response('Not Found', status=404)
+
+    return Response(render(REGISTRY.collect()),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/exception')
 def exception_func():
     ''' exception_func '''
@@ -4,9 +4,18 @@
     The base module for connect to MongoDB. In testing mode, we use the `mongomock`
     for mock data and need set the `MONGO_MOCK` to be `True` in `setting.py`.
 
+    The commands sent to MongoDB can be recorded by [models.base.record_commands][],
+    for the instrumentation, benchmarks and tests. With `mongomock`, the collection
+    methods are recorded as the same command names.
+
 '''
-from time import time
-from typing import TYPE_CHECKING, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter, time
+from typing import TYPE_CHECKING, Any, Callable, Generator
+
+from pymongo import monitoring
 
 import setting
 
@@ -20,13 +29,179 @@ else:
     from mongomock.store import DatabaseStore
     MOCK_DB_STORE = DatabaseStore()  # type: ignore
 
+
+class CommandStats:
+    ''' The recorded commands
+
+    Attributes:
+        commands (list): List of `(command name, collection, duration in seconds)`.
+
+    '''
+    __slots__ = ('commands', )
+
+    def __init__(self) -> None:
+        self.commands: list[tuple[str, str, float]] = []
+
+    @property
+    def count(self) -> int:
+        ''' The numbers of commands '''
+        return len(self.commands)
+
+    @property
+    def duration(self) -> float:
+        ''' The total duration in seconds '''
+        return sum(command[2] for command in self.commands)
+
+    def by_collection(self) -> dict[str, int]:
+        ''' Count commands in collection
+
+        Returns:
+            Return `{'<collection>': <count>, ...}`.
+
+        '''
+        result: dict[str, int] = {}
+        for _, collection, _ in self.commands:
+            result[collection] = result.get(collection, 0) + 1
+
+        return result
+
+
+_RECORDS: ContextVar[tuple[CommandStats, ...]] = ContextVar('_RECORDS', default=())
+
+
+def emit_command(name: str, collection: str, duration: float) -> None:
+    ''' Emit the command into all active records
+
+    Args:
+        name (str): Command name.
+        collection (str): Collection name.
+        duration (float): Duration in seconds.
+
+    '''
+    for stats in _RECORDS.get():
+        stats.commands.append((name, collection, duration))
+
+
+@contextmanager
+def record_commands() -> Generator[CommandStats, None, None]:
+    ''' Record the commands in this context, could be nested.
+
+    Yields:
+        Return the [models.base.CommandStats][].
+
+    Examples:
+        ```python
+        with record_commands() as stats:
+            User.get_info(uids=uids)
+
+        print(stats.count)
+        ```
+
+    '''
+    stats = CommandStats()
+    token = _RECORDS.set(_RECORDS.get() + (stats, ))
+    try:
+        yield stats
+    finally:
+        _RECORDS.reset(token)
+
+
+class CommandListener(monitoring.CommandListener):
+    ''' The command listener for pymongo '''
+
+    def __init__(self) -> None:
+        self.pending: dict[int, tuple[str, str]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if not _RECORDS.get():
+            return
+
+        collection = event.command.get(event.command_name)
+        if event.command_name == 'getMore':
+            collection = event.command.get('collection')
+
+        self.pending[event.request_id] = (
+            event.command_name, collection if isinstance(collection, str) else '')
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event.request_id, event.duration_micros)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event.request_id, event.duration_micros)
+
+    def _finish(self, request_id: int, duration_micros: int) -> None:
+        pending = self.pending.pop(request_id, None)
+        if pending:
+            emit_command(name=pending[0], collection=pending[1],
+                         duration=duration_micros / 1000000)
+
+
+COMMAND_LISTENER = CommandListener()
+
+#: The mapping of the `mongomock` collection methods to the command names.
+MOCK_COMMANDS = {
+    'aggregate': 'aggregate',
+    'bulk_write': 'update',
+    'count_documents': 'aggregate',
+    'delete_many': 'delete',
+    'delete_one': 'delete',
+    'distinct': 'distinct',
+    'estimated_document_count': 'count',
+    'find': 'find',
+    'find_one': 'find',
+    'find_one_and_delete': 'findAndModify',
+    'find_one_and_replace': 'findAndModify',
+    'find_one_and_update': 'findAndModify',
+    'insert_many': 'insert',
+    'insert_one': 'insert',
+    'replace_one': 'update',
+    'update_many': 'update',
+    'update_one': 'update',
+}
+
+_IN_MOCK_COMMAND: ContextVar[bool] = ContextVar('_IN_MOCK_COMMAND', default=False)
+
+
+def mock_command(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    ''' Wrap the `mongomock` collection method to emit the command.
+
+    The calls inside the method, like `find_one` calls `find`, are not recorded.
+
+    Args:
+        name (str): Command name.
+        func (Callable): The collection method.
+
+    Returns:
+        Return the wrapped method.
+
+    '''
+    @wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if not _RECORDS.get() or _IN_MOCK_COMMAND.get():
+            return func(self, *args, **kwargs)
+
+        token = _IN_MOCK_COMMAND.set(True)
+        start = perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            _IN_MOCK_COMMAND.reset(token)
+            emit_command(name=name, collection=self.name,
+                         duration=perf_counter() - start)
+
+    return wrapper
+
+
 if TYPE_CHECKING:
     class DBBase(Collection[dict[str, Any]]):
         ''' DBBase '''
-        # pylint: disable=super-init-not-called,multiple-statements
+        # pylint: disable=super-init-not-called,multiple-statements,unused-argument
 
         def __init__(self, name: str) -> None: ...
 
+        def drop_index_by_keys(self, keys: list[tuple[str, int]]) -> bool:
+            ''' Drop the index by the keys '''
+
 else:
     class DBBase(Collection):  # pylint: disable=abstract-method
         ''' DBBase class
@@ -39,7 +214,8 @@ else:
         def __init__(self, name: str) -> None:
             if not setting.MONGO_MOCK:
                 client = MongoClient(
-                    f'mongodb://{setting.MONGO_HOST}:{setting.MONGO_PORT}')[setting.MONGO_DBNAME]
+                    f'mongodb://{setting.MONGO_HOST}:{setting.MONGO_PORT}',
+                    event_listeners=[COMMAND_LISTENER])[setting.MONGO_DBNAME]
                 super_args = {'database': client, 'name': name}
             else:
                 client = mongomock.MongoClient()['testing']
@@ -57,3 +233,25 @@ else:
 
             '''
             data['created_at'] = time()
+
+        def drop_index_by_keys(self, keys: list[tuple[str, int]]) -> bool:
+            ''' Drop the index by the keys, for the index replaced by another one
+
+            Args:
+                keys (list): The index keys, `[(field, direction), ...]`.
+
+            Returns:
+                Return `True` if the index is existed and dropped.
+
+            '''
+            for name, info in self.index_information().items():
+                if [tuple(key) for key in info['key']] == keys:
+                    self.drop_index(name)
+                    return True
+
+            return False
+
+    if setting.MONGO_MOCK:
+        for _method, _command in MOCK_COMMANDS.items():
+            setattr(DBBase, _method, mock_command(
+                name=_command, func=getattr(Collection, _method)))
@@ -20,12 +20,10 @@ class ExpenseDB(DBBase):
         ''' To make collection's index
 
         Indexs:
-            - `pid`, `tid`
             - `pid`, `tid`, `request.buid`
             - `pid`, `tid`, `create_by`
 
         '''
-        self.create_index([('pid', 1), ('tid', 1)])
         self.create_index([('pid', 1), ('tid', 1), ('request.buid', 1)])
         self.create_index([('pid', 1), ('tid', 1), ('create_by', 1)])
 
@@ -16,11 +16,11 @@ class FormDB(DBBase):
         ''' To make collection's index
 
         Indexs:
-            - `case`
+            - `case`, `pid`, `uid`
             - `pid`
 
         '''
-        self.create_index([('case', 1), ])
+        self.create_index([('case', 1), ('pid', 1), ('uid', 1)])
         self.create_index([('pid', 1), ])
 
     def add_by_case(self, case: str, pid: str, uid: str, data: dict[str, Any]) -> dict[str, Any]:
@@ -7,17 +7,21 @@ with `index()` will be aggregated here.
 from models.budgetdb import BudgetDB
 from models.expensedb import ExpenseDB
 from models.formdb import FormDB
+from models.ipinfodb import IPInfoDB
 from models.mailletterdb import MailLetterDB
 from models.mattermost_link_db import MattermostLinkDB
 from models.mattermostdb import MattermostUsersDB
 from models.oauth_db import OAuthDB
+from models.outboxdb import OutboxCheckpointDB
 from models.projectdb import ProjectDB
+from models.rosterdb import RosterDB
 from models.senderdb import SenderReceiverDB
-from models.teamdb import (TeamDB, TeamMemberChangedDB, TeamMemberTagsDB,
-                           TeamPlanDB)
+from models.tasksdb import TasksDB, TasksStarDB, TasksStarNotifyDB
+from models.teamdb import (TeamDB, TeamMemberChangedDB, TeamMembershipDB,
+                           TeamMemberTagsDB, TeamPlanCalendarDB, TeamPlanDB)
 from models.telegram_db import TelegramDB
-from models.users_db import UsersDB
-from models.usessiondb import USessionDB
+from models.users_db import TobeVolunteerDB, UsersDB
+from models.usessiondb import USessionArchiveDB, USessionDB
 from models.waitlistdb import WaitListDB
 
 
@@ -26,17 +30,27 @@ def make_index() -> None:
     BudgetDB().index()
     ExpenseDB().index()
     FormDB().index()
+    IPInfoDB().index()
     MailLetterDB().index()
     MattermostLinkDB().index()
     MattermostUsersDB().index()
     OAuthDB().index()
+    OutboxCheckpointDB().index()
     ProjectDB(pid='').index()
+    RosterDB().index()
     SenderReceiverDB().index()
+    TasksDB().index()
+    TasksStarDB().index()
+    TasksStarNotifyDB().index()
     TeamDB(pid='', tid='').index()
     TeamMemberChangedDB().index()
+    TeamMembershipDB().index()
     TeamMemberTagsDB().index()
+    TeamPlanCalendarDB().index()
     TeamPlanDB().index()
     TelegramDB().index()
+    TobeVolunteerDB().index()
+    USessionArchiveDB().index()
     USessionDB().index()
     UsersDB().index()
     WaitListDB().index()
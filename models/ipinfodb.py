@@ -0,0 +1,57 @@
+''' IPInfoDB '''
+from datetime import datetime
+from typing import Any
+
+from models.base import DBBase
+
+
+class IPInfoDB(DBBase):
+    ''' IPInfoDB Collection
+
+    The cache of the ipinfo.io responses, keyed by the IP address.
+
+    Struct:
+        - ``_id``: IP address.
+        - ``data``: The ipinfo response data.
+        - ``created_at``: [datetime.datetime][], for the TTL index.
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('ipinfo')
+
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `created_at`, expire after 30 days.
+
+        '''
+        self.create_index([('created_at', 1), ], expireAfterSeconds=86400*30)
+
+    def get_by_ips(self, ips: list[str]) -> dict[str, dict[str, Any]]:
+        ''' Get cached data
+
+        Args:
+            ips (list): List of IP address.
+
+        Returns:
+            Return `{ip: data}`.
+
+        '''
+        return {raw['_id']: raw['data'] for raw in self.find(
+            {'_id': {'$in': ips}}, {'data': 1})}
+
+    def add(self, ip_address: str, data: dict[str, Any]) -> None:
+        ''' Save data
+
+        Args:
+            ip_address (str): IP address.
+            data (dict): The ipinfo response data.
+
+        '''
+        self.find_one_and_update(
+            {'_id': ip_address},
+            {'$set': {'data': data, 'created_at': datetime.utcnow()}},
+            upsert=True,
+        )
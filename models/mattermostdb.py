@@ -1,4 +1,6 @@
 ''' MattermostUsersDB '''
+import hashlib
+from time import time
 from typing import Any
 
 from pymongo.collection import ReturnDocument
@@ -41,3 +43,102 @@ class MattermostUsersDB(DBBase):
             upsert=True,
             return_document=ReturnDocument.AFTER,
         )
+
+
+class MattermostUsersPositionDB(DBBase):
+    ''' MattermostUsersPositionDB Collection
+
+    Keep the last position which was pushed to Mattermost, to skip the
+    unchanged users in the next sync.
+
+    Struct:
+        - ``_id``: Mattermost user id.
+        - ``position``: The position title.
+        - ``hash``: The sha256 hash of the position.
+        - ``updated_at``: `timestamp`
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('mattermost_users_position')
+
+    @staticmethod
+    def make_hash(position: str) -> str:
+        ''' Make the content hash of position
+
+        Args:
+            position (str): The position title.
+
+        Returns:
+            Return the sha256 hex digest.
+
+        '''
+        return hashlib.sha256(position.encode('utf8')).hexdigest()
+
+    def get_hashes(self, mids: list[str]) -> dict[str, str]:
+        ''' Get the pushed hashes
+
+        Args:
+            mids (list): List of Mattermost user id.
+
+        Returns:
+            Return `{mid: hash}`.
+
+        '''
+        return {raw['_id']: raw['hash'] for raw in self.find(
+            {'_id': {'$in': mids}}, {'hash': 1})}
+
+    def add(self, mid: str, position: str) -> None:
+        ''' Save the pushed position
+
+        Args:
+            mid (str): Mattermost user id.
+            position (str): The position title.
+
+        '''
+        self.find_one_and_update(
+            {'_id': mid},
+            {'$set': {'position': position,
+                      'hash': self.make_hash(position),
+                      'updated_at': time()}},
+            upsert=True,
+        )
+
+
+class MattermostChannelSyncDB(DBBase):
+    ''' MattermostChannelSyncDB Collection
+
+    The checkpoint of the project members sync into the channel.
+
+    Struct:
+        - ``_id``: Channel id.
+        - ``pid``: Project id.
+        - ``members``: The numbers of members in channel before sync.
+        - ``added``: The numbers of users added in the sync.
+        - ``synced_at``: `timestamp`
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('mattermost_channel_sync')
+
+    def add(self, channel_id: str, pid: str, members: int, added: int) -> dict[str, Any]:
+        ''' Save the checkpoint
+
+        Args:
+            channel_id (str): Channel id.
+            pid (str): Project id.
+            members (int): The numbers of members in channel before sync.
+            added (int): The numbers of users added.
+
+        Returns:
+            Return the inserted / updated data.
+
+        '''
+        return self.find_one_and_update(
+            {'_id': channel_id},
+            {'$set': {'pid': pid, 'members': members,
+                      'added': added, 'synced_at': time()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
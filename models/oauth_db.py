@@ -16,10 +16,14 @@ class OAuthDB(DBBase):  # pylint: disable=abstract-method
         ''' To make collection's index
 
         Indexs:
-            - `owner`
+            - `owner`, `data.email`, `data.name`, `data.picture`: covered the
+              projection in [module.users.User.get_info][].
+
+        The `owner` index before is covered by the prefix, it is dropped.
 
         '''
-        self.create_index([('owner', 1), ])
+        self.create_index([('owner', 1), ('data.email', 1), ('data.name', 1), ('data.picture', 1)])
+        self.drop_index_by_keys([('owner', 1), ])
 
     def add_data(self, mail: str, data: dict[str, Any]) -> dict[str, Any]:
         ''' Add user data
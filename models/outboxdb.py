@@ -0,0 +1,131 @@
+''' OutboxDB '''
+from time import time
+
+from pymongo.collection import ReturnDocument
+
+from models.base import DBBase
+
+
+class SequenceDB(DBBase):
+    ''' Sequence Collection
+
+    The monotonically increasing numbers, for the `seq` in the outbox.
+
+    Struct:
+        - ``_id``: The sequence name, as the outbox collection name.
+        - ``seq``: The last reserved number.
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('sequence')
+
+    def reserve(self, name: str, num: int = 1) -> int:
+        ''' Reserve the numbers
+
+        Args:
+            name (str): The sequence name.
+            num (int): Numbers to reserve.
+
+        Returns:
+            Return the first reserved number, the reserved numbers are
+            `range(first, first + num)`.
+
+        '''
+        data = self.find_one_and_update(
+            {'_id': name},
+            {'$inc': {'seq': num}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        return int(data['seq']) - num + 1
+
+    def last(self, name: str) -> int:
+        ''' The last reserved number
+
+        Args:
+            name (str): The sequence name.
+
+        Returns:
+            Return the last number, or `0` if nothing is reserved.
+
+        '''
+        data = self.find_one({'_id': name})
+        if not data:
+            return 0
+
+        return int(data['seq'])
+
+
+class OutboxCheckpointDB(DBBase):
+    ''' Outbox Checkpoint Collection
+
+    The last processed `seq` of each consumer of the outbox.
+
+    Struct:
+        - ``_id``: `<outbox>:<consumer>`.
+        - ``outbox``: The outbox collection name.
+        - ``consumer``: The consumer name.
+        - ``seq``: The last processed `seq`.
+        - ``updated_at``: Updated at in timestamp.
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('outbox_checkpoint')
+
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `outbox`
+
+        '''
+        self.create_index([('outbox', 1), ])
+
+    def get(self, outbox: str, consumer: str) -> int:
+        ''' Get the checkpoint
+
+        Args:
+            outbox (str): The outbox collection name.
+            consumer (str): The consumer name.
+
+        Returns:
+            Return the last processed `seq`, or `0` if never processed.
+
+        '''
+        data = self.find_one({'_id': f'{outbox}:{consumer}'}, {'seq': 1})
+        if not data:
+            return 0
+
+        return int(data['seq'])
+
+    def set_checkpoint(self, outbox: str, consumer: str, seq: int) -> None:
+        ''' Save the checkpoint, never moves backward
+
+        Args:
+            outbox (str): The outbox collection name.
+            consumer (str): The consumer name.
+            seq (int): The last processed `seq`.
+
+        '''
+        self.update_one(
+            {'_id': f'{outbox}:{consumer}'},
+            {'$max': {'seq': seq},
+             '$set': {'outbox': outbox, 'consumer': consumer, 'updated_at': time()}},
+            upsert=True,
+        )
+
+    def list_by_outbox(self, outbox: str) -> dict[str, int]:
+        ''' List the checkpoints of the outbox
+
+        Args:
+            outbox (str): The outbox collection name.
+
+        Returns:
+            Return `{'<consumer>': <seq>, ...}`.
+
+        '''
+        return {raw['consumer']: int(raw['seq']) for raw in self.find(
+            {'outbox': outbox}, {'consumer': 1, 'seq': 1})}
@@ -0,0 +1,126 @@
+''' Projection
+
+    The typed read models of the hot documents. Each model only has the
+    fields the list pages need, and the [models.projection.Projection.projection][]
+    is made from the fields, so the query only fetches these fields, not the
+    whole document with the long `intro`, `desc` or `tag_members`.
+
+    The callers choose the projection they need, like
+    [module.users.User.get_cards][] or [module.team.TeamProjection.list_summaries][].
+
+'''
+# pylint: disable=too-few-public-methods
+from typing import Any, Mapping, TypeVar
+
+from pydantic import BaseModel, Field
+
+ProjectionT = TypeVar('ProjectionT', bound='Projection')
+
+
+class Projection(BaseModel):
+    ''' The base of the read models
+
+    The field is read from the path in `Field(path='a.b')`, or the field
+    name (alias) if not set.
+
+    '''
+
+    class Config:
+        ''' Model config '''
+        allow_mutation = False
+        allow_population_by_field_name = True
+
+    @classmethod
+    def paths(cls) -> dict[str, str]:
+        ''' The paths in document of the fields
+
+        Returns:
+            Return `{'<field name>': '<path>', ...}`.
+
+        '''
+        return {name: field.field_info.extra.get('path', field.alias)
+                for name, field in cls.__fields__.items()}
+
+    @classmethod
+    def projection(cls) -> dict[str, int]:
+        ''' The projection for `find()`
+
+        Returns:
+            Return the projection, without `_id` if not in the fields.
+
+        '''
+        result = {path: 1 for path in cls.paths().values()}
+        result.setdefault('_id', 0)
+        return result
+
+    @classmethod
+    def from_doc(cls: type[ProjectionT], doc: Mapping[str, Any]) -> ProjectionT:
+        ''' Make from the document
+
+        Args:
+            doc (dict): The document queried by the [models.projection.Projection.projection][].
+
+        Returns:
+            Return the model.
+
+        '''
+        values: dict[str, Any] = {}
+        for name, path in cls.paths().items():
+            value: Any = doc
+            for key in path.split('.'):
+                if not isinstance(value, Mapping) or key not in value:
+                    break
+                value = value[key]
+            else:
+                values[name] = value
+
+        return cls(**values)
+
+
+class UserCard(Projection):
+    ''' The user's card, for the lists of users
+
+    Attributes:
+        uid (str): User id.
+        badge_name (str): The badge name in profile, or the name in OAuth.
+        picture (str): The picture from OAuth.
+
+    '''
+    uid: str
+    badge_name: str = ''
+    picture: str = ''
+
+
+class TeamSummary(Projection):
+    ''' The summary of team, for the lists of teams
+
+    Attributes:
+        pid (str): Project id.
+        tid (str): Team id.
+        name (str): Team name.
+        disabled (bool): The team is disabled.
+
+    '''
+    pid: str
+    tid: str
+    name: str
+    disabled: bool = False
+
+
+class TeamRoster(TeamSummary):
+    ''' The users in team, without the `tag_members` and the descriptions
+
+    Attributes:
+        owners (list): List of the owners' `uid`.
+        chiefs (list): List of the chiefs' `uid`.
+        members (list): List of the members' `uid`.
+
+    '''
+    owners: list[str] = Field(default_factory=list)
+    chiefs: list[str] = Field(default_factory=list)
+    members: list[str] = Field(default_factory=list)
+
+    @property
+    def uids(self) -> list[str]:
+        ''' The chiefs and the members, without the duplicates '''
+        return list(dict.fromkeys(self.chiefs + self.members))
@@ -0,0 +1,615 @@
+''' Query shape
+
+    Record the shapes of the queries sent by [models.base.DBBase][], the
+    fields of the filters and the sorts without the values, and compare
+    them with the indexes declared by the `index()` in [models.index][].
+
+    The equality fields (plain values, `$eq`, `$in`, `$exists: False` as the
+    `null`) come first, then the sort fields, then the range fields, as the
+    suggested index. It is used by `cmdtools db advise` to find the missing
+    or redundant indexes.
+
+'''
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Generator, Mapping, NamedTuple, Optional
+
+import setting
+from models import index as models_index
+from models.base import DBBase
+
+if not setting.MONGO_MOCK:
+    from pymongo.cursor import Cursor
+else:
+    from mongomock.collection import Cursor  # type: ignore
+
+#: The operators as equality, others are as range.
+EQUALITY_OPERATORS = {'$eq', '$in', '$all', '$elemMatch'}
+
+#: The methods of collection with the filter in the first argument.
+FILTER_METHODS = (
+    'count_documents', 'delete_many', 'delete_one', 'find', 'find_one',
+    'find_one_and_delete', 'find_one_and_replace', 'find_one_and_update',
+    'replace_one', 'update_many', 'update_one',
+)
+
+#: The limit of the branches from `$or`.
+MAX_BRANCHES = 16
+
+#: The default index in every collection.
+ID_INDEX = (('_id', 1), )
+
+
+class QueryShape(NamedTuple):
+    ''' The shape of query
+
+    Attributes:
+        collection (str): Collection name.
+        operation (str): The collection method.
+        equality (tuple): The equality fields, sorted.
+        ranges (tuple): The range fields, sorted.
+        sort (tuple): The sort keys, `((field, direction), ...)`.
+
+    '''
+    collection: str
+    operation: str
+    equality: tuple[str, ...]
+    ranges: tuple[str, ...]
+    sort: tuple[tuple[str, int], ...]
+
+    def suggest(self) -> tuple[tuple[str, int], ...]:
+        ''' The suggested index, equality, sort, range
+
+        Returns:
+            Return the index keys.
+
+        '''
+        keys = [(field, 1) for field in self.equality]
+        for field, direction in self.sort:
+            if field not in self.equality:
+                keys.append((field, direction))
+
+        for field in self.ranges:
+            if field not in self.equality and field not in dict(self.sort):
+                keys.append((field, 1))
+
+        return tuple(keys)
+
+    def __str__(self) -> str:
+        parts = [f"{{{', '.join(self.equality)}}}"]
+        if self.ranges:
+            parts.append(f"range {{{', '.join(self.ranges)}}}")
+        if self.sort:
+            parts.append(f"sort ({', '.join(f'{k} {v}' for k, v in self.sort)})")
+
+        return f"{self.operation} {' '.join(parts)}"
+
+
+class ShapeStats:
+    ''' The recorded shapes
+
+    Attributes:
+        shapes (Counter): The calls of each [models.query_shape.QueryShape][].
+        examples (dict): An example filter of each shape, for `explain()`.
+
+    '''
+    __slots__ = ('shapes', 'examples')
+
+    def __init__(self) -> None:
+        self.shapes: Counter[QueryShape] = Counter()
+        self.examples: dict[QueryShape, dict[str, Any]] = {}
+
+    def add(self, shape: QueryShape, example: Mapping[str, Any]) -> None:
+        ''' Add the shape
+
+        Args:
+            shape (QueryShape): The shape.
+            example (dict): The filter.
+
+        '''
+        self.shapes[shape] += 1
+        self.examples.setdefault(shape, dict(example))
+
+    def remove(self, shape: QueryShape) -> None:
+        ''' Remove one call of the shape
+
+        Args:
+            shape (QueryShape): The shape.
+
+        '''
+        self.shapes[shape] -= 1
+        if self.shapes[shape] <= 0:
+            del self.shapes[shape]
+
+    def by_collection(self) -> dict[str, Counter[QueryShape]]:
+        ''' Group the shapes by collection
+
+        Returns:
+            Return `{'<collection>': Counter({<shape>: <count>, ...}), ...}`.
+
+        '''
+        result: dict[str, Counter[QueryShape]] = {}
+        for shape, count in self.shapes.items():
+            result.setdefault(shape.collection, Counter())[shape] = count
+
+        return result
+
+
+def split_filter(query: Mapping[str, Any]) -> list[tuple[frozenset[str], frozenset[str]]]:
+    ''' Split the filter into `(equality fields, range fields)`
+
+    The `$or` is split into the branches, the `$and` is merged.
+
+    Args:
+        query (dict): The filter.
+
+    Returns:
+        Return the list of `(equality fields, range fields)` for each branch.
+
+    '''
+    branches: list[tuple[frozenset[str], frozenset[str]]] = [(frozenset(), frozenset())]
+    for key, value in query.items():
+        if key in ('$or', '$and') and isinstance(value, list):
+            subs = [split_filter(sub) for sub in value if isinstance(sub, Mapping)]
+            if key == '$or':
+                others = [branch for sub in subs for branch in sub]
+                subs = [others] if others else []
+
+            for sub in subs:
+                branches = [(equality | sub_eq, ranges | sub_range)
+                            for equality, ranges in branches
+                            for sub_eq, sub_range in sub][:MAX_BRANCHES]
+
+            continue
+
+        if key.startswith('$'):
+            continue
+
+        is_equality = True
+        if isinstance(value, Mapping) and value and all(
+                isinstance(op, str) and op.startswith('$') for op in value):
+            is_equality = all(op in EQUALITY_OPERATORS or (op == '$exists' and not value[op])
+                              for op in value)
+
+        branches = [(equality | {key}, ranges) if is_equality else (equality, ranges | {key})
+                    for equality, ranges in branches]
+
+    return branches
+
+
+def make_sort(sort: Any, direction: Optional[int] = None) -> tuple[tuple[str, int], ...]:
+    ''' Normalize the sort from `find(sort=...)` or `cursor.sort()`
+
+    Args:
+        sort: The key, or the list of `(key, direction)`, or dict.
+        direction (int): The direction when the `sort` is a key.
+
+    Returns:
+        Return the sort keys.
+
+    '''
+    if not sort:
+        return ()
+
+    if isinstance(sort, str):
+        return ((sort, direction or 1), )
+
+    if isinstance(sort, Mapping):
+        sort = sort.items()
+
+    result = []
+    for item in sort:
+        if isinstance(item, str):
+            result.append((item, 1))
+        else:
+            result.append((item[0], item[1] if isinstance(item[1], int) else 1))
+
+    return tuple(result)
+
+
+def make_shapes(collection: str, operation: str, query: Optional[Mapping[str, Any]],
+                sort: tuple[tuple[str, int], ...] = ()) -> list[QueryShape]:
+    ''' Make the shapes of the query
+
+    Args:
+        collection (str): Collection name.
+        operation (str): The collection method.
+        query (dict): The filter.
+        sort (tuple): The sort keys.
+
+    Returns:
+        Return the list of [models.query_shape.QueryShape][], one for each `$or` branch.
+
+    '''
+    return [QueryShape(collection=collection, operation=operation,
+                       equality=tuple(sorted(equality)), ranges=tuple(sorted(ranges)),
+                       sort=sort)
+            for equality, ranges in split_filter(query or {})]
+
+
+_SHAPES: ContextVar[tuple[ShapeStats, ...]] = ContextVar('_SHAPES', default=())
+_IN_SHAPE: ContextVar[bool] = ContextVar('_IN_SHAPE', default=False)
+_CURSORS: 'weakref.WeakKeyDictionary[Any, list[QueryShape]]' = weakref.WeakKeyDictionary()
+
+
+def emit_shapes(shapes: list[QueryShape], example: Mapping[str, Any]) -> None:
+    ''' Emit the shapes into all active records
+
+    Args:
+        shapes (list): List of [models.query_shape.QueryShape][].
+        example (dict): The filter.
+
+    '''
+    for stats in _SHAPES.get():
+        for shape in shapes:
+            stats.add(shape=shape, example=example)
+
+
+def _find_filter(operation: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+    if operation == 'distinct':
+        return args[1] if len(args) > 1 else kwargs.get('filter')
+
+    return args[0] if args else kwargs.get('filter')
+
+
+def shape_method(operation: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    ''' Wrap the collection method to record the shapes
+
+    Args:
+        operation (str): The collection method name.
+        func (Callable): The collection method.
+
+    Returns:
+        Return the wrapped method.
+
+    '''
+    @wraps(func)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if not _SHAPES.get() or _IN_SHAPE.get():
+            return func(self, *args, **kwargs)
+
+        shapes: list[QueryShape] = []
+        example: Mapping[str, Any] = {}
+        if operation == 'aggregate':
+            pipeline = args[0] if args else kwargs.get('pipeline', [])
+            if pipeline and '$match' in pipeline[0]:
+                example = pipeline[0]['$match']
+                sort: tuple[tuple[str, int], ...] = ()
+                if len(pipeline) > 1 and '$sort' in pipeline[1]:
+                    sort = make_sort(pipeline[1]['$sort'])
+                shapes = make_shapes(self.name, operation, example, sort)
+        elif operation == 'bulk_write':
+            requests = args[0] if args else kwargs.get('requests', [])
+            for request in requests:
+                query = getattr(request, '_filter', None)
+                if query is not None:
+                    shapes.extend(make_shapes(self.name, operation, query))
+                    example = query
+        else:
+            example = _find_filter(operation, args, kwargs) or {}
+            shapes = make_shapes(self.name, operation, example,
+                                 make_sort(kwargs.get('sort')))
+
+        emit_shapes(shapes=shapes, example=example)
+
+        token = _IN_SHAPE.set(True)
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            _IN_SHAPE.reset(token)
+
+        if operation == 'find' and shapes:
+            try:
+                _CURSORS[result] = shapes
+            except TypeError:
+                pass
+
+        return result
+
+    return wrapper
+
+
+def shape_sort(func: Callable[..., Any]) -> Callable[..., Any]:
+    ''' Wrap the `Cursor.sort` to add the sort keys into the recorded shapes
+
+    Args:
+        func (Callable): The `Cursor.sort`.
+
+    Returns:
+        Return the wrapped method.
+
+    '''
+    @wraps(func)
+    def wrapper(self: Any, key_or_list: Any, direction: Optional[int] = None) -> Any:
+        shapes = _CURSORS.pop(self, None) if _SHAPES.get() else None
+        if shapes:
+            sort = make_sort(key_or_list, direction)
+            new_shapes = [shape._replace(sort=sort) for shape in shapes]
+            for stats in _SHAPES.get():
+                for old, new in zip(shapes, new_shapes):
+                    if old in stats.shapes:
+                        stats.remove(old)
+                        stats.add(shape=new, example=stats.examples.get(old, {}))
+
+            _CURSORS[self] = new_shapes
+
+        if direction is None:
+            return func(self, key_or_list)
+
+        return func(self, key_or_list, direction)
+
+    return wrapper
+
+
+@contextmanager
+def patch_attrs(patches: list[tuple[Any, str, Any]]) -> Generator[None, None, None]:
+    ''' Patch the attributes of classes, and restore after
+
+    Args:
+        patches (list): List of `(class, name, value)`.
+
+    '''
+    saved = [(cls, name, cls.__dict__.get(name)) for cls, name, _ in patches]
+    for cls, name, value in patches:
+        setattr(cls, name, value)
+
+    try:
+        yield
+    finally:
+        for cls, name, value in saved:
+            if value is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, value)
+
+
+@contextmanager
+def record_shapes() -> Generator[ShapeStats, None, None]:
+    ''' Record the query shapes in this context, could be nested.
+
+    Yields:
+        Return the [models.query_shape.ShapeStats][].
+
+    Examples:
+        ```python
+        with record_shapes() as stats:
+            Team.get_users(pid=pid, tids=tids)
+
+        print(stats.by_collection())
+        ```
+
+    '''
+    stats = ShapeStats()
+    token = _SHAPES.set(_SHAPES.get() + (stats, ))
+    if len(_SHAPES.get()) > 1:
+        try:
+            yield stats
+        finally:
+            _SHAPES.reset(token)
+        return
+
+    patches: list[tuple[Any, str, Any]] = [
+        (DBBase, name, shape_method(name, getattr(DBBase, name)))
+        for name in FILTER_METHODS + ('aggregate', 'bulk_write', 'distinct')]
+    patches.append((Cursor, 'sort', shape_sort(Cursor.sort)))
+
+    try:
+        with patch_attrs(patches):
+            yield stats
+    finally:
+        _SHAPES.reset(token)
+
+
+def declared_indexes() -> dict[str, list[tuple[tuple[tuple[str, int], ...], dict[str, Any]]]]:
+    ''' The indexes declared by the `index()` in [models.index.make_index][]
+
+    Returns:
+        Return `{'<collection>': [(keys, options), ...], ...}`.
+
+    '''
+    result: dict[str, list[tuple[tuple[tuple[str, int], ...], dict[str, Any]]]] = {}
+
+    def create_index(self: Any, keys: Any, **kwargs: Any) -> str:
+        result.setdefault(self.name, []).append((make_sort(keys), kwargs))
+        return ''
+
+    with patch_attrs([(DBBase, 'create_index', create_index)]):
+        models_index.make_index()
+
+    return result
+
+
+def match_index(shape: QueryShape,
+                indexes: list[tuple[tuple[tuple[str, int], ...], dict[str, Any]]]
+                ) -> tuple[str, Optional[tuple[tuple[str, int], ...]]]:
+    ''' Match the shape with the indexes
+
+    The index is covered if it starts with all the equality fields, then
+    the sort fields, then one of the range fields if there are the range
+    fields not in the sort. The unique index with all the fields in
+    equality is covered, at most one document is matched.
+
+    Args:
+        shape (QueryShape): The shape.
+        indexes (list): List of `(keys, options)`.
+
+    Returns:
+        Return `(status, keys)`, the status is `covered`, `partial`, `missing`
+        or `scan` (no filter and no sort, the full scan is intended).
+
+    '''
+    if not shape.equality and not shape.ranges and not shape.sort:
+        return ('scan', None)
+
+    if '_id' in shape.equality:
+        return ('covered', ID_INDEX)
+
+    equality = set(shape.equality)
+    sort_fields = [field for field, _ in shape.sort if field not in equality]
+    ranges = set(shape.ranges) - equality - set(sort_fields)
+    best: tuple[int, Optional[tuple[tuple[str, int], ...]]] = (0, None)
+    for keys, options in indexes:
+        fields = [field for field, _ in keys]
+        prefix = 0
+        while prefix < len(fields) and fields[prefix] in equality:
+            prefix += 1
+
+        rest = fields[prefix + len(sort_fields):]
+        if prefix == len(equality) and \
+                fields[prefix:prefix + len(sort_fields)] == sort_fields and \
+                (not ranges or (rest and rest[0] in ranges)):
+            return ('covered', keys)
+
+        if options.get('unique') and prefix == len(fields):
+            return ('covered', keys)
+
+        score = prefix or int(fields[0] in shape.ranges or fields[0] in sort_fields)
+        if score > best[0]:
+            best = (score, keys)
+
+    if best[1] is not None:
+        return ('partial', best[1])
+
+    return ('missing', None)
+
+
+def redundant_indexes(indexes: list[tuple[tuple[tuple[str, int], ...], dict[str, Any]]]
+                      ) -> list[tuple[tuple[tuple[str, int], ...], tuple[tuple[str, int], ...]]]:
+    ''' Find the indexes are the prefix of another index
+
+    The indexes with options, like `unique` or `expireAfterSeconds`, are not redundant.
+
+    Args:
+        indexes (list): List of `(keys, options)`.
+
+    Returns:
+        Return the list of `(redundant keys, the longer keys)`.
+
+    '''
+    result = []
+    for keys, options in indexes:
+        if options:
+            continue
+
+        for other, _ in indexes:
+            if len(other) > len(keys) and other[:len(keys)] == keys:
+                result.append((keys, other))
+                break
+
+    return result
+
+
+def explain_shape(shape: QueryShape, example: Mapping[str, Any]) -> Optional[str]:
+    ''' Explain the example query in MongoDB, only with the real `mongod`.
+
+    Args:
+        shape (QueryShape): The shape.
+        example (dict): The filter.
+
+    Returns:
+        Return the winning plan stage, like `IXSCAN`, `COLLSCAN`, or `None` in `MONGO_MOCK`.
+
+    '''
+    if setting.MONGO_MOCK:
+        return None
+
+    cursor = DBBase(shape.collection).find(example).limit(1)
+    if shape.sort:
+        cursor = cursor.sort(list(shape.sort))
+
+    plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+    stages = []
+    while plan:
+        stages.append(plan.get('stage', ''))
+        plan = plan.get('inputStage', {})
+
+    for stage in ('COLLSCAN', 'IXSCAN', 'IDHACK'):
+        if stage in stages:
+            return stage
+
+    return stages[-1] if stages else None
+
+
+class Advice(NamedTuple):
+    ''' The advice of collection
+
+    Attributes:
+        collection (str): Collection name.
+        indexes (list): The declared index keys.
+        shapes (list): List of `(shape, count, status, keys, plan)`.
+        redundant (list): List of `(redundant keys, the longer keys)`.
+        unused (list): The declared index keys not used by the recorded shapes.
+
+    '''
+    collection: str
+    indexes: list[tuple[tuple[str, int], ...]]
+    shapes: list[tuple[QueryShape, int, str, Optional[tuple[tuple[str, int], ...]], Optional[str]]]
+    redundant: list[tuple[tuple[tuple[str, int], ...], tuple[tuple[str, int], ...]]]
+    unused: list[tuple[tuple[str, int], ...]]
+
+    @property
+    def missing(self) -> list[tuple[tuple[str, int], ...]]:
+        ''' The suggested indexes for the not covered shapes '''
+        result = []
+        for shape, _, status, _, plan in self.shapes:
+            if status in ('missing', 'partial') or plan == 'COLLSCAN':
+                keys = shape.suggest()
+                if keys not in result:
+                    result.append(keys)
+
+        return result
+
+
+def advise(stats: ShapeStats, explain: bool = True) -> list[Advice]:
+    ''' Compare the recorded shapes with the declared indexes
+
+    Args:
+        stats (ShapeStats): The recorded shapes.
+        explain (bool): Explain the queries with the real `mongod`.
+
+    Returns:
+        Return the list of [models.query_shape.Advice][], sorted by collection.
+
+    '''
+    declared = declared_indexes()
+    grouped = stats.by_collection()
+
+    result = []
+    for collection in sorted(set(declared) | set(grouped)):
+        indexes = [keys for keys, _ in declared.get(collection, [])]
+        used: set[tuple[tuple[str, int], ...]] = set()
+        shapes = []
+        for shape, count in grouped.get(collection, Counter()).most_common():
+            status, keys = match_index(shape, declared.get(collection, []))
+            plan = explain_shape(shape, stats.examples.get(shape, {})) if explain else None
+            if keys is not None:
+                used.add(keys)
+            shapes.append((shape, count, status, keys, plan))
+
+        result.append(Advice(
+            collection=collection, indexes=indexes, shapes=shapes,
+            redundant=redundant_indexes(declared.get(collection, [])),
+            unused=[keys for keys in indexes if keys not in used] if shapes else [],
+        ))
+
+    return result
+
+
+def format_keys(keys: Optional[tuple[tuple[str, int], ...]]) -> str:
+    ''' Format the index keys, like `(pid, uid)`
+
+    Args:
+        keys (tuple): The index keys.
+
+    Returns:
+        Return the string.
+
+    '''
+    if not keys:
+        return '-'
+
+    fields = [field if direction == 1 else f'{field} {direction}' for field, direction in keys]
+    return f"({', '.join(fields)})"
@@ -0,0 +1,35 @@
+''' RosterDB '''
+from models.base import DBBase
+
+
+class RosterDB(DBBase):
+    ''' Roster Collection
+
+    The materialized users in project, one document for each user in the
+    project, rebuilt by [module.roster.Roster][].
+
+    Struct:
+        - ``pid``: Project id.
+        - ``uid``: User id.
+        - ``teams``: List of `{'tid': str, 'role': 'chief' | 'member'}`,
+                     not in the disabled teams.
+        - ``badge_name``: The badge name in profile.
+        - ``picture``: The picture from OAuth.
+        - ``email``: The email from OAuth.
+        - ``email_hash``: The md5 of the email, for Gravatar.
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('roster')
+
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `pid`, `uid`: unique
+            - `uid`
+
+        '''
+        self.create_index([('pid', 1), ('uid', 1)], unique=True)
+        self.create_index([('uid', 1), ])
@@ -12,6 +12,22 @@ class TasksDB(DBBase):
     def __init__(self) -> None:
         super().__init__('tasks')
 
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `pid`, `starttime`, `_id`
+            - `pid`, `cate`, `starttime`, `_id`
+            - `pid`, `people`, `starttime`, `_id`
+
+        The `pid`, `starttime` index before is covered by the prefix, it is dropped.
+
+        '''
+        self.create_index([('pid', 1), ('starttime', 1), ('_id', 1)])
+        self.create_index([('pid', 1), ('cate', 1), ('starttime', 1), ('_id', 1)])
+        self.create_index([('pid', 1), ('people', 1), ('starttime', 1), ('_id', 1)])
+        self.drop_index_by_keys([('pid', 1), ('starttime', 1)])
+
     @staticmethod
     def new(pid: str, body: dict[str, Any], endtime: Optional[datetime] = None) -> dict[str, Any]:
         ''' new data
@@ -63,6 +79,15 @@ class TasksStarDB(DBBase):
     def __init__(self) -> None:
         super().__init__('tasks_star')
 
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `pid`, `uid`
+
+        '''
+        self.create_index([('pid', 1), ('uid', 1)])
+
     @staticmethod
     def new(pid: str, uid: str) -> dict[str, Any]:
         ''' new data
@@ -88,3 +113,32 @@ class TasksStarDB(DBBase):
             'uid': uid,
             'created_at': datetime.now(),
         }
+
+
+class TasksStarNotifyDB(DBBase):
+    ''' TasksStarNotifyDB Collection
+
+    The pending notifications of the new tasks, for the star users in digest.
+
+    Struct:
+        - ``pid``: Project id.
+        - ``task_id``: Task id.
+        - ``created_at``: `timestamp`
+        - ``claim``: The random code of the digest which claimed it.
+        - ``claimed_at``: `timestamp`
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('tasks_star_notify')
+
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `pid`, `claim`, `created_at`
+            - `claim`
+
+        '''
+        self.create_index([('pid', 1), ('claim', 1), ('created_at', 1)])
+        self.create_index([('claim', 1), ])
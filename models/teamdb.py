@@ -1,10 +1,13 @@
 ''' TeamDB '''
+from datetime import date, timedelta
 from time import time
 from typing import Any, Optional
 
+from pymongo.operations import DeleteOne, UpdateOne
 from pymongo.collection import ReturnDocument
 
 from models.base import DBBase
+from models.outboxdb import SequenceDB
 
 
 class TeamDB(DBBase):
@@ -34,12 +37,15 @@ class TeamDB(DBBase):
         Indexs:
             - `chiefs`
             - `members`
-            - `pid`
+            - `pid`, `tid`: unique, also for the queries in `pid` only.
+
+        The `pid` index before is covered by the prefix, it is dropped.
 
         '''
         self.create_index([('chiefs', 1), ])
         self.create_index([('members', 1), ])
-        self.create_index([('pid', 1), ])
+        self.create_index([('pid', 1), ('tid', 1)], unique=True)
+        self.drop_index_by_keys([('pid', 1), ])
 
     def default(self) -> dict[str, Any]:
         ''' default data
@@ -111,7 +117,7 @@ class TeamDB(DBBase):
 
     def update_users(self, field: str,
                      add_uids: Optional[list[str]] = None,
-                     del_uids: Optional[list[str]] = None) -> None:
+                     del_uids: Optional[list[str]] = None) -> Optional[dict[str, Any]]:
         ''' Update users
 
         Args:
@@ -119,16 +125,48 @@ class TeamDB(DBBase):
             add_uids (list): Optional, list of uids for add them into the `field`.
             del_uids (list): Optional, list of uids for delete them from the `field`.
 
+        Returns:
+            Return the updated data, `None` if nothing to update.
+
         '''
+        result = None
         if add_uids:
-            self.find_one_and_update(
+            result = self.find_one_and_update(
                 {'pid': self.pid, 'tid': self.tid},
-                {'$addToSet': {field: {'$each': add_uids}}})
+                {'$addToSet': {field: {'$each': add_uids}}},
+                return_document=ReturnDocument.AFTER)
 
         if del_uids:
-            self.find_one_and_update(
+            result = self.find_one_and_update(
                 {'pid': self.pid, 'tid': self.tid},
-                {'$pullAll': {field: del_uids}})
+                {'$pullAll': {field: del_uids}},
+                return_document=ReturnDocument.AFTER)
+
+        return result
+
+    def add_members_in_headcount(self, add_uids: list[str]) -> Optional[dict[str, Any]]:
+        ''' Add members if the members and the chiefs are still in the `headcount`
+
+        The `headcount` is checked in the same update, the concurrent adds
+        can not both pass it. The `headcount` in `0` or not set is no limit.
+        The chiefs are counted in the `headcount`, the same as the approval
+        and the count in the members page.
+
+        Args:
+            add_uids (list): List of uids for add them into the `members`.
+
+        Returns:
+            Return the updated data, `None` if it is over the `headcount`.
+
+        '''
+        in_team = {'$setUnion': [{'$ifNull': ['$members', []]},
+                                 {'$ifNull': ['$chiefs', []]}, add_uids]}
+        return self.find_one_and_update(
+            {'pid': self.pid, 'tid': self.tid,
+             '$or': [{'headcount': {'$in': [0, None]}},
+                     {'$expr': {'$lte': [{'$size': in_team}, '$headcount']}}]},
+            {'$addToSet': {'members': {'$each': add_uids}}},
+            return_document=ReturnDocument.AFTER)
 
     def get(self) -> Optional[dict[str, Any]]:
         ''' Get data
@@ -164,6 +202,128 @@ class TeamDB(DBBase):
             )
 
 
+class TeamMembershipDB(DBBase):
+    ''' TeamMembership Collection
+
+    The denormalized `chiefs` and `members` of the teams, one document for
+    each user and role in team. It is rebuilt from the team data by
+    [models.teamdb.TeamMembershipDB.sync][] after the team is updated.
+
+    Struct:
+        - ``uid``: User id.
+        - ``pid``: Project id.
+        - ``tid``: Team id.
+        - ``role``: `chief` or `member`.
+        - ``disabled``: `bool`, the team is disabled.
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('membership')
+
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `uid`, `pid`, `tid`, `role`: unique
+            - `pid`, `disabled`, `uid`
+            - `pid`, `tid`
+
+        '''
+        self.create_index([('uid', 1), ('pid', 1), ('tid', 1), ('role', 1)], unique=True)
+        self.create_index([('pid', 1), ('disabled', 1), ('uid', 1)])
+        self.create_index([('pid', 1), ('tid', 1)])
+
+    def sync(self, team: dict[str, Any]) -> set[str]:
+        ''' Sync the users of the team
+
+        Only the changed rows are written, it is fine to sync again.
+
+        Args:
+            team (dict): The team data, with `pid`, `tid`, `chiefs`, `members`,
+                         and `disabled`.
+
+        Returns:
+            Return the `uid` of the changed rows.
+
+        '''
+        disabled = bool(team.get('disabled', False))
+        rows = {(uid, 'chief') for uid in team.get('chiefs') or [] if uid}
+        rows.update((uid, 'member') for uid in team.get('members') or [] if uid)
+
+        changed: set[str] = set()
+        operations: list[Any] = []
+        for raw in self.find({'pid': team['pid'], 'tid': team['tid']},
+                             {'uid': 1, 'role': 1, 'disabled': 1}):
+            key = (raw['uid'], raw['role'])
+            if key not in rows:
+                operations.append(DeleteOne({'_id': raw['_id']}))
+                changed.add(raw['uid'])
+            elif raw.get('disabled') == disabled:
+                rows.remove(key)
+
+        for uid, role in rows:
+            operations.append(UpdateOne(
+                {'uid': uid, 'pid': team['pid'], 'tid': team['tid'], 'role': role},
+                {'$set': {'disabled': disabled}}, upsert=True))
+            changed.add(uid)
+
+        if operations:
+            self.bulk_write(operations, ordered=False)
+
+        return changed
+
+    def find_teams(self, uid: str, pid: Optional[str] = None) -> list[tuple[str, str]]:
+        ''' Find the teams of the user, not in the disabled teams
+
+        Args:
+            uid (str): User id.
+            pid (str): Optional, project id.
+
+        Returns:
+            Return the list of `(pid, tid)`.
+
+        '''
+        query: dict[str, Any] = {'uid': uid, 'disabled': False}
+        if pid:
+            query['pid'] = pid
+
+        return list(dict.fromkeys(
+            (raw['pid'], raw['tid'])
+            for raw in self.find(query, {'pid': 1, 'tid': 1, '_id': 0})))
+
+    def has_team(self, uid: str, pid: Optional[str] = None) -> bool:
+        ''' The user is in any teams, not in the disabled teams
+
+        Args:
+            uid (str): User id.
+            pid (str): Optional, project id.
+
+        Returns:
+            Return `True` if in any teams.
+
+        '''
+        query: dict[str, Any] = {'uid': uid, 'disabled': False}
+        if pid:
+            query['pid'] = pid
+
+        return self.find_one(query, {'_id': 1}) is not None
+
+    def find_uids(self, pid: str) -> list[str]:
+        ''' Find the users in project, not in the disabled teams
+
+        Args:
+            pid (str): Project id.
+
+        Returns:
+            Return the list of `uid`.
+
+        '''
+        return list(dict.fromkeys(
+            raw['uid'] for raw in self.find(
+                {'pid': pid, 'disabled': False}, {'uid': 1, '_id': 0})))
+
+
 class TeamMemberTagsDB(DBBase):
     ''' TeamMemberTagsDB Collection
 
@@ -216,11 +376,16 @@ class TeamMemberTagsDB(DBBase):
 class TeamMemberChangedDB(DBBase):
     ''' TeamMemberChangedDB Collection
 
+    The outbox of the member changes, the consumers read the records after
+    their checkpoints by [module.outbox.Outbox][].
+
     Struct:
+        - ``seq``: The monotonically increasing number from [models.outboxdb.SequenceDB][].
         - ``pid``: from project id
         - ``tid``: team id
         - ``uid``: user id
-        - ``case``: ``add``, ``del``, ``waiting``
+        - ``case``: ``add``, ``del``, ``waiting``, ``deny``
+        - ``create_at``: Created at in timestamp.
 
     TODO:
         Need refactor in pydantic.
@@ -234,12 +399,17 @@ class TeamMemberChangedDB(DBBase):
         ''' To make collection's index
 
         Indexs:
+            - `seq`: unique, sparse for the records before the outbox.
             - `pid`
-            - `case`
+            - `create_at`
+
+        The `case` index before is dropped, the consumers read by `seq`.
 
         '''
+        self.create_index([('seq', 1), ], unique=True, sparse=True)
         self.create_index([('pid', 1), ])
-        self.create_index([('case', 1), ])
+        self.create_index([('create_at', 1), ])
+        self.drop_index_by_keys([('case', 1), ])
 
     def make_record(self, pid: str, tid: str, action: dict[str, Optional[list[str]]]) -> None:
         ''' make record
@@ -257,29 +427,20 @@ class TeamMemberChangedDB(DBBase):
                           but has to deny.
 
         '''
-        if 'add' in action and action['add']:
-            query = [{'pid': pid, 'tid': tid, 'case': 'add', 'uid': uid,
-                      'create_at': time()} for uid in action['add'] if uid]
-            if query:
-                self.insert_many(query)
-
-        if 'del' in action and action['del']:
-            query = [{'pid': pid, 'tid': tid, 'case': 'del', 'uid': uid,
-                      'create_at': time()} for uid in action['del'] if uid]
-            if query:
-                self.insert_many(query)
-
-        if 'waiting' in action and action['waiting']:
-            query = [{'pid': pid, 'tid': tid, 'case': 'waiting', 'uid': uid,
-                      'create_at': time()} for uid in action['waiting'] if uid]
-            if query:
-                self.insert_many(query)
-
-        if 'deny' in action and action['deny']:
-            query = [{'pid': pid, 'tid': tid, 'case': 'deny', 'uid': uid,
-                      'create_at': time()} for uid in action['deny'] if uid]
-            if query:
-                self.insert_many(query)
+        records: list[dict[str, Any]] = []
+        for case in ('add', 'del', 'waiting', 'deny'):
+            if case in action and action[case]:
+                records.extend({'pid': pid, 'tid': tid, 'case': case, 'uid': uid,
+                                'create_at': time()} for uid in action[case] or [] if uid)
+
+        if not records:
+            return
+
+        seq = SequenceDB().reserve(name=self.name, num=len(records))
+        for num, record in enumerate(records):
+            record['seq'] = seq + num
+
+        self.insert_many(records)
 
 
 class TeamPlanDB(DBBase):
@@ -314,9 +475,161 @@ class TeamPlanDB(DBBase):
             Return the inserted / updated data.
 
         '''
-        return self.find_one_and_update(
+        result = self.find_one_and_update(
             {'pid': pid, 'tid': tid},
             {'$set': {'data': data}},
             upsert=True,
             return_document=ReturnDocument.AFTER,
         )
+        TeamPlanCalendarDB().sync(pid=pid, tid=tid, data=result['data'])
+
+        return result
+
+    def rebuild_calendar(self, pid: Optional[str] = None) -> int:
+        ''' Rebuild the [models.teamdb.TeamPlanCalendarDB][] from the plans
+
+        Args:
+            pid (str): Optional, project id, all projects if not set.
+
+        Returns:
+            Return the numbers of rebuilt teams.
+
+        '''
+        query = {'pid': pid} if pid else {}
+        num = 0
+        calendar = TeamPlanCalendarDB()
+        for raw in self.find(query, {'pid': 1, 'tid': 1, 'data': 1}):
+            calendar.sync(pid=raw['pid'], tid=raw['tid'], data=raw.get('data') or [])
+            num += 1
+
+        return num
+
+
+class TeamPlanCalendarDB(DBBase):
+    ''' TeamPlanCalendar Collection
+
+    The plans of [models.teamdb.TeamPlanDB][] expanded into the dates,
+    one document for each team and date. It is synced when the plans are
+    saved, the calendar is read by the date range, not expanded again.
+
+    Struct:
+        - ``pid``: Project id.
+        - ``tid``: Team id.
+        - ``date``: Date in `YYYY-MM-DD` format.
+        - ``plans``: List of the plans in the date, with `title`, `start`,
+                     `end`, `desc`.
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('team_plan_calendar')
+
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `pid`, `tid`, `date`: unique
+            - `pid`, `date`, `tid`
+
+        '''
+        self.create_index([('pid', 1), ('tid', 1), ('date', 1)], unique=True)
+        self.create_index([('pid', 1), ('date', 1), ('tid', 1)])
+
+    @staticmethod
+    def expand(data: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+        ''' Expand the plans into the dates
+
+        Args:
+            data (list): List of the plans, the `start` and `end` in
+                         `YYYY-MM-DD` format, the `end` is optional.
+
+        Returns:
+            Return `{'<YYYY-MM-DD>': [<plan>, ...], ...}`, the plan is in
+            the dates from `start` to `end`, or only in `start` without
+            the `end`.
+
+        '''
+        dates: dict[str, list[dict[str, Any]]] = {}
+        for raw in data:
+            plan = {key: raw.get(key, '') for key in ('title', 'start', 'end', 'desc')}
+            try:
+                start = date.fromisoformat(plan['start'][:10])
+                end = date.fromisoformat(plan['end'][:10]) if plan['end'] else start
+            except ValueError:
+                dates.setdefault(plan['start'], []).append(plan)
+                continue
+
+            day = start
+            while day <= end:
+                dates.setdefault(day.isoformat(), []).append(plan)
+                day += timedelta(days=1)
+
+        return dates
+
+    def sync(self, pid: str, tid: str, data: list[dict[str, Any]]) -> int:
+        ''' Sync the plans of the team
+
+        Only the changed dates are written, it is fine to sync again.
+
+        Args:
+            pid (str): Project id.
+            tid (str): Team id.
+            data (list): List of the plans.
+
+        Returns:
+            Return the numbers of changed dates.
+
+        '''
+        dates = self.expand(data)
+
+        operations: list[Any] = []
+        for raw in self.find({'pid': pid, 'tid': tid}, {'date': 1, 'plans': 1}):
+            if raw['date'] not in dates:
+                operations.append(DeleteOne({'_id': raw['_id']}))
+            elif raw['plans'] == dates[raw['date']]:
+                dates.pop(raw['date'])
+
+        for day, plans in dates.items():
+            operations.append(UpdateOne(
+                {'pid': pid, 'tid': tid, 'date': day},
+                {'$set': {'plans': plans}}, upsert=True))
+
+        if operations:
+            self.bulk_write(operations, ordered=False)
+
+        return len(operations)
+
+    def find_dates(self, pid: str, tid: Optional[str] = None,
+                   start: Optional[str] = None,
+                   end: Optional[str] = None) -> list[tuple[str, list[dict[str, Any]]]]:
+        ''' Find the plans in the dates
+
+        Args:
+            pid (str): Project id.
+            tid (str): Optional, team id, all teams if not set.
+            start (str): Optional, from the date in `YYYY-MM-DD`.
+            end (str): Optional, to the date in `YYYY-MM-DD`, included.
+
+        Returns:
+            Return the list of `(<YYYY-MM-DD>, [<plan>, ...])` sorted by date
+            and team, the `tid` is in the plans.
+
+        '''
+        query: dict[str, Any] = {'pid': pid}
+        if tid:
+            query['tid'] = tid
+
+        if start or end:
+            query['date'] = {}
+            if start:
+                query['date']['$gte'] = start
+            if end:
+                query['date']['$lte'] = end
+
+        dates: dict[str, list[dict[str, Any]]] = {}
+        for raw in self.find(query, {'tid': 1, 'date': 1, 'plans': 1, '_id': 0},
+                             sort=(('date', 1), ('tid', 1))):
+            dates.setdefault(raw['date'], []).extend(
+                dict(plan, tid=raw['tid']) for plan in raw['plans'])
+
+        return list(dates.items())
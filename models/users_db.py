@@ -64,12 +64,28 @@ class UsersDB(DBBase):  # pylint: disable=abstract-method
         )
 
 
-class TobeVolunteerDB(DBBase):  # pylint: disable=abstract-method
+class TobeVolunteerDB(DBBase):
     ''' TobeVolunteer Collection '''
 
     def __init__(self) -> None:
         super().__init__('tobe_volunteer')
 
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `ok`, `skill`
+            - `ok`, `teams`
+            - `ok`, `status`
+
+        The `skill` and `teams` are the multikey indexes, for each branch
+        of the `$or` in [module.users.TobeVolunteer.query][].
+
+        '''
+        self.create_index([('ok', 1), ('skill', 1)])
+        self.create_index([('ok', 1), ('teams', 1)])
+        self.create_index([('ok', 1), ('status', 1)])
+
     def add(self, data: dict[str, Any]) -> None:
         ''' add
 
@@ -1,10 +1,12 @@
 ''' USessionDB '''
 import hashlib
+from datetime import datetime, timedelta
 from time import time
 from typing import Any, Optional
 from uuid import uuid4
 
-from pymongo.results import InsertOneResult
+from pymongo.operations import ReplaceOne
+from pymongo.results import BulkWriteResult, InsertOneResult
 
 from models.base import DBBase
 
@@ -17,8 +19,19 @@ class USessionDB(DBBase):
 
     Attributes:
         token (str): An session token.
+        alive_days (int): The default days of a session alive.
+
+    Struct:
+        - ``_id``: The session token.
+        - ``uid``: User id.
+        - ``header``: The request headers when login.
+        - ``alive``: `bool`, `False` when logout or be revoked.
+        - ``created_at``: `timestamp`
+        - ``expires_at``: [datetime.datetime][] in UTC, the session is expired after.
+        - ``ipinfo``: The ipinfo response data.
 
     '''
+    alive_days = 3
 
     def __init__(self, token: Optional[str] = None) -> None:
         super().__init__('usession')
@@ -36,14 +49,20 @@ class USessionDB(DBBase):
         Indexs:
             - `created_at`
             - `ipinfo`
-            - `uid`
+            - `uid`, `alive`, `created_at`
             - `alive`
+            - `expires_at`, TTL for 90 days after expired. The sessions should
+              be archived by [module.usession.USession.archive][] before that.
+
+        The `uid` index before is covered by the prefix, it is dropped.
 
         '''
         self.create_index([('created_at', 1), ])
         self.create_index([('ipinfo', 1), ])
-        self.create_index([('uid', 1), ])
+        self.create_index([('uid', 1), ('alive', 1), ('created_at', -1)])
         self.create_index([('alive', 1), ])
+        self.create_index([('expires_at', 1), ], expireAfterSeconds=86400*90)
+        self.drop_index_by_keys([('uid', 1), ])
 
     def add(self, data: dict[str, Any]) -> InsertOneResult:
         ''' save
@@ -59,13 +78,68 @@ class USessionDB(DBBase):
         doc.update(data)
         doc['_id'] = self.token
 
+        if 'expires_at' not in doc:
+            doc['expires_at'] = datetime.utcnow() + timedelta(days=self.alive_days)
+
         return self.insert_one(doc)
 
     def get(self) -> Optional[dict[str, Any]]:
         ''' Get data
 
         Returns:
-            Return the data.
+            Return the data, if it is alive and not expired.
+
+        '''
+        data = self.find_one({'_id': self.token, 'alive': True})
+        if not data:
+            return None
+
+        if 'expires_at' in data:
+            if data['expires_at'] <= datetime.utcnow():
+                return None
+
+        elif data['created_at'] <= time() - 86400*self.alive_days:
+            return None
+
+        return data
+
+
+class USessionArchiveDB(DBBase):
+    ''' USessionArchiveDB Collection
+
+    The cold collection for the past sessions, moved from [models.usessiondb.USessionDB][].
+
+    Struct:
+        - ``...``: *(The same fields in `usession`.)*
+        - ``archived_at``: [datetime.datetime][] in UTC.
+
+    '''
+
+    def __init__(self) -> None:
+        super().__init__('usession_archive')
+
+    def index(self) -> None:
+        ''' To make collection's index
+
+        Indexs:
+            - `uid`, `created_at`
+            - `archived_at`, TTL for 2 years.
+
+        '''
+        self.create_index([('uid', 1), ('created_at', -1)])
+        self.create_index([('archived_at', 1), ], expireAfterSeconds=86400*730)
+
+    def add_many(self, datas: list[dict[str, Any]]) -> BulkWriteResult:
+        ''' Save datas, using `_id` as the key to replace.
+
+        Args:
+            datas (list): List of session data.
+
+        Returns:
+            Return the [pymongo.results.BulkWriteResult][] object.
 
         '''
-        return self.find_one({'_id': self.token, 'alive': True})
+        archived_at = datetime.utcnow()
+        return self.bulk_write([
+            ReplaceOne({'_id': data['_id']}, {**data, 'archived_at': archived_at}, upsert=True)
+            for data in datas], ordered=False)
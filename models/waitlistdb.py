@@ -18,11 +18,11 @@ class WaitListDB(DBBase):
         ''' To make collection's index
 
         Indexs:
-            - `pid`
+            - `pid`, `tid`, `uid`, `result`
             - `uid`
 
         '''
-        self.create_index([('pid', 1), ])
+        self.create_index([('pid', 1), ('tid', 1), ('uid', 1), ('result', 1)])
         self.create_index([('uid', 1), ])
 
     def join_to(self, pid: str, tid: str, uid: str, note: Optional[str] = None) -> dict[str, Any]:
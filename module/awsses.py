@@ -14,6 +14,8 @@ from typing import Any
 
 import boto3  # type:ignore
 
+from module.metrics import REGISTRY
+
 
 class AWSS3:
     ''' AWSS3
@@ -206,12 +208,13 @@ class AWSSES:
 
         '''
         if 'data_str' in kwargs:
-            return self.client.send_raw_email(
-                RawMessage={'Data': kwargs['data_str']})
+            raw = kwargs['data_str']
+        else:
+            data = kwargs.get('data')
+            if not data:
+                data = self.raw_mail(**kwargs)
 
-        data = kwargs.get('data')
-        if not data:
-            data = self.raw_mail(**kwargs)
+            raw = data.as_string()
 
-        return self.client.send_raw_email(
-            RawMessage={'Data': data.as_string()})
+        with REGISTRY.observe_call(service='ses', operation='send_raw_email'):
+            return self.client.send_raw_email(RawMessage={'Data': raw})
@@ -1,16 +1,38 @@
 ''' Budget '''
 import re
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Optional, Union
 
 import arrow
 from pydantic import BaseModel, error_wrappers, validator
 from pymongo.cursor import Cursor
+from pymongo.operations import UpdateOne
 
 from models.budgetdb import BudgetDB
 from models.projectdb import ProjectDB
 from models.teamdb import TeamDB
 
+#: The chars not in number, like the currency symbols or the separators.
+NOT_NUMBER = re.compile('[^0-9.]')
+
+
+@lru_cache(maxsize=1024)
+def parse_paydate(value: str) -> Optional[str]:
+    ''' Parse the paydate, cached for the same dates in a batch
+
+    Args:
+        value (str): The date string.
+
+    Returns:
+        Return `YYYY-MM-DD`, or `None` if can not be parsed.
+
+    '''
+    try:
+        return str(arrow.get(value).format('YYYY-MM-DD'))
+    except arrow.parser.ParserError:
+        return None
+
 
 class Action(Enum):
     ''' Action
@@ -79,7 +101,7 @@ class BudgetImportItem(BaseModel):
             int or float
 
         '''
-        value = re.sub('[^0-9.]', '', value)
+        value = NOT_NUMBER.sub('', value)
         if '.' in value:
             return float(value)
 
@@ -100,13 +122,13 @@ class BudgetImportItem(BaseModel):
         if not value:
             return ''
 
-        try:
-            date = arrow.get(value)
-            return date.format('YYYY-MM-DD')
-        except arrow.parser.ParserError:
+        date = parse_paydate(value)
+        if date is None:
             kwargs['values']['desc'] = f"預計付款時間：{value}\n{kwargs['values']['desc']}"
             return ''
 
+        return date
+
 
 class Budget:
     ''' Budget class '''
@@ -255,28 +277,108 @@ class Budget:
         return None
 
     @staticmethod
-    def verify_batch_items(items: list[dict[str, Any]]) -> \
-            tuple[list[dict[str, Any]], list[tuple[int, Optional[list[dict[str, Any]]]]]]:
-        ''' verify the batch items by [module.budget.BudgetImportItem][].
+    def verify_batch(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        ''' Verify the batch items by [module.budget.BudgetImportItem][]
 
         Args:
-            items (dict): The items may from the front-end datas.
+            items (list): The rows from the csv.
 
         Returns:
-            Return a tuple in (list of `result`, list of `error_resut`)
+            Return the report of each row, the `status` is `ok` or
+            `invalid`, see [module.budget.Budget.import_batch][].
 
         '''
-        result: list[dict[str, Any]] = []
-        error_result: list[tuple[int, Optional[list[dict[str, Any]]]]] = []
+        report: list[dict[str, Any]] = []
         for (serial_no, raw) in enumerate(items):
             try:
-                item = BudgetImportItem.parse_obj(raw)
-                result.append(item.dict())
+                item = BudgetImportItem.parse_obj(raw).dict()
+                report.append({'row': serial_no, 'bid': item['bid'], 'action': item['action'],
+                               'status': 'ok', 'item': item})
             except error_wrappers.ValidationError as error:
-                error_infos = [
-                    {'loc': error_info['loc'], 'msg': error_info['msg']}
-                    for error_info in error.errors()
-                ]
-                error_result.append((serial_no, error_infos))
+                report.append({
+                    'row': serial_no, 'bid': raw.get('bid', ''), 'action': raw.get('action', ''),
+                    'status': 'invalid',
+                    'errors': [{'loc': error_info['loc'], 'msg': error_info['msg']}
+                               for error_info in error.errors()],
+                })
+
+        return report
 
-        return result, error_result
+    @staticmethod
+    def import_batch(pid: str, items: list[dict[str, Any]],
+                     save: bool = False) -> list[dict[str, Any]]:
+        ''' Verify and import the batch items
+
+        All the rows are verified in one pass, and the existed `bid` are
+        fetched in one query. The rows are saved by one unordered
+        `bulk_write`, the `add` is upserted by (`pid`, `bid`), so the same
+        file saved twice does not add the duplicated items.
+
+        Args:
+            pid (str): Project id.
+            items (list): The rows from the csv.
+            save (bool): Save the verified rows.
+
+        Returns:
+            Return the report of each row, in the same order:
+
+                - ``row``: The serial number in the items.
+                - ``bid``: The budget id.
+                - ``action``: `add` or `update`.
+                - ``status``: `ok`, `invalid`, `existed` (add the existed
+                  `bid`), `missing` (update the not existed `bid`),
+                  `duplicated` (the `bid` is in the prior rows).
+                  `added` or `updated` if saved.
+                - ``item``: The verified item, for `ok`, `added`, `updated`.
+                - ``errors``: The errors, for `invalid`.
+
+        '''
+        report = Budget.verify_batch(items=items)
+
+        bids = list({row['bid'] for row in report if row['status'] == 'ok'})
+        existed = {raw['bid']: raw['_id'] for raw in BudgetDB().find(
+            {'pid': pid, 'bid': {'$in': bids}}, {'_id': 1, 'bid': 1})} if bids else {}
+
+        seen: set[str] = set()
+        operations = []
+        for row in report:
+            if row['status'] != 'ok':
+                continue
+
+            if row['bid'] in seen:
+                row['status'] = 'duplicated'
+                continue
+
+            seen.add(row['bid'])
+            item = row['item']
+            if item['action'] == Action.ADD.value:
+                if item['bid'] in existed:
+                    row['status'] = 'existed'
+                    continue
+
+                data = BudgetDB.new(pid=pid, tid=item['tid'], uid=item['uid'])
+                for key in data:
+                    if key in item:
+                        data[key] = item[key]
+
+                operations.append(UpdateOne(
+                    {'pid': pid, 'bid': item['bid']}, {'$setOnInsert': data}, upsert=True))
+                if save:
+                    row['status'] = 'added'
+            else:
+                if item['bid'] not in existed:
+                    row['status'] = 'missing'
+                    continue
+
+                operations.append(UpdateOne(
+                    {'_id': existed[item['bid']]},
+                    {'$set': {key: item[key] for key in (
+                        'name', 'tid', 'uid', 'bid', 'currency', 'total',
+                        'desc', 'estimate', 'paydate')}}))
+                if save:
+                    row['status'] = 'updated'
+
+        if save and operations:
+            BudgetDB().bulk_write(operations, ordered=False)
+
+        return report
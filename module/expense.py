@@ -216,8 +216,13 @@ class Expense:
             - `request.create_by`: `expense.create_by`.
 
         '''
+        expenses = list(Expense.get_all_by_pid(pid=pid))
+        bids = {budget['_id']: budget['bid'] for budget in BudgetDB().find(
+            {'_id': {'$in': list({expense['request']['buid'] for expense in expenses})}},
+            {'bid': 1})}
+
         raws = []
-        for expense in Expense.get_all_by_pid(pid=pid):
+        for expense in expenses:
             base = {
                 'request.id': expense['_id'],
                 'request.pid': expense['pid'],
@@ -225,7 +230,7 @@ class Expense:
                 'note.user': expense['note']['myself'],
                 'note.finance': expense['note']['to_create'],
                 'budget._id': expense['request']['buid'],
-                'budget.bid': '',
+                'budget.bid': bids.get(expense['request']['buid'], ''),
                 'request.desc': expense['request']['desc'],
                 'request.paydate': expense['request']['paydate'],
                 'request.status': expense['status'],
@@ -234,9 +239,6 @@ class Expense:
                 'request.create_by': expense['create_by'],
             }
 
-            for budget in BudgetDB().find({'_id': expense['request']['buid']}):
-                base['budget.bid'] = budget['bid']
-
             for key in expense['bank']:
                 base[f'bank.{key}'] = expense['bank'][key]
 
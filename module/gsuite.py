@@ -8,6 +8,8 @@ from google.oauth2 import service_account  # type: ignore
 from googleapiclient import errors  # type: ignore
 from googleapiclient.discovery import build  # type:ignore
 
+from module.metrics import REGISTRY
+
 RE_PICTURE = re.compile(r'(https://.+){1,}=?s([\d]{1,}-c)')
 
 
@@ -32,6 +34,21 @@ class GSuite:
         self.service = build('admin', 'directory_v1',
                              credentials=creds, cache_discovery=False)
 
+    @staticmethod
+    def execute(operation: str, request: Any) -> Any:
+        ''' Execute the request, and observe the latency
+
+        Args:
+            operation (str): The operation name for the metrics.
+            request (HttpRequest): The request from the service.
+
+        Returns:
+            Return the response.
+
+        '''
+        with REGISTRY.observe_call(service='gsuite', operation=operation):
+            return request.execute()
+
     @property
     def print_scopes(self) -> str:
         ''' Print the scopes
@@ -52,7 +69,8 @@ class GSuite:
 admin_directory_v1.users.html#list
 
         '''
-        return self.service.users().list(customer='my_customer', orderBy='email').execute()
+        return self.execute('users.list', self.service.users().list(
+            customer='my_customer', orderBy='email'))
 
     # ----- Users.get ----- #
     def users_get(self, user_key: str) -> Any:
@@ -67,7 +85,7 @@ admin_directory_v1.users.html#list
 dyn/admin_directory_v1.users.html#get
 
         '''
-        return self.service.users().get(userKey=user_key).execute()
+        return self.execute('users.get', self.service.users().get(userKey=user_key))
 
     # ----- Groups ----- #
     def groups_get(self, group_key: str) -> Any:
@@ -83,7 +101,7 @@ dyn/admin_directory_v1.users.html#get
 dyn/admin_directory_v1.groups.html
 
         '''
-        return self.service.groups().get(groupKey=group_key).execute()
+        return self.execute('groups.get', self.service.groups().get(groupKey=group_key))
 
     # ----- Groups.list ----- #
     def groups_list(self, page_token: Union[str, None] = None) -> Any:
@@ -99,8 +117,8 @@ dyn/admin_directory_v1.groups.html
 dyn/admin_directory_v1.groups.html#list
 
         '''
-        return self.service.groups().list(customer='my_customer',
-                                          orderBy='email', pageToken=page_token).execute()
+        return self.execute('groups.list', self.service.groups().list(
+            customer='my_customer', orderBy='email', pageToken=page_token))
 
     def groups_list_loop(self, page_token: Union[str, None] = None) ->\
             Generator[dict[str, str], None, None]:
@@ -136,7 +154,7 @@ dyn/admin_directory_v1.groups.html#list
         if name is not None:
             body['name'] = name
 
-        return self.service.groups().insert(body=body).execute()
+        return self.execute('groups.insert', self.service.groups().insert(body=body))
 
     # ----- Members ----- #
     def members_list(self, group_key: str, page_token: Union[str, None] = None) -> Any:
@@ -154,7 +172,8 @@ dyn/admin_directory_v1.groups.html#list
 dyn/admin_directory_v1.members.html
 
         '''
-        return self.service.members().list(groupKey=group_key, pageToken=page_token).execute()
+        return self.execute('members.list', self.service.members().list(
+            groupKey=group_key, pageToken=page_token))
 
     def members_list_loop(self, group_key: str) -> Generator[dict[str, str], None, None]:
         ''' members.list.loop
@@ -190,7 +209,8 @@ dyn/admin_directory_v1.members.html
         '''
         body = {'email': email, 'role': role,
                 'delivery_settings': delivery_settings}
-        return self.service.members().insert(groupKey=group_key, body=body).execute()
+        return self.execute('members.insert', self.service.members().insert(
+            groupKey=group_key, body=body))
 
     def members_has_member(self, group_key: str, email: str) -> dict[str, bool]:
         ''' members.hasMember
@@ -215,7 +235,8 @@ dyn/admin_directory_v1.members.html
             email (str): Email.
 
         '''
-        return self.service.members().get(groupKey=group_key, memberKey=email).execute()
+        return self.execute('members.get', self.service.members().get(
+            groupKey=group_key, memberKey=email))
 
     def members_delete(self, group_key: str, email: str) -> Any:
         ''' members.delete
@@ -225,7 +246,8 @@ dyn/admin_directory_v1.members.html
             email (str): Email.
 
         '''
-        return self.service.members().delete(groupKey=group_key, memberKey=email).execute()
+        return self.execute('members.delete', self.service.members().delete(
+            groupKey=group_key, memberKey=email))
 
     @staticmethod
     def size_picture(url: str, size: int = 512) -> str:
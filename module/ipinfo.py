@@ -1,6 +1,11 @@
 ''' IPInfo '''
+from typing import Any
+
 from requests import Response, Session
 
+from models.ipinfodb import IPInfoDB
+from module.mc import MC
+
 
 class IPInfo(Session):
     ''' IPInfo
@@ -34,3 +39,62 @@ class IPInfo(Session):
 
         '''
         return super().get(f'{self.url}{ip_address}')
+
+    def get_batch(self, ip_addresses: list[str]) -> Response:
+        ''' Get info in batch
+
+        Args:
+            ip_addresses (list): List of IP address, max to 1000.
+
+        Returns:
+            Return the [requests.Response][] object, the data is in `{ip: data}`.
+
+        '''
+        return super().post(f'{self.url}batch', json=ip_addresses)
+
+    def lookup(self, ip_addresses: list[str], per_batch: int = 500) -> dict[str, dict[str, Any]]:
+        ''' Lookup info with caches
+
+        Find in memcached first, then [models.ipinfodb.IPInfoDB][], and only
+        request the api in batch for the missing ones. The failed batches
+        and the entries without data are not cached, and not in the result.
+
+        Args:
+            ip_addresses (list): List of IP address.
+            per_batch (int): Numbers of IP address per batch request.
+
+        Returns:
+            Return `{ip: data}`.
+
+        '''
+        ips = list(set(ip_addresses))
+        if not ips:
+            return {}
+
+        mem_cache = MC.get_client()
+        result: dict[str, dict[str, Any]] = dict(
+            mem_cache.get_multi(ips, key_prefix='ipinfo:'))
+
+        missing = [ip for ip in ips if ip not in result]
+        if missing:
+            cached = IPInfoDB().get_by_ips(ips=missing)
+            if cached:
+                result.update(cached)
+                mem_cache.set_multi(cached, time=86400, key_prefix='ipinfo:')
+
+        missing = [ip for ip in ips if ip not in result]
+        ipinfo_db = IPInfoDB()
+        for num in range(0, len(missing), per_batch):
+            resp = self.get_batch(ip_addresses=missing[num:num+per_batch])
+            if not resp.ok:
+                continue
+
+            fetched = {ip_address: data for ip_address, data in resp.json().items()
+                       if isinstance(data, dict) and data and 'error' not in data}
+            for ip_address, data in fetched.items():
+                ipinfo_db.add(ip_address=ip_address, data=data)
+
+            result.update(fetched)
+            mem_cache.set_multi(fetched, time=86400, key_prefix='ipinfo:')
+
+        return result
@@ -0,0 +1,76 @@
+''' Mail template
+
+The shared Jinja environment and SES client for the mail tasks. It should be
+initialized once in each worker process, at the `worker_process_init` signal.
+
+'''
+from typing import Optional
+
+from jinja2 import (Environment, FileSystemBytecodeCache, FileSystemLoader,
+                    Template)
+
+import setting
+from module.awsses import AWSSES
+
+
+class MailTemplate:
+    ''' Mail template registry
+
+    Attributes:
+        path (str): The path of mail templates.
+
+    '''
+    path = './templates/mail'
+    _env: Optional[Environment] = None
+    _awsses: Optional[AWSSES] = None
+
+    @classmethod
+    def init(cls) -> None:
+        ''' Init, or re-init after forked, the Jinja environment and the SES client '''
+        cls._env = None
+        cls._awsses = None
+        cls.env()
+        cls.awsses()
+
+    @classmethod
+    def env(cls) -> Environment:
+        ''' Get the shared Jinja environment with bytecode cache
+
+        Returns:
+            Return the [jinja2.Environment][].
+
+        '''
+        if cls._env is None:
+            cls._env = Environment(loader=FileSystemLoader(cls.path),
+                                   bytecode_cache=FileSystemBytecodeCache())
+
+        return cls._env
+
+    @classmethod
+    def get_template(cls, name: str) -> Template:
+        ''' Get template
+
+        Args:
+            name (str): The template name.
+
+        Returns:
+            Return the [jinja2.Template][].
+
+        '''
+        return cls.env().get_template(name)
+
+    @classmethod
+    def awsses(cls) -> AWSSES:
+        ''' Get the shared SES client
+
+        Returns:
+            Return the [module.awsses.AWSSES][].
+
+        '''
+        if cls._awsses is None:
+            cls._awsses = AWSSES(
+                aws_access_key_id=setting.AWS_ID,
+                aws_secret_access_key=setting.AWS_KEY,
+                source=setting.AWS_SES_FROM)
+
+        return cls._awsses
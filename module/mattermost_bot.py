@@ -1,6 +1,7 @@
 ''' MattermostBot '''
 # pylint: disable=arguments-renamed,arguments-differ
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Generator, Optional, Union
 
 from requests import Response, Session
@@ -9,6 +10,7 @@ from models.mattermost_link_db import MattermostLinkDB
 from models.mattermostdb import MattermostUsersDB
 from models.oauth_db import OAuthDB
 from module.mattermost_link import MattermostLink
+from module.metrics import REGISTRY
 
 
 class MattermostBot(Session):
@@ -31,6 +33,14 @@ class MattermostBot(Session):
         self.log = logging.getLogger(log_name)
         self.headers.update({'Authorization': f'Bearer {self.token}'})
 
+    def request(self, method: str, url: Union[str, bytes], *args: Any,  # type: ignore[override]
+                **kwargs: Any) -> Response:
+        ''' Request, and observe the latency in `{method} {resource}` '''
+        path = str(url)[len(self.base_url):] if str(url).startswith(self.base_url) else ''
+        operation = f"{method.upper()} {path.strip('/').split('/', 1)[0]}"
+        with REGISTRY.observe_call(service='mattermost', operation=operation):
+            return super().request(method, url, *args, **kwargs)
+
     def log_rate_limit(self, headers: dict[str, Any]) -> None:
         ''' Get log info from headers
 
@@ -189,6 +199,44 @@ class MattermostBot(Session):
         '''
         return self.post(f'{self.base_url}/channels/{channel_id}/members', json={'user_id': uid})
 
+    def get_channel_members(self, channel_id: str, page: int, per_page: int = 200) -> Response:
+        ''' Get channel members
+
+        Args:
+            channel_id (str): Channel id.
+            page (int): Page.
+            per_page (int): Numbers per page.
+
+        Returns:
+            Return the [requests.Response][] object.
+
+        '''
+        return self.get(f'{self.base_url}/channels/{channel_id}/members',
+                        params={'page': page, 'per_page': per_page})
+
+    def get_channel_members_loop(self, channel_id: str,
+                                 per_page: int = 200) -> Generator[dict[str, Any], None, None]:
+        ''' Get channel members in loop
+
+        Args:
+            channel_id (str): Channel id.
+            per_page (int): Numbers per page.
+
+        Yields:
+            Yield the channel member's info.
+
+        '''
+        page = 0
+        num = per_page
+        while num == per_page:
+            num = 0
+            for member in self.get_channel_members(
+                    channel_id=channel_id, page=page, per_page=per_page).json():
+                yield member
+                num += 1
+
+            page += 1
+
     def put_users_patch(self, uid: str, position: str) -> Response:
         ''' Update user
 
@@ -218,6 +266,23 @@ class MattermostTools(MattermostBot):
     def __init__(self, token: str, base_url: str) -> None:
         super().__init__(token=token, base_url=base_url)
 
+    def post_users_to_channel(self, channel_id: str, uids: list[str],
+                              max_workers: int = 4) -> list[Response]:
+        ''' Post users to channel concurrently
+
+        Args:
+            channel_id (str): Channel id.
+            uids (list): List of Mattermost user id.
+            max_workers (int): The max numbers of concurrent requests.
+
+        Returns:
+            Return the list of [requests.Response][] object.
+
+        '''
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda uid: self.post_user_to_channel(channel_id=channel_id, uid=uid), uids))
+
     @staticmethod
     def find_possible_mid(uid: str, mail: Optional[str] = None) -> str:
         ''' Find any possible mattermost user id
@@ -271,3 +336,59 @@ class MattermostTools(MattermostBot):
             return str(mattermost_link['data']['user_name'])
 
         return ''
+
+    @staticmethod
+    def find_possible_mids(uids: list[str]) -> dict[str, str]:
+        ''' Find any possible mattermost user ids in batch
+
+        The same as [module.mattermost_bot.MattermostTools.find_possible_mid][],
+        but not to create the link codes for the users not linked.
+
+        Args:
+            uids (list): List of user id.
+
+        Returns:
+            Return the `{uid: mid}`, the users not found are not in the result.
+
+        '''
+        result = {}
+        for link in MattermostLinkDB().find(
+                {'_id': {'$in': uids}, 'data.user_id': {'$exists': True}},
+                {'data.user_id': 1}):
+            result[link['_id']] = str(link['data']['user_id'])
+
+        owners = {}
+        for oauth in OAuthDB().find(
+                {'owner': {'$in': [uid for uid in uids if uid not in result]}},
+                {'owner': 1}):
+            owners[oauth['_id'].strip()] = oauth['owner']
+
+        if owners:
+            for mm_user in MattermostUsersDB().find(
+                    {'email': {'$in': list(owners)}}, {'email': 1}):
+                result.setdefault(owners[mm_user['email']], str(mm_user['_id']))
+
+        return result
+
+    @staticmethod
+    def find_user_names(mids: list[str]) -> dict[str, str]:
+        ''' Find user_names by mids in batch
+
+        Args:
+            mids (list): List of Mattermost user id.
+
+        Returns:
+            Return the `{mid: user_name}`, the users not found are not in the result.
+
+        '''
+        result = {}
+        for mm_user in MattermostUsersDB().find({'_id': {'$in': mids}}, {'username': 1}):
+            result[mm_user['_id']] = str(mm_user['username'])
+
+        missing = [mid for mid in mids if mid not in result]
+        if missing:
+            for link in MattermostLinkDB().find(
+                    {'data.user_id': {'$in': missing}}, {'data': 1}):
+                result.setdefault(link['data']['user_id'], str(link['data']['user_name']))
+
+        return result
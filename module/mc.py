@@ -1,10 +1,120 @@
-''' MC '''
+''' MC
+
+    The calls to memcached can be recorded by [module.mc.record_calls][], like
+    [models.base.record_commands][] for MongoDB.
+
+'''
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Any, Generator
+
 import pylibmc  # type: ignore
 from pylibmc import Client
 
 import setting
 
 
+class CallStats:
+    ''' The recorded memcached calls
+
+    Attributes:
+        calls (list): List of `(method name, duration in seconds)`.
+        hits (dict): The `[hits, misses]` of `get`, `get_multi` in key prefix.
+
+    '''
+    __slots__ = ('calls', 'hits')
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, float]] = []
+        self.hits: dict[str, list[int]] = {}
+
+    def add_get(self, key: str, hit: bool) -> None:
+        ''' Add the get result
+
+        Args:
+            key (str): The key, the prefix is the part before `:`.
+            hit (bool): Hit or miss.
+
+        '''
+        counts = self.hits.setdefault(key.split(':', 1)[0] if ':' in key else '', [0, 0])
+        counts[0 if hit else 1] += 1
+
+    @property
+    def count(self) -> int:
+        ''' The numbers of calls '''
+        return len(self.calls)
+
+    @property
+    def duration(self) -> float:
+        ''' The total duration in seconds '''
+        return sum(call[1] for call in self.calls)
+
+
+_RECORDS: ContextVar[tuple[CallStats, ...]] = ContextVar('_MC_RECORDS', default=())
+
+
+@contextmanager
+def record_calls() -> Generator[CallStats, None, None]:
+    ''' Record the memcached calls in this context, could be nested.
+
+    Yields:
+        Return the [module.mc.CallStats][].
+
+    '''
+    stats = CallStats()
+    token = _RECORDS.set(_RECORDS.get() + (stats, ))
+    try:
+        yield stats
+    finally:
+        _RECORDS.reset(token)
+
+
+def record_gets(stats: CallStats, name: str, args: tuple[Any, ...],
+                kwargs: dict[str, Any], result: Any) -> None:
+    ''' Record the hits and misses of `get`, `get_multi` '''
+    if name == 'get' and args:
+        stats.add_get(key=args[0], hit=result is not None)
+    elif name == 'get_multi' and args:
+        key_prefix = kwargs.get('key_prefix', args[1] if len(args) > 1 else '')
+        for key in args[0]:
+            stats.add_get(key=f'{key_prefix}{key}', hit=key in (result or {}))
+
+
+class RecordedClient:  # pylint: disable=too-few-public-methods
+    ''' The client to record the calls when [module.mc.record_calls][] is active
+
+    Args:
+        client (Client): The [pylibmc.Client][].
+
+    '''
+    __slots__ = ('client', )
+
+    def __init__(self, client: Client) -> None:
+        self.client = client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.client, name)
+        if not callable(attr) or not _RECORDS.get():
+            return attr
+
+        @wraps(attr)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            result = None
+            try:
+                result = attr(*args, **kwargs)
+                return result
+            finally:
+                duration = perf_counter() - start
+                for stats in _RECORDS.get():
+                    stats.calls.append((name, duration))
+                    record_gets(stats=stats, name=name, args=args, kwargs=kwargs, result=result)
+
+        return wrapper
+
+
 class MC:  # pylint: disable=too-few-public-methods
     ''' Memcached cache '''
     @staticmethod
@@ -17,9 +127,9 @@ class MC:  # pylint: disable=too-few-public-methods
             - `ketama`: `True`
 
         Returns:
-            [pylibmc.Client][]
+            [pylibmc.Client][] in [module.mc.RecordedClient][].
 
         '''
-        return pylibmc.Client(setting.MC_SERVERS,
-                              binary=True,
-                              behaviors={'tcp_nodelay': True, 'ketama': True})
+        return RecordedClient(pylibmc.Client(setting.MC_SERVERS,
+                                             binary=True,
+                                             behaviors={'tcp_nodelay': True, 'ketama': True}))
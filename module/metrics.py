@@ -0,0 +1,316 @@
+''' Metrics
+
+    The in-process metrics in the Prometheus text format, for the web
+    `/metrics` and the Celery worker exporter.
+
+    With multiple processes, like uWSGI `processes` or the Celery prefork
+    pool, each process dumps its snapshot into `METRICS_DIR`, and the
+    collector merges all the snapshots in the directory.
+
+'''
+import json
+import math
+import os
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from time import perf_counter, time
+from typing import Any, Generator, Optional
+
+from models.base import CommandStats
+from module.mc import CallStats
+
+#: The upper bounds of the histogram buckets in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+#: The metric types and the help texts.
+METRICS = {
+    'http_requests_total': ('counter', 'The requests in endpoint, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'The request duration in endpoint.'),
+    'mongo_commands_total': ('counter', 'The MongoDB commands in collection and command.'),
+    'mongo_command_seconds_total': ('counter', 'The MongoDB command time in collection.'),
+    'memcached_gets_total': ('counter', 'The memcached gets in key prefix and result.'),
+    'celery_tasks_total': ('counter', 'The Celery tasks in task name and state.'),
+    'celery_task_duration_seconds': ('histogram', 'The Celery task duration in task name.'),
+    'celery_task_retries_total': ('counter', 'The Celery task retries in task name.'),
+    'external_call_duration_seconds': ('histogram',
+                                       'The external service call duration in operation.'),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Registry:
+    ''' The metrics in this process
+
+    Args:
+        directory (str): Optional. To dump the snapshot for multiprocess.
+        interval (float): The min seconds between dumps.
+
+    '''
+
+    def __init__(self, directory: Optional[str] = None, interval: float = 1.0) -> None:
+        self.directory = directory
+        self.interval = interval
+        self.lock = Lock()
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], list[float]] = {}
+        self.dumped_at = 0.0
+
+    @staticmethod
+    def make_labels(labels: dict[str, Any]) -> Labels:
+        ''' Make the labels in sorted tuple '''
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        ''' Increase the counter
+
+        Args:
+            name (str): Metric name.
+            value (float): The value to add.
+            labels (dict): The labels.
+
+        '''
+        key = (name, self.make_labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        ''' Observe the value into the histogram
+
+        Args:
+            name (str): Metric name.
+            value (float): The value in seconds.
+            labels (dict): The labels.
+
+        '''
+        key = (name, self.make_labels(labels))
+        with self.lock:
+            # the buckets, `+Inf`, then the sum
+            histogram = self.histograms.setdefault(key, [0.0] * (len(BUCKETS) + 2))
+            for num, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram[num] += 1
+                    break
+            else:
+                histogram[len(BUCKETS)] += 1
+
+            histogram[-1] += value
+
+    def snapshot(self) -> dict[str, Any]:
+        ''' The snapshot in json
+
+        Returns:
+            Return `{'counters': [...], 'histograms': [...]}`.
+
+        '''
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value]
+                             for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(values)]
+                               for (name, labels), values in self.histograms.items()],
+            }
+
+    def dump(self, force: bool = False) -> None:
+        ''' Dump the snapshot into `{directory}/{pid}.json`, at most once in `interval`
+
+        Args:
+            force (bool): Dump without checking the `interval`.
+
+        '''
+        if not self.directory or (not force and time() - self.dumped_at < self.interval):
+            return
+
+        self.dumped_at = time()
+        path = Path(self.directory)
+        path.mkdir(parents=True, exist_ok=True)
+        tmp = path / f'.{os.getpid()}.json.tmp'
+        tmp.write_text(json.dumps(self.snapshot()), encoding='utf8')
+        tmp.replace(path / f'{os.getpid()}.json')
+
+    def collect(self) -> dict[str, Any]:
+        ''' Collect the snapshots of all the processes
+
+        Returns:
+            Return the merged snapshot, only this process if no `directory`.
+
+        '''
+        if not self.directory:
+            return self.snapshot()
+
+        self.dump(force=True)
+        return merge(json.loads(path.read_text(encoding='utf8'))
+                     for path in Path(self.directory).glob('*.json'))
+
+    def observe_commands(self, stats: CommandStats) -> None:
+        ''' Add the MongoDB commands from [models.base.record_commands][] '''
+        for name, collection, duration in stats.commands:
+            self.inc('mongo_commands_total', collection=collection, command=name)
+            self.inc('mongo_command_seconds_total', duration, collection=collection)
+
+    def observe_cache(self, stats: CallStats) -> None:
+        ''' Add the memcached gets from [module.mc.record_calls][] '''
+        for prefix, (hits, misses) in stats.hits.items():
+            if hits:
+                self.inc('memcached_gets_total', hits, prefix=prefix, result='hit')
+            if misses:
+                self.inc('memcached_gets_total', misses, prefix=prefix, result='miss')
+
+    @contextmanager
+    def observe_call(self, service: str, operation: str) -> Generator[None, None, None]:
+        ''' Observe the duration of an external service call
+
+        Args:
+            service (str): Service name, like `ses`, `mattermost`, `gsuite`.
+            operation (str): The operation name.
+
+        '''
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('external_call_duration_seconds', perf_counter() - start,
+                         service=service, operation=operation)
+
+
+def merge(snapshots: Any) -> dict[str, Any]:
+    ''' Merge the snapshots
+
+    Args:
+        snapshots (Iterable): The snapshots from [module.metrics.Registry.snapshot][].
+
+    Returns:
+        Return the merged snapshot.
+
+    '''
+    counters: dict[tuple[str, Labels], float] = {}
+    histograms: dict[tuple[str, Labels], list[float]] = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0.0) + value
+
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(tuple(label) for label in labels))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+            else:
+                histograms[key] = list(values)
+
+    return {
+        'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [[name, list(labels), values]
+                       for (name, labels), values in histograms.items()],
+    }
+
+
+def format_labels(labels: Any, **extra: str) -> str:
+    ''' Format the labels in `{key="value",...}` '''
+    items = [*(tuple(label) for label in labels), *extra.items()]
+    if not items:
+        return ''
+
+    escaped = (
+        (key, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in items)
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def format_value(value: float) -> str:
+    ''' Format the value '''
+    if math.isinf(value):
+        return '+Inf'
+
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render(snapshot: dict[str, Any]) -> str:
+    ''' Render the snapshot in the Prometheus text format
+
+    Args:
+        snapshot (dict): The snapshot.
+
+    Returns:
+        Return the text.
+
+    '''
+    lines: dict[str, list[str]] = {}
+    for name, labels, value in sorted(snapshot['counters'], key=lambda x: (x[0], x[1])):
+        lines.setdefault(name, []).append(
+            f'{name}{format_labels(labels)} {format_value(value)}')
+
+    for name, labels, values in sorted(snapshot['histograms'], key=lambda x: (x[0], x[1])):
+        cumulative = 0.0
+        for bound, count in zip((*BUCKETS, math.inf), values):
+            cumulative += count
+            lines.setdefault(name, []).append(
+                f'{name}_bucket{format_labels(labels, le=format_value(bound))} '
+                f'{format_value(cumulative)}')
+
+        lines[name].append(f'{name}_sum{format_labels(labels)} {format_value(values[-1])}')
+        lines[name].append(f'{name}_count{format_labels(labels)} {format_value(cumulative)}')
+
+    result = []
+    for name in sorted(lines):
+        kind, help_text = METRICS.get(name, ('untyped', name))
+        result.append(f'# HELP {name} {help_text}')
+        result.append(f'# TYPE {name} {kind}')
+        result.extend(lines[name])
+
+    return '\n'.join(result) + '\n'
+
+
+def make_handler(registry: Registry) -> type[BaseHTTPRequestHandler]:
+    ''' Make the handler of the exporter
+
+    Args:
+        registry (Registry): The registry to collect.
+
+    Returns:
+        Return the handler class for [http.server.ThreadingHTTPServer][].
+
+    '''
+    class MetricsHandler(BaseHTTPRequestHandler):
+        ''' Serve `GET /metrics` '''
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            ''' GET '''
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+
+            body = render(registry.collect()).encode('utf8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+            ''' Not to log the scrapes '''
+
+    return MetricsHandler
+
+
+def start_exporter(registry: Registry, port: int,
+                   host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    ''' Start the exporter in a daemon thread
+
+    Args:
+        registry (Registry): The registry to collect.
+        port (int): The port.
+        host (str): The host, bind to localhost in default.
+
+    Returns:
+        Return the server.
+
+    '''
+    server = ThreadingHTTPServer((host, port), make_handler(registry))
+    Thread(target=server.serve_forever, name='metrics-exporter', daemon=True).start()
+    return server
+
+
+#: The registry of this process, the `directory` is set by the web or the worker.
+REGISTRY = Registry()
@@ -2,6 +2,7 @@
 from typing import Any, Optional
 
 from models.oauth_db import OAuthDB
+from module.roster import Roster
 
 
 class OAuth:
@@ -29,6 +30,8 @@ class OAuth:
             token: Optional[dict[str, Any]] = None) -> None:
         ''' add data, token
 
+        The roster is updated if the `picture` or `email` is changed.
+
         Args:
             mail (str): Mail address.
             data (dict): The data from the oauth response.
@@ -40,7 +43,10 @@ class OAuth:
             oauth_db = OAuthDB()
 
         if data is not None:
-            oauth_db.add_data(mail, data)
+            old = oauth_db.add_data(mail, data)
+            if old and old.get('owner') and any(
+                    old.get('data', {}).get(key) != data.get(key) for key in ('picture', 'email')):
+                Roster.update_user(uid=old['owner'])
 
         if token is not None:
             oauth_db.add_token(mail, token)
@@ -0,0 +1,304 @@
+''' Outbox
+
+    The change records with a monotonically increasing `seq`, and each
+    consumer keeps its checkpoint in [models.outboxdb.OutboxCheckpointDB][].
+    The consumer only reads the records after the checkpoint by the `seq`
+    index, not the whole history.
+
+    The `seq` is reserved before the records are inserted, the concurrent
+    writers may insert in a different order. The reader stops at the gap
+    until the later records are older than the `grace` seconds, the gap
+    is skipped after that, like the writer has failed.
+
+    The records before the outbox are migrated by `python3 cmdtools/main.py db outbox`.
+    Run it before deploying the workers with the outbox. If the workers have
+    saved their checkpoints already, the migrated records are given the
+    `seq` after them, so the migration marks the records those consumers
+    have done in `skip`, and they are not processed again.
+
+    The workers of a consumer take the lease in memcached before reading, in
+    [module.outbox.Outbox.process][], the overlapped runs of the same
+    consumer, like the beat and a retry, do not read the same checkpoint.
+
+'''
+from contextlib import contextmanager
+from time import time
+from typing import Any, Generator, Iterable, Optional
+from uuid import uuid4
+
+from pymongo.operations import UpdateOne
+
+from models.base import DBBase
+from models.outboxdb import OutboxCheckpointDB, SequenceDB
+from module.mc import MC
+
+#: The outbox of the member changes, [models.teamdb.TeamMemberChangedDB][].
+MEMBER_CHANGED = 'team_member_changed'
+
+#: The consumers of the member changes, with the `done` field before the outbox.
+MEMBER_CHANGED_CONSUMERS: dict[str, Optional[tuple[tuple[str, ...], str]]] = {
+    'mail.member.waiting': (('waiting', ), 'done.mail'),
+    'mail.member.deny': (('deny', ), 'done.mail'),
+    'mail.member.add': (('add', ), 'done.mail'),
+    'mail.member.del': (('del', ), 'done.mail'),
+    'gsuite.team': (('add', 'del'), 'done.gsuite_team'),
+    'gsuite.staff': (('add', 'del'), 'done.gsuite_staff'),
+    'mattermost.channel': None,
+}
+
+
+class Outbox:
+    ''' Outbox reader of a consumer
+
+    Args:
+        name (str): The outbox collection name.
+        consumer (str): The consumer name.
+
+    Examples:
+        ```python
+        outbox = Outbox(name=MEMBER_CHANGED, consumer='gsuite.team')
+        with outbox.process() as leased:
+            if not leased:
+                return
+
+            for raw in outbox.read(cases=('add', 'del')):
+                ...
+                outbox.mark(raw)
+        ```
+
+    '''
+    #: The seconds to wait the gap to be filled.
+    grace = 60
+
+    #: The seconds of the lease, expired if the worker is lost.
+    lease = 600
+
+    __slots__ = ('name', 'consumer', 'checkpoint', 'last', 'done', 'token')
+
+    def __init__(self, name: str, consumer: str) -> None:
+        self.name = name
+        self.consumer = consumer
+        self.checkpoint = 0
+        self.last = 0
+        self.done = 0
+        self.token = ''
+
+    def read(self, cases: Optional[tuple[str, ...]] = None,
+             limit: int = 1000) -> list[dict[str, Any]]:
+        ''' Read the records after the checkpoint
+
+        Args:
+            cases (tuple): Optional, only the records in the `case`.
+            limit (int): The max numbers of records to read.
+
+        Returns:
+            Return the records sorted by `seq`, stop at the gap in `grace`
+            seconds. The `last` is the `seq` of the last read record, include
+            the records not in the `cases` or with the consumer in `skip`.
+
+        '''
+        self.checkpoint = OutboxCheckpointDB().get(outbox=self.name, consumer=self.consumer)
+        self.last = self.checkpoint
+        self.done = self.checkpoint
+
+        raws = []
+        settled = time() - self.grace
+        for raw in DBBase(self.name).find(
+                {'seq': {'$gt': self.checkpoint}}, sort=(('seq', 1), ), limit=limit):
+            if raw['seq'] != self.last + 1 and raw['create_at'] > settled:
+                break
+
+            self.last = raw['seq']
+            if self.consumer in raw.get('skip', ()):
+                continue
+
+            if cases is None or raw['case'] in cases:
+                raws.append(raw)
+
+        return raws
+
+    def save(self, seq: Optional[int] = None) -> None:
+        ''' Save the checkpoint, if it is moved
+
+        Args:
+            seq (int): Optional, the last processed `seq`, or the `last` read.
+
+        '''
+        seq = self.last if seq is None else seq
+        if seq > self.checkpoint:
+            OutboxCheckpointDB().set_checkpoint(outbox=self.name, consumer=self.consumer, seq=seq)
+            self.checkpoint = seq
+
+    def mark(self, raw: dict[str, Any]) -> None:
+        ''' Mark the record is processed, in the [module.outbox.Outbox.process][]
+
+        Args:
+            raw (dict): The record.
+
+        '''
+        self.done = raw['seq']
+
+    @property
+    def lease_key(self) -> str:
+        ''' The key of the lease in memcached '''
+        return f'outbox:{self.name}:{self.consumer}'
+
+    def acquire(self) -> bool:
+        ''' Take the lease of the consumer
+
+        Returns:
+            Return `False` if the other worker has taken it.
+
+        '''
+        self.token = uuid4().hex
+        return bool(MC.get_client().add(self.lease_key, self.token, self.lease))
+
+    def release(self) -> None:
+        ''' Release the lease, only if it is still taken by this one '''
+        mem_cache = MC.get_client()
+        if mem_cache.get(self.lease_key) == self.token:
+            mem_cache.delete(self.lease_key)
+
+    @contextmanager
+    def process(self) -> Generator[bool, None, None]:
+        ''' Take the lease, and save the checkpoint after processing the records
+
+        Yield `False` if the other worker of the consumer has the lease,
+        nothing should be read. If it raises in the block, save the
+        checkpoint at the last marked record, the retry will not process
+        the marked records again. The lease is released at the end.
+
+        Examples:
+            ```python
+            with outbox.process() as leased:
+                if not leased:
+                    return
+
+                for raw in outbox.read():
+                    ...
+                    outbox.mark(raw)
+            ```
+
+        '''
+        if not self.acquire():
+            yield False
+            return
+
+        try:
+            yield True
+        except Exception:
+            self.save(seq=self.done)
+            raise
+        else:
+            self.save()
+        finally:
+            self.release()
+
+    def skip(self) -> None:
+        ''' Skip all the records, the new consumer starts from now on '''
+        self.checkpoint = OutboxCheckpointDB().get(outbox=self.name, consumer=self.consumer)
+        self.save(seq=SequenceDB().last(name=self.name))
+
+    @staticmethod
+    def compact(name: str, consumers: list[str], days: int = 30) -> int:
+        ''' Delete the records processed by all the consumers
+
+        Args:
+            name (str): The outbox collection name.
+            consumers (list): All the consumers of the outbox.
+            days (int): Only delete the records created before the days.
+
+        Returns:
+            Return the numbers of deleted records.
+
+        '''
+        checkpoints = OutboxCheckpointDB().list_by_outbox(outbox=name)
+        seq = min(checkpoints.get(consumer, 0) for consumer in consumers)
+        if not seq:
+            return 0
+
+        return int(DBBase(name).delete_many({
+            'seq': {'$lte': seq},
+            'create_at': {'$lte': time() - 86400*days},
+        }).deleted_count)
+
+    @staticmethod
+    def done_consumers(raw: dict[str, Any], consumers: Iterable[str]) -> list[str]:
+        ''' The consumers have done the legacy member change
+
+        Args:
+            raw (dict): The record with the `done` fields.
+            consumers (list): The consumers in [module.outbox.MEMBER_CHANGED_CONSUMERS][].
+
+        Returns:
+            Return the consumers with the `done` field set, and the consumers
+            without the `done` field.
+
+        '''
+        done = []
+        for consumer in consumers:
+            legacy = MEMBER_CHANGED_CONSUMERS.get(consumer)
+            if legacy is None or raw.get('done', {}).get(legacy[1].split('.', 1)[1]):
+                done.append(consumer)
+
+        return done
+
+    @staticmethod
+    def migrate_member_changed(batch: int = 1000) -> int:
+        ''' Migrate the member changes before the outbox
+
+        Give the `seq` to the records without it in `create_at` order, and
+        make the checkpoints from the `done` fields, before the first not
+        done record of each consumer. The consumers without the `done`
+        field start from now on.
+
+        The consumers have the checkpoints already, started before the
+        migration, are put in the `skip` of the records they have done, or
+        all the records if they are without the `done` field.
+
+        Args:
+            batch (int): Numbers of records per update.
+
+        Returns:
+            Return the numbers of migrated records.
+
+        '''
+        collection = DBBase(MEMBER_CHANGED)
+        sequence_db = SequenceDB()
+        checkpoint_db = OutboxCheckpointDB()
+        existed = checkpoint_db.list_by_outbox(outbox=MEMBER_CHANGED)
+
+        total = 0
+        while True:
+            raws = list(collection.find(
+                {'seq': {'$exists': False}}, {'_id': 1, 'done': 1},
+                sort=(('create_at', 1), ), limit=batch))
+            if not raws:
+                break
+
+            seq = sequence_db.reserve(name=MEMBER_CHANGED, num=len(raws))
+            operations = [UpdateOne(
+                {'_id': raw['_id'], 'seq': {'$exists': False}},
+                {'$set': {'seq': seq + num,
+                          'skip': Outbox.done_consumers(raw=raw, consumers=existed)}})
+                for num, raw in enumerate(raws)]
+
+            collection.bulk_write(operations, ordered=False)
+            total += len(raws)
+
+        last = sequence_db.last(name=MEMBER_CHANGED)
+        for consumer, legacy in MEMBER_CHANGED_CONSUMERS.items():
+            if consumer in existed:
+                continue
+
+            seq = last
+            if legacy is not None:
+                pending = collection.find_one(
+                    {'case': {'$in': list(legacy[0])}, legacy[1]: {'$exists': False}},
+                    {'seq': 1}, sort=(('seq', 1), ))
+                if pending:
+                    seq = pending['seq'] - 1
+
+            checkpoint_db.set_checkpoint(outbox=MEMBER_CHANGED, consumer=consumer, seq=seq)
+
+        return total
@@ -0,0 +1,272 @@
+''' Profiler
+
+    The opt-in sampling profiler for the requests and the Celery tasks. The
+    stacks of the sampled request or task are captured in interval, and saved
+    in the collapsed stack format, one `frame;frame;... count` per line, for
+    the flamegraph tools.
+
+    It is enabled by the config in memcached, to profile under the real load
+    without redeploying, see `cmdtools profile`.
+
+'''
+import re
+import sys
+from collections import Counter
+from itertools import count
+from pathlib import Path
+from threading import Event, Thread, get_ident
+from time import time
+from types import FrameType
+from typing import Any, Optional
+from uuid import uuid4
+
+from module.mc import MC
+
+
+def collapse(frame: Optional[FrameType], root: str = '') -> str:
+    ''' Collapse the stack from the root to the frame
+
+    Args:
+        frame (FrameType): The frame.
+        root (str): The path prefix to strip in file names.
+
+    Returns:
+        Return the frames in `func (file:line);...`.
+
+    '''
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if root and filename.startswith(root):
+            filename = filename[len(root):].lstrip('/')
+
+        frames.append(f'{code.co_name} ({filename}:{code.co_firstlineno})')
+        frame = frame.f_back
+
+    return ';'.join(reversed(frames))
+
+
+class StackSampler:
+    ''' Sample the stacks of a thread in a daemon thread
+
+    Args:
+        thread_id (int): The thread to sample, the current thread in default.
+        interval (float): The interval in seconds.
+        root (str): The path prefix to strip in file names.
+
+    Attributes:
+        stacks (Counter): The samples in collapsed stack.
+
+    '''
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005,
+                 root: str = '') -> None:
+        self.thread_id = thread_id if thread_id is not None else get_ident()
+        self.interval = interval
+        self.root = root
+        self.stacks: Counter[str] = Counter()
+        self.started_at = time()
+        self._stop = Event()
+        self._thread = Thread(target=self.run, name='stack-sampler', daemon=True)
+
+    def start(self) -> 'StackSampler':
+        ''' Start sampling '''
+        self.started_at = time()
+        self._thread.start()
+        return self
+
+    def run(self) -> None:
+        ''' The sampling loop '''
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # pylint: disable=protected-access
+            if frame is not None:
+                self.stacks[collapse(frame, root=self.root)] += 1
+
+    def stop(self) -> Counter[str]:
+        ''' Stop sampling
+
+        Returns:
+            Return the samples.
+
+        '''
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+class ProfileConfig:
+    ''' The profiler config in memcached
+
+    The config is in `{'every': int, 'pattern': str, 'tasks_every': int,
+    'tasks_pattern': str}`, to sample 1-in-`every` requests or tasks, or the
+    request paths or the task names match the `pattern`.
+
+    '''
+    key = 'profile:config'
+
+    #: The seconds to cache the config in process.
+    ttl = 10
+
+    _cached: tuple[float, dict[str, Any]] = (0.0, {})
+
+    @classmethod
+    def get(cls) -> dict[str, Any]:
+        ''' Get the config, cached in process for `ttl` seconds
+
+        Returns:
+            Return the config, `{}` if disabled.
+
+        '''
+        fetched_at, config = cls._cached
+        if time() - fetched_at < cls.ttl:
+            return config
+
+        try:
+            config = dict(MC.get_client().get(cls.key) or {})
+        except Exception:  # pylint: disable=broad-except
+            config = {}
+
+        cls._cached = (time(), config)
+        return config
+
+    @classmethod
+    def set(cls, config: dict[str, Any], expire: int = 3600) -> None:
+        ''' Set the config
+
+        Args:
+            config (dict): The config.
+            expire (int): Disable after seconds.
+
+        '''
+        MC.get_client().set(cls.key, config, expire)
+        cls._cached = (0.0, {})
+
+    @classmethod
+    def delete(cls) -> None:
+        ''' Disable the profiler '''
+        MC.get_client().delete(cls.key)
+        cls._cached = (0.0, {})
+
+
+class Profiler:
+    ''' Decide to sample and save the samples
+
+    Args:
+        kind (str): `web` or `task`, the prefix of the files.
+        directory (str): The directory to save.
+        root (str): The path prefix to strip in file names.
+
+    '''
+
+    def __init__(self, kind: str, directory: str, root: str = '') -> None:
+        self.kind = kind
+        self.directory = directory
+        self.root = root
+        self._counter = count(1)
+
+    def should_sample(self, name: str) -> bool:
+        ''' Should sample the request or task
+
+        Args:
+            name (str): The request path or the task name.
+
+        Returns:
+            Return `True` if sampled.
+
+        '''
+        if not self.directory:
+            return False
+
+        config = ProfileConfig.get()
+        if not config:
+            return False
+
+        prefix = '' if self.kind == 'web' else 'tasks_'
+        pattern = config.get(f'{prefix}pattern')
+        if pattern and re.search(pattern, name):
+            return True
+
+        every = int(config.get(f'{prefix}every') or 0)
+        return every > 0 and next(self._counter) % every == 0
+
+    def start(self, name: str) -> Optional[StackSampler]:
+        ''' Start sampling the current thread if sampled
+
+        Args:
+            name (str): The request path or the task name.
+
+        Returns:
+            Return the [module.profiler.StackSampler][] or `None`.
+
+        '''
+        if not self.should_sample(name):
+            return None
+
+        return StackSampler(root=self.root).start()
+
+    def save(self, sampler: StackSampler, name: str) -> Optional[Path]:
+        ''' Stop and save the samples into `{kind}-{time}-{name}-{random}.folded`
+
+        Args:
+            sampler (StackSampler): The sampler.
+            name (str): The endpoint or the task name.
+
+        Returns:
+            Return the file path, or `None` if no samples.
+
+        '''
+        stacks = sampler.stop()
+        if not stacks:
+            return None
+
+        path = Path(self.directory)
+        path.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r'[^\w.-]+', '_', name).strip('_') or 'none'
+        file = path / f'{self.kind}-{int(sampler.started_at)}-{slug}-{uuid4().hex[:8]}.folded'
+        file.write_text(''.join(f'{stack} {num}\n' for stack, num in stacks.items()),
+                        encoding='utf8')
+        return file
+
+
+def aggregate(files: list[Path]) -> Counter[str]:
+    ''' Aggregate the collapsed stack files
+
+    Args:
+        files (list): The files.
+
+    Returns:
+        Return the samples in collapsed stack.
+
+    '''
+    result: Counter[str] = Counter()
+    for file in files:
+        for line in file.read_text(encoding='utf8').splitlines():
+            stack, _, num = line.rpartition(' ')
+            if stack and num.isdigit():
+                result[stack] += int(num)
+
+    return result
+
+
+def top_frames(stacks: Counter[str], limit: int = 20) -> list[tuple[str, int, int]]:
+    ''' The top frames in self samples
+
+    Args:
+        stacks (Counter): The samples in collapsed stack.
+        limit (int): The numbers of frames.
+
+    Returns:
+        Return the list of `(frame, self samples, total samples)`.
+
+    '''
+    self_samples: Counter[str] = Counter()
+    total_samples: Counter[str] = Counter()
+    for stack, num in stacks.items():
+        frames = stack.split(';')
+        self_samples[frames[-1]] += num
+        for frame in set(frames):
+            total_samples[frame] += num
+
+    return [(frame, num, total_samples[frame])
+            for frame, num in self_samples.most_common(limit)]
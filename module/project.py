@@ -55,6 +55,20 @@ class Project:
         '''
         return ProjectDB(pid).find_one({'_id': pid})
 
+    @staticmethod
+    def get_many(pids: list[str]) -> dict[str, dict[str, Any]]:
+        ''' Get projects info in one query
+
+        Args:
+            pids (list): List of project id.
+
+        Returns:
+            Return `{pid: project info}`.
+
+        '''
+        return {project['_id']: project for project in
+                ProjectDB(pid='').find({'_id': {'$in': list(set(pids))}})}
+
     @staticmethod
     def update(pid: str, data: dict[str, Any]) -> None:
         ''' update data
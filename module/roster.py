@@ -0,0 +1,178 @@
+''' Roster
+
+    The materialized users in project, for the pages need all users in
+    project with the teams, badge name and picture. The roster is rebuilt
+    incrementally when the memberships or the profiles are changed, and
+    served from memcached.
+
+'''
+import hashlib
+from typing import Any, Optional
+
+from pymongo.operations import DeleteMany, ReplaceOne
+
+from models.rosterdb import RosterDB
+from models.teamdb import TeamMembershipDB
+from module.mc import MC
+from module.users import User
+
+
+class Roster:
+    ''' Roster module '''
+
+    #: The seconds to cache the roster in memcached.
+    ttl = 600
+
+    @staticmethod
+    def cache_key(pid: str) -> str:
+        ''' The key in memcached '''
+        return f'roster:{pid}'
+
+    @staticmethod
+    def make_user_fields(user_info: dict[str, Any]) -> dict[str, Any]:
+        ''' Make the user's fields from [module.users.User.get_info][]
+
+        Args:
+            user_info (dict): The user info.
+
+        Returns:
+            Return the `badge_name`, `picture`, `email`, `email_hash`.
+
+        '''
+        email = user_info['oauth']['email']
+        return {
+            'badge_name': user_info['profile']['badge_name'],
+            'picture': user_info['oauth']['picture'],
+            'email': email,
+            'email_hash': hashlib.md5(email.encode('utf-8')).hexdigest(),
+        }
+
+    @staticmethod
+    def pick_tid(raw: dict[str, Any]) -> str:
+        ''' Pick the user's team for the pages show one team only
+
+        The user may be in many teams, pick the smallest `tid`, it doesn't
+        depend on the order of the `teams` in the record.
+
+        Args:
+            raw (dict): The roster data.
+
+        Returns:
+            Return the `tid`.
+
+        '''
+        return str(min(team['tid'] for team in raw['teams']))
+
+    @staticmethod
+    def rebuild(pid: str, uids: Optional[list[str]] = None) -> None:
+        ''' Rebuild the roster from the `membership`, and clear the cache
+
+        Args:
+            pid (str): Project id.
+            uids (list): Optional, only rebuild these users, or all users in the project.
+
+        '''
+        if uids is not None and not uids:
+            return
+
+        Roster.save(pid=pid, uids=uids)
+        MC.get_client().delete(Roster.cache_key(pid))
+
+    @staticmethod
+    def save(pid: str, uids: Optional[list[str]] = None) -> None:
+        ''' Save the roster from the `membership`, without clearing the cache
+
+        The users without the OAuth record are not in the roster.
+
+        Args:
+            pid (str): Project id.
+            uids (list): Optional, only save these users, or all users in the project.
+
+        '''
+        query: dict[str, Any] = {'pid': pid, 'disabled': False}
+        if uids is not None:
+            query['uid'] = {'$in': uids}
+
+        teams: dict[str, list[dict[str, str]]] = {}
+        for raw in TeamMembershipDB().find(query, {'uid': 1, 'tid': 1, 'role': 1, '_id': 0}):
+            teams.setdefault(raw['uid'], []).append({'tid': raw['tid'], 'role': raw['role']})
+
+        user_infos = User.get_info(uids=list(teams), skip_missing=True)
+
+        operations: list[Any] = []
+        for uid, user_teams in teams.items():
+            if uid not in user_infos:
+                continue
+
+            data = {'pid': pid, 'uid': uid,
+                    'teams': sorted(user_teams, key=lambda team: (team['tid'], team['role']))}
+            data.update(Roster.make_user_fields(user_infos[uid]))
+            operations.append(ReplaceOne({'pid': pid, 'uid': uid}, data, upsert=True))
+
+        if uids is None:
+            operations.append(DeleteMany({'pid': pid, 'uid': {'$nin': list(user_infos)}}))
+        else:
+            operations.append(DeleteMany(
+                {'pid': pid, 'uid': {'$in': [uid for uid in uids if uid not in user_infos]}}))
+
+        RosterDB().bulk_write(operations, ordered=False)
+
+    @staticmethod
+    def update_user(uid: str) -> None:
+        ''' Update the user's fields in all projects, after the profile is changed
+
+        Args:
+            uid (str): User id.
+
+        '''
+        roster_db = RosterDB()
+        pids = roster_db.distinct('pid', {'uid': uid})
+        if not pids:
+            return
+
+        user_infos = User.get_info(uids=[uid], skip_missing=True)
+        if uid not in user_infos:
+            return
+
+        roster_db.update_many({'uid': uid}, {'$set': Roster.make_user_fields(user_infos[uid])})
+
+        mem_cache = MC.get_client()
+        for pid in pids:
+            mem_cache.delete(Roster.cache_key(pid))
+
+    @staticmethod
+    def get(pid: str) -> list[dict[str, Any]]:
+        ''' Get the roster
+
+        Args:
+            pid (str): Project id.
+
+        Returns:
+            Return the list of roster data, sorted by `uid`.
+
+        '''
+        mem_cache = MC.get_client()
+        roster = mem_cache.get(Roster.cache_key(pid))
+        if roster is not None:
+            return list(roster)
+
+        roster = list(RosterDB().find({'pid': pid}, {'_id': 0}).sort('uid', 1))
+        mem_cache.set(Roster.cache_key(pid), roster, Roster.ttl)
+
+        return roster
+
+    @staticmethod
+    def get_by_tids(pid: str, tids: list[str]) -> list[dict[str, Any]]:
+        ''' Get the roster in teams
+
+        Args:
+            pid (str): Project id.
+            tids (list): List of `tid`.
+
+        Returns:
+            Return the list of roster data.
+
+        '''
+        _tids = set(tids)
+        return [raw for raw in Roster.get(pid=pid)
+                if any(team['tid'] in _tids for team in raw['teams'])]
@@ -10,6 +10,8 @@ import setting
 from models.senderdb import (SenderCampaignDB, SenderLogsDB, SenderReceiverDB,
                              SenderSESLogsDB)
 from module.awsses import AWSSES
+from module.mail_template import MailTemplate
+from module.roster import Roster
 from module.team import Team
 from module.users import User
 
@@ -190,7 +192,7 @@ class SenderMailerVolunteer(SenderMailer):
     def __init__(self, subject: str, content: dict[str, Any],
                  source: Optional[dict[str, str]] = None) -> None:
         super().__init__(
-            template_path='/app/templates/mail/sender_base.html',
+            template_path=f'{MailTemplate.path}/sender_base.html',
             subject=subject, content=content, source=source)
 
 
@@ -206,7 +208,7 @@ class SenderMailerCOSCUP(SenderMailer):
     def __init__(self, subject: str, content: dict[str, Any],
                  source: Optional[dict[str, str]] = None):
         super().__init__(
-            template_path='/app/templates/mail/coscup_base.html',
+            template_path=f'{MailTemplate.path}/coscup_base.html',
             subject=subject, content=content, source=source)
 
 
@@ -386,7 +388,7 @@ class SenderReceiver:
     @staticmethod
     def get_from_user(pid: str,
                       tids: Union[str, list[str]]) -> tuple[tuple[str, str], list[list[str]]]:
-        ''' Get users from userdb by project, team
+        ''' Get users from the roster by project, team, not in the disabled teams
 
         Args:
             pid (str): Project id.
@@ -403,18 +405,12 @@ class SenderReceiver:
         else:
             _tids = tids
 
-        team_users = Team.get_users(pid=pid, tids=_tids)
-        uids = []
-        for user_ids in team_users.values():
-            uids.extend(user_ids)
-
-        user_infos = User.get_info(uids=uids)
         datas = []
-        for value in user_infos.values():
+        for value in Roster.get_by_tids(pid=pid, tids=_tids):
             # append, plus more data here in the future
             datas.append({
-                'name': value['profile']['badge_name'],
-                'mail': value['oauth']['email'],
+                'name': value['badge_name'],
+                'mail': value['email'],
             })
 
         raws = []
@@ -1,16 +1,31 @@
 ''' Task '''
 from datetime import datetime
+from time import time
 from typing import Any, Generator, Optional
+from uuid import uuid4
 
 from pymongo.collection import ReturnDocument
 from pymongo.results import DeleteResult
 
-from models.tasksdb import TasksDB, TasksStarDB
+from models.tasksdb import TasksDB, TasksStarDB, TasksStarNotifyDB
+from module.mattermost_bot import MattermostTools
+from module.mc import MC
 from module.users import User
 
+#: The filter of the tasks not full, `people` size below the `limit`.
+HAS_SLOTS = {'$lt': [{'$size': '$people'}, '$limit']}
+
 
 class Tasks:
-    ''' Tasks class '''
+    ''' Tasks class
+
+    Attributes:
+        slots_prefix (str): The key prefix of the remaining slots in cache.
+        slots_ttl (int): The seconds to cache the remaining slots.
+
+    '''
+    slots_prefix = 'tasks:slots:'
+    slots_ttl = 600
 
     @classmethod
     def add(cls, pid: str, body: dict[str, Any],
@@ -42,15 +57,18 @@ class Tasks:
             data.pop('created_by', None)
             data.pop('created_at', None)
 
-        return TasksDB().find_one_and_update(
+        task = TasksDB().find_one_and_update(
             {'_id': data['_id'], 'pid': data['pid']},
             {'$set': data},
             upsert=True,
             return_document=ReturnDocument.AFTER,
         )
+        cls.cache_slots(task=task)
 
-    @staticmethod
-    def delete(pid: str, _id: str) -> None:
+        return task
+
+    @classmethod
+    def delete(cls, pid: str, _id: str) -> None:
         ''' Del task
 
         Args:
@@ -59,6 +77,7 @@ class Tasks:
 
         '''
         TasksDB().delete_one({'_id': _id, 'pid': pid})
+        MC.get_client().delete(cls.slots_key(task_id=_id))
 
     @staticmethod
     def get_by_pid(pid: str) -> Generator[dict[str, Any], None, None]:
@@ -74,6 +93,130 @@ class Tasks:
         for raw in TasksDB().find({'pid': pid}, sort=(('starttime', 1), )):
             yield raw
 
+    @staticmethod
+    def query(pid: str, *, cate: Optional[str] = None,  # pylint: disable=too-many-arguments
+              start: Optional[datetime] = None, end: Optional[datetime] = None,
+              has_slots: bool = False, joined: Optional[str] = None,
+              after: Optional[str] = None,
+              limit: int = 50) -> tuple[list[dict[str, Any]], Optional[str]]:
+        ''' Query the tasks in page
+
+        Args:
+            pid (str): Project id.
+            cate (str): Optional, only in the category.
+            start (datetime): Optional, the tasks start from the time.
+            end (datetime): Optional, the tasks start before the time.
+            has_slots (bool): Only the tasks not full.
+            joined (str): Optional, user id, only the tasks the user joined.
+            after (str): Optional, the `next` cursor of the previous page.
+            limit (int): The numbers of tasks in page.
+
+        Returns:
+            Return the tasks order by `starttime`, and the `next` cursor,
+            `None` if no more tasks.
+
+        Raises:
+            ValueError: Invalid cursor in `after`.
+
+        '''
+        query: dict[str, Any] = {'pid': pid}
+        if cate is not None:
+            query['cate'] = cate
+
+        if joined:
+            query['people'] = joined
+
+        if start or end:
+            query['starttime'] = {}
+            if start:
+                query['starttime']['$gte'] = start
+            if end:
+                query['starttime']['$lt'] = end
+
+        if has_slots:
+            query['$expr'] = HAS_SLOTS
+
+        if after:
+            try:
+                starttime, _id = after.split('|', 1)
+                last = datetime.fromisoformat(starttime)
+            except (AttributeError, ValueError) as error:
+                raise ValueError(f'Invalid cursor `{after}`') from error
+
+            query['$or'] = [{'starttime': {'$gt': last}},
+                            {'starttime': last, '_id': {'$gt': _id}}]
+
+        tasks = list(TasksDB().find(
+            query, sort=(('starttime', 1), ('_id', 1)), limit=limit+1))
+
+        if len(tasks) <= limit:
+            return tasks, None
+
+        tasks = tasks[:limit]
+        return tasks, f"{tasks[-1]['starttime'].isoformat()}|{tasks[-1]['_id']}"
+
+    @staticmethod
+    def count(pid: str, uid: Optional[str] = None,
+              start: Optional[datetime] = None) -> dict[str, Any]:
+        ''' Count the tasks for the board header in one aggregation
+
+        Args:
+            pid (str): Project id.
+            uid (str): Optional, user id, to count the joined tasks.
+            start (datetime): Optional, the tasks start from the time.
+
+        Returns:
+            Return `{'total': <int>, 'has_slots': <int>, 'joined': <int>,
+            'cates': {'<cate>': <int>, ...}}`.
+
+        '''
+        match: dict[str, Any] = {'pid': pid}
+        if start:
+            match['starttime'] = {'$gte': start}
+
+        result: dict[str, Any] = {'total': 0, 'has_slots': 0, 'joined': 0, 'cates': {}}
+        for raw in TasksDB().aggregate([
+            {'$match': match},
+            {'$group': {
+                '_id': '$cate',
+                'total': {'$sum': 1},
+                'has_slots': {'$sum': {'$cond': [HAS_SLOTS, 1, 0]}},
+                'joined': {'$sum': {'$cond': [{'$in': [uid, '$people']}, 1, 0]}},
+            }},
+        ]):
+            result['total'] += raw['total']
+            result['has_slots'] += raw['has_slots']
+            result['joined'] += raw['joined']
+            result['cates'][raw['_id']] = raw['total']
+
+        return result
+
+    @staticmethod
+    def get_creators(tasks: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        ''' Get the creators of the tasks in batch
+
+        Args:
+            tasks (list): List of the tasks.
+
+        Returns:
+            Return `{'<uid>': {'uid': <str>, 'name': <str>,
+            'mattermost_uid': <str>}, ...}`.
+
+        '''
+        uids = list({task['created_by'] for task in tasks})
+        if not uids:
+            return {}
+
+        cards = User.get_cards(uids=uids)
+        mids = MattermostTools.find_possible_mids(uids=uids)
+        user_names = MattermostTools.find_user_names(mids=list(mids.values()))
+
+        return {uid: {
+            'uid': uid,
+            'name': cards[uid].badge_name if uid in cards else '',
+            'mattermost_uid': user_names.get(mids.get(uid, ''), ''),
+        } for uid in uids}
+
     @staticmethod
     def get_with_pid(pid: str, _id: str) -> Optional[dict[str, Any]]:
         ''' Get with pid
@@ -88,6 +231,22 @@ class Tasks:
         '''
         return TasksDB().find_one({'pid': pid, '_id': _id})
 
+    @staticmethod
+    def get_by_ids(pid: str, task_ids: list[str]) -> Generator[dict[str, Any], None, None]:
+        ''' Get by task ids
+
+        Args:
+            pid (str): Project id.
+            task_ids (list): List of task id.
+
+        Yields:
+            Yield return the data, order by `starttime`.
+
+        '''
+        for raw in TasksDB().find({'pid': pid, '_id': {'$in': task_ids}},
+                                  sort=(('starttime', 1), )):
+            yield raw
+
     @staticmethod
     def get_cate(pid: str) -> list[dict[str, Any]]:
         ''' Get cate
@@ -102,9 +261,14 @@ class Tasks:
         cates = TasksDB().find({'pid': pid}).distinct('cate')
         return [cate for cate in cates if cate]
 
-    @staticmethod
-    def join(pid: str, task_id: str, uid: str) -> dict[str, Any]:
-        ''' Join to
+    @classmethod
+    def join(cls, pid: str, task_id: str, uid: str) -> Optional[dict[str, Any]]:
+        ''' Join to, only if the task is not full
+
+        The capacity is in the filter of the update, the concurrent joins
+        can not overbook. The cached slots are only advisory, the task full
+        in the cache is re-checked by a read, and updated if a slot is free
+        again, without the write if it is still full.
 
         Args:
             pid (str): Project id.
@@ -112,17 +276,44 @@ class Tasks:
             uid (str): User id.
 
         Returns:
-            Return the added data.
+            Return the added data, or the data if the user is in it. `None`
+            if the task is full.
+
+        Raises:
+            LookupError: No task of `task_id`.
 
         '''
-        return TasksDB().find_one_and_update(
-            {'_id': task_id, 'pid': pid},
-            {'$addToSet': {'people': uid}},
-            return_document=ReturnDocument.AFTER,
-        )
+        tasks_db = TasksDB()
+        query = {'_id': task_id, 'pid': pid}
 
-    @staticmethod
-    def cancel(pid: str, task_id: str, uid: str) -> dict[str, Any]:
+        task = None
+        if MC.get_client().get(cls.slots_key(task_id=task_id)) == 0:
+            task = tasks_db.find_one(query)
+            if task and uid not in task['people'] and \
+                    len(task['people']) < int(task['limit']):
+                task = None
+
+        if task is None:
+            task = tasks_db.find_one_and_update(
+                {**query, '$expr': HAS_SLOTS},
+                {'$addToSet': {'people': uid}},
+                return_document=ReturnDocument.AFTER,
+            )
+
+            if task is None:
+                task = tasks_db.find_one(query)
+                if task is None:
+                    raise LookupError(f'No task of `{task_id}`')
+
+            cls.cache_slots(task=task)
+
+        if uid not in task['people']:
+            return None
+
+        return task
+
+    @classmethod
+    def cancel(cls, pid: str, task_id: str, uid: str) -> Optional[dict[str, Any]]:
         ''' cancel join
 
         Args:
@@ -134,11 +325,75 @@ class Tasks:
             Return the updated data.
 
         '''
-        return TasksDB().find_one_and_update(
+        task = TasksDB().find_one_and_update(
             {'_id': task_id, 'pid': pid},
             {'$pull': {'people': uid}},
             return_document=ReturnDocument.AFTER,
         )
+        if task:
+            cls.cache_slots(task=task)
+
+        return task
+
+    @classmethod
+    def slots_key(cls, task_id: str) -> str:
+        ''' The key of the remaining slots in cache
+
+        Args:
+            task_id (str): Task id.
+
+        Returns:
+            Return the key.
+
+        '''
+        return f'{cls.slots_prefix}{task_id}'
+
+    @classmethod
+    def cache_slots(cls, task: dict[str, Any]) -> int:
+        ''' Cache the remaining slots of the task, after it is updated
+
+        Args:
+            task (dict): The task data, with `limit` and `people`.
+
+        Returns:
+            Return the remaining slots.
+
+        '''
+        slots = max(0, int(task['limit']) - len(task['people']))
+        MC.get_client().set(cls.slots_key(task_id=task['_id']), slots, cls.slots_ttl)
+
+        return slots
+
+    @classmethod
+    def get_slots(cls, pid: str, task_ids: list[str]) -> dict[str, int]:
+        ''' Get the remaining slots of the tasks for the board
+
+        Args:
+            pid (str): Project id.
+            task_ids (list): List of task id.
+
+        Returns:
+            Return `{'<task_id>': <int>, ...}`, from the cache, only the
+            tasks not in cache are queried in one query.
+
+        '''
+        mem_cache = MC.get_client()
+        slots: dict[str, int] = {
+            task_id: int(value) for task_id, value in mem_cache.get_multi(
+                list(task_ids), key_prefix=cls.slots_prefix).items()}
+
+        missing = [task_id for task_id in task_ids if task_id not in slots]
+        if missing:
+            fetched = {}
+            for task in TasksDB().find({'pid': pid, '_id': {'$in': missing}},
+                                       {'limit': 1, 'people': 1}):
+                fetched[task['_id']] = max(0, int(task['limit']) - len(task['people']))
+
+            if fetched:
+                mem_cache.set_multi(fetched, cls.slots_ttl, key_prefix=cls.slots_prefix)
+                slots.update(fetched)
+
+        return slots
 
     @staticmethod
     def get_peoples_info(pid: str, task_id: str) -> Optional[dict[str, Any]]:
@@ -163,7 +418,16 @@ class Tasks:
 
 
 class TasksStar:
-    ''' TasksStar object '''
+    ''' TasksStar object
+
+    Attributes:
+        notify_window (int): The seconds to wait for more new tasks to
+            coalesce into one digest mail.
+        notify_max_wait (int): The max seconds of a new task waiting in digest.
+
+    '''
+    notify_window = 600
+    notify_max_wait = 3600
 
     @staticmethod
     def add(pid: str, uid: str) -> Optional[dict[str, Any]]:
@@ -248,3 +512,54 @@ class TasksStar:
         '''
         for user in TasksStarDB().find({'pid': pid}, {'uid': 1}):
             yield user
+
+    @staticmethod
+    def queue_notify(pid: str, task_id: str) -> None:
+        ''' Queue the new task to notify the star users in digest
+
+        Args:
+            pid (str): Project id.
+            task_id (str): Task id.
+
+        '''
+        TasksStarNotifyDB().insert_one(
+            {'pid': pid, 'task_id': task_id, 'created_at': time()})
+
+    @classmethod
+    def claim_notify(cls, pid: str) -> list[str]:
+        ''' Claim the pending task ids to notify
+
+        The pending tasks will be claimed only when there is no new task in
+        `notify_window`, or the oldest one has waited for `notify_max_wait`.
+
+        Args:
+            pid (str): Project id.
+
+        Returns:
+            Return the list of claimed task ids.
+
+        '''
+        tasks_star_notify_db = TasksStarNotifyDB()
+        pending = list(tasks_star_notify_db.find(
+            {'pid': pid, 'claim': {'$exists': False}},
+            {'created_at': 1}, sort=(('created_at', 1), )))
+
+        if not pending:
+            return []
+
+        now = time()
+        if pending[-1]['created_at'] > now - cls.notify_window and \
+                pending[0]['created_at'] > now - cls.notify_max_wait:
+            return []
+
+        claim = uuid4().hex
+        tasks_star_notify_db.update_many(
+            {'_id': {'$in': [raw['_id'] for raw in pending]}, 'claim': {'$exists': False}},
+            {'$set': {'claim': claim, 'claimed_at': now}})
+
+        task_ids = []
+        for raw in tasks_star_notify_db.find({'claim': claim}, {'task_id': 1}):
+            if raw['task_id'] not in task_ids:
+                task_ids.append(raw['task_id'])
+
+        return task_ids
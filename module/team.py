@@ -1,10 +1,16 @@
 ''' Team '''
+import csv
+import io
 from typing import Any, Optional
 from uuid import uuid4
 
 from pymongo.cursor import Cursor
 
-from models.teamdb import TeamDB, TeamMemberChangedDB, TeamMemberTagsDB
+from models.projection import ProjectionT, TeamRoster, TeamSummary
+from models.teamdb import (TeamDB, TeamMemberChangedDB, TeamMembershipDB,
+                           TeamMemberTagsDB)
+from module.roster import Roster
+from module.users import User
 
 
 class Team:
@@ -29,7 +35,10 @@ class Team:
         data['name'] = name
         data['owners'].extend(owners)
 
-        return teamdb.add(data)
+        team = teamdb.add(data)
+        Team.sync_membership(team)
+
+        return team
 
     @staticmethod
     def update_chiefs(pid: str, tid: str,
@@ -42,9 +51,12 @@ class Team:
 
         '''
         teamdb = TeamDB(pid, tid)
-        teamdb.update_users(
+        team = teamdb.update_users(
             field='chiefs', add_uids=add_uids, del_uids=del_uids)
 
+        if team:
+            Team.sync_membership(team)
+
     @staticmethod
     def update_members(pid: str, tid: str,
                        add_uids: Optional[list[str]] = None,
@@ -60,9 +72,12 @@ class Team:
 
         '''
         teamdb = TeamDB(pid, tid)
-        teamdb.update_users(
+        team = teamdb.update_users(
             field='members', add_uids=add_uids, del_uids=del_uids)
 
+        if team:
+            Team.sync_membership(team)
+
         if make_record:
             TeamMemberChangedDB().make_record(
                 pid=pid, tid=tid, action={'add': add_uids, 'del': del_uids})
@@ -92,25 +107,94 @@ class Team:
         return TeamDB(pid=pid, tid=tid).get()
 
     @staticmethod
-    def participate_in(uid: str, pid: Optional[str] = None) -> Cursor[dict[str, None]]:
-        ''' participate in
+    def get_many(keys: list[tuple[str, str]]) -> dict[tuple[str, str], dict[str, Any]]:
+        ''' Get teams data in one query
+
+        :param list keys: list of `(pid, tid)`
+
+        .. note:: query in the `$or` of the pairs on the `(pid, tid)` index,
+                  not the cartesian product of the pids and the tids
+
+        '''
+        _keys = set(keys)
+        if not _keys:
+            return {}
+
+        teams = {}
+        for team in TeamDB('', '').find({
+                '$or': [{'pid': pid, 'tid': tid} for pid, tid in sorted(_keys)]}):
+            teams[(team['pid'], team['tid'])] = team
+
+        return teams
+
+    @staticmethod
+    def participate_in(uid: str, pid: Optional[str] = None) -> list[dict[str, Any]]:
+        ''' participate in, not in the disabled teams
 
         :param str uid: uid
+        :param str pid: project id, optional
+
+        .. note:: find in the `membership`, then get the teams
+
+        '''
+        keys = TeamMembershipDB().find_teams(uid=uid, pid=pid)
+        teams = Team.get_many(keys)
+
+        return [teams[key] for key in keys if key in teams]
+
+    @staticmethod
+    def is_participant(uid: str, pid: Optional[str] = None) -> bool:
+        ''' is in any teams, not in the disabled teams
+
+        :param str uid: uid
+        :param str pid: project id, optional
+
+        '''
+        return TeamMembershipDB().has_team(uid=uid, pid=pid)
+
+    @staticmethod
+    def list_uids_by_pid(pid: str) -> list[str]:
+        ''' List all chiefs and members in project, not in the disabled teams
+
+        :param str pid: project id
+
+        '''
+        return TeamMembershipDB().find_uids(pid=pid)
+
+    @staticmethod
+    def rebuild_membership(pid: Optional[str] = None) -> int:
+        ''' Rebuild the `membership` and the roster from the teams
+
+        :param str pid: project id, optional, all projects if not set
+        :return: the numbers of teams
 
         '''
-        query: dict[str, Any] = {
-            '$or': [
-                {'members': uid, '$or': [
-                    {'disabled': {'$exists': False}}, {'disabled': False}]},
-                {'chiefs': uid, '$or': [
-                    {'disabled': {'$exists': False}}, {'disabled': False}]},
-            ],
-        }
+        membership_db = TeamMembershipDB()
+        query: dict[str, Any] = {'pid': pid} if pid else {}
+
+        pids = set()
+        num = 0
+        for team in TeamDB('', '').find(
+                query, {'pid': 1, 'tid': 1, 'chiefs': 1, 'members': 1, 'disabled': 1}):
+            membership_db.sync(team)
+            pids.add(team['pid'])
+            num += 1
 
-        if pid:
-            query['pid'] = {'$in': pid}
+        for _pid in pids:
+            Roster.rebuild(pid=_pid)
 
-        return TeamDB('', '').find(query)
+        return num
+
+    @staticmethod
+    def sync_membership(team: dict[str, Any]) -> None:
+        ''' Sync the `membership` and the roster of the changed users
+
+        :param dict team: the team data
+
+        '''
+        changed = TeamMembershipDB().sync(team)
+        if changed:
+            Roster.rebuild(pid=team['pid'], uids=list(changed))
 
     @staticmethod
     def update_setting(pid: str, tid: str, data: dict[str, Any]) -> Optional[dict[str, Any]]:
@@ -143,25 +227,35 @@ class Team:
                     _data[k] = [i.strip() for i in _data[k].split(',')]
 
         if _data:
-            return teamdb.update_setting(_data)
+            team = teamdb.update_setting(_data)
+            if team and {'chiefs', 'members', 'disabled'} & set(_data):
+                Team.sync_membership(team)
+
+            return team
 
         return None
 
     @staticmethod
     def get_users(pid: str, tids: list[str]) -> dict[str, Any]:
-        ''' Get all users by team
+        ''' Get all users by team, in one query
 
         :param str pid: project id
-        :param list tid: team id
+        :param list tids: list of team id
+        :raises Exception: no team
 
         '''
+        teams = {}
+        for team in TeamDB('', '').find(
+                {'pid': pid, 'tid': {'$in': list(tids)}},
+                {'tid': 1, 'chiefs': 1, 'members': 1}):
+            teams[team['tid']] = team['chiefs'] + team['members']
+
         users = {}
         for tid in tids:
-            team = TeamDB(pid=pid, tid=tid).get()
-            if not team:
+            if tid not in teams:
                 raise Exception(f"no team: {tid}")
 
-            users[tid] = team['chiefs'] + team['members']
+            users[tid] = teams[tid]
 
         return users
 
@@ -234,3 +328,127 @@ class Team:
             uids.append(raw['uid'])
 
         return uids
+
+
+class TeamProjection:
+    ''' The teams in the projections of [models.projection][] '''
+
+    @staticmethod
+    def list_projected(pid: str, model: type[ProjectionT],
+                       show_all: bool = False) -> list[ProjectionT]:
+        ''' List all team in project, only the fields in the projection
+
+        :param str pid: project id
+        :param model: the projection, like :class:`models.projection.TeamSummary`
+        :param bool show_all: include the disabled teams
+
+        '''
+        query: dict[str, Any] = {'pid': pid}
+        if not show_all:
+            query['$or'] = [{'disabled': {'$exists': False}}, {'disabled': False}]
+
+        return [model.from_doc(team) for team in TeamDB('', '').find(query, model.projection())]
+
+    @staticmethod
+    def list_summaries(pid: str, show_all: bool = False) -> list[TeamSummary]:
+        ''' List all team in project, only the `tid`, `name`
+
+        :param str pid: project id
+        :param bool show_all: include the disabled teams
+
+        '''
+        return TeamProjection.list_projected(pid=pid, model=TeamSummary, show_all=show_all)
+
+    @staticmethod
+    def get_projected(pid: str, tids: list[str],
+                      model: type[ProjectionT]) -> dict[str, ProjectionT]:
+        ''' Get teams data in one query, only the fields in the projection
+
+        :param str pid: project id
+        :param list tids: list of team id
+        :param model: the projection, like :class:`models.projection.TeamSummary`
+
+        '''
+        if not tids:
+            return {}
+
+        projection = model.projection()
+        projection['tid'] = 1
+
+        return {team['tid']: model.from_doc(team) for team in TeamDB('', '').find(
+            {'pid': pid, 'tid': {'$in': list(set(tids))}}, projection)}
+
+
+class TeamImport:
+    ''' Import the members of a team in batch '''
+
+    @staticmethod
+    def parse(text: str) -> list[str]:
+        ''' Parse the members import in csv, the mails or the uids
+
+        :param str text: the csv text, one or more columns in a row, the
+                         header `mail`, `email` or `uid` is skipped
+
+        '''
+        keys = []
+        for row in csv.reader(io.StringIO(text)):
+            for cell in row:
+                key = cell.strip()
+                if key and key.lower() not in ('mail', 'email', 'uid'):
+                    keys.append(key)
+
+        return list(dict.fromkeys(keys))
+
+    @staticmethod
+    def resolve(pid: str, tid: str, keys: list[str]) -> dict[str, list[str]]:
+        ''' Resolve the members import before :meth:`save`
+
+        :param str pid: project id
+        :param str tid: team id
+        :param list keys: list of the mails or the uids
+
+        :raises LookupError: no team
+        :return: `{'added': [uid, ...], 'existed': [key, ...], 'unknown': [key, ...]}`,
+                 the `added` are the uids not in the team yet
+
+        '''
+        rosters = TeamProjection.get_projected(pid=pid, tids=[tid, ], model=TeamRoster)
+        if tid not in rosters:
+            raise LookupError(f'no team: {tid}')
+
+        uids = User.resolve_uids(keys=keys)
+        in_team = set(rosters[tid].uids)
+
+        result: dict[str, list[str]] = {'added': [], 'existed': [], 'unknown': []}
+        for key in keys:
+            if key not in uids:
+                result['unknown'].append(key)
+            elif uids[key] in in_team:
+                result['existed'].append(key)
+            elif uids[key] not in result['added']:
+                result['added'].append(uids[key])
+
+        return result
+
+    @staticmethod
+    def save(pid: str, tid: str, uids: list[str]) -> bool:
+        ''' Add the resolved members, like :meth:`Team.update_members`
+
+        The `headcount` is checked in the same update, the concurrent imports
+        can not both pass it.
+
+        :param str pid: project id
+        :param str tid: team id
+        :param list uids: the `added` uids of :meth:`resolve`
+
+        :return: `False` if it is over the `headcount`, nothing is added
+
+        '''
+        team = TeamDB(pid, tid).add_members_in_headcount(add_uids=uids)
+        if team is None:
+            return False
+
+        Team.sync_membership(team)
+        TeamMemberChangedDB().make_record(pid=pid, tid=tid, action={'add': uids})
+
+        return True
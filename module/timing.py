@@ -0,0 +1,103 @@
+''' Timing
+
+    Break down the request time into MongoDB, memcached, template render and
+    the total, for the `Server-Timing` header and the slow request log.
+
+'''
+import json
+import logging
+from contextlib import ExitStack
+from time import perf_counter
+from typing import Any, Optional
+
+from models.base import record_commands
+from module.mc import record_calls
+
+
+class RequestTiming:
+    ''' Timing of one request
+
+    Start recording the MongoDB commands and the memcached calls when
+    created, call [module.timing.RequestTiming.stop][] to finish.
+
+    Attributes:
+        mongo (CommandStats): The [models.base.CommandStats][].
+        mc (CallStats): The [module.mc.CallStats][].
+        template (float): The template render time in seconds.
+        total (float): The total time in seconds, available after stopped.
+
+    '''
+
+    def __init__(self) -> None:
+        self.stack = ExitStack()
+        self.mongo = self.stack.enter_context(record_commands())
+        self.mc = self.stack.enter_context(record_calls())  # pylint: disable=invalid-name
+        self.template = 0.0
+        self.total = 0.0
+        self._render_start: list[float] = []
+        self._start = perf_counter()
+
+    def render_start(self) -> None:
+        ''' Mark the template render started, from `before_render_template` '''
+        self._render_start.append(perf_counter())
+
+    def render_end(self) -> None:
+        ''' Mark the template render ended, from `template_rendered`
+
+        The nested renders are counted in the outer one.
+
+        '''
+        if self._render_start:
+            start = self._render_start.pop()
+            if not self._render_start:
+                self.template += perf_counter() - start
+
+    def stop(self) -> None:
+        ''' Stop recording, could be called more than once '''
+        if not self.total:
+            self.total = perf_counter() - self._start
+
+        self.stack.close()
+
+    def server_timing(self) -> str:
+        ''' The `Server-Timing` header
+
+        Returns:
+            Return the metrics of `mongo`, `mc`, `tpl` and `total` in milliseconds.
+
+        '''
+        return ', '.join((
+            f'mongo;dur={self.mongo.duration*1000:.2f};desc="{self.mongo.count} queries"',
+            f'mc;dur={self.mc.duration*1000:.2f};desc="{self.mc.count} calls"',
+            f'tpl;dur={self.template*1000:.2f}',
+            f'total;dur={self.total*1000:.2f}',
+        ))
+
+    def log_slow(self, threshold_ms: float, **fields: Any) -> Optional[dict[str, Any]]:
+        ''' Log in `WARNING` when the total time exceeds the threshold
+
+        Args:
+            threshold_ms (float): The threshold in milliseconds.
+            fields (dict): The extra fields, like `endpoint`, `pid`, `tid`.
+
+        Returns:
+            Return the logged data in json, or `None` if not slow.
+
+        '''
+        if self.total * 1000 < threshold_ms:
+            return None
+
+        data = {
+            **fields,
+            'total_ms': round(self.total * 1000, 2),
+            'mongo_ms': round(self.mongo.duration * 1000, 2),
+            'mongo_queries': self.mongo.count,
+            'mongo_collections': self.mongo.by_collection(),
+            'mc_ms': round(self.mc.duration * 1000, 2),
+            'mc_calls': self.mc.count,
+            'template_ms': round(self.template * 1000, 2),
+        }
+        logging.getLogger('slow_request').warning(
+            'slow request: %s', json.dumps(data, sort_keys=True))
+
+        return data
@@ -4,6 +4,7 @@ from typing import Any, Generator, Optional
 from pymongo.collection import ReturnDocument
 
 from models.oauth_db import OAuthDB
+from models.projection import UserCard
 from models.users_db import TobeVolunteerDB, UsersDB
 from module.skill import TobeVolunteerStruct
 
@@ -110,12 +111,15 @@ class User:
         )
 
     @staticmethod
-    def get_info(uids: list[str], need_sensitive: bool = False) -> dict[str, Any]:
+    def get_info(uids: list[str], need_sensitive: bool = False,
+                 skip_missing: bool = False) -> dict[str, Any]:
         ''' Get user info
 
         Args:
             uids (list): List of `uid`.
             need_sensitive (bool): Return sensitive data.
+            skip_missing (bool): Skip the users without the OAuth record,
+                or raise the exception.
 
         Returns:
             Return the user data.
@@ -134,16 +138,23 @@ class User:
         if need_sensitive:
             base_fields['profile_real.roc_id'] = 1
 
+        oauths: dict[str, dict[str, Any]] = {}
+        for oauth in OAuthDB().find(
+                {'owner': {'$in': uids}},
+                {'owner': 1, 'data.name': 1, 'data.picture': 1, 'data.email': 1, '_id': 0}):
+            oauths.setdefault(oauth['owner'], oauth)
+
         for user in UsersDB().find({'_id': {'$in': uids}}, base_fields):
-            users[user['_id']] = user
-            oauth_data = OAuthDB().find_one(
-                {'owner': user['_id']},
-                {'data.name': 1, 'data.picture': 1, 'data.email': 1},
-            )
+            oauth_data = oauths.get(user['_id'])
 
             if not oauth_data:
+                if skip_missing:
+                    continue
+
                 raise Exception(f"no user's oauth: {user['_id']}")
 
+            users[user['_id']] = user
+
             users[user['_id']]['oauth'] = {
                 'name': oauth_data['data']['name'],
                 'picture': oauth_data['data']['picture'],
@@ -164,6 +175,73 @@ class User:
 
         return users
 
+    @staticmethod
+    def get_cards(uids: list[str]) -> dict[str, UserCard]:
+        ''' Get users' cards, only the badge name and the picture
+
+        For the lists of users, without the long `intro` in profile and
+        the `profile_real`.
+
+        Args:
+            uids (list): List of `uid`.
+
+        Returns:
+            Return `{'<uid>': <models.projection.UserCard>, ...}`.
+
+        Raises:
+            LookupError: The user without the OAuth data.
+
+        '''
+        oauths: dict[str, dict[str, Any]] = {}
+        for raw in OAuthDB().find(
+                {'owner': {'$in': uids}},
+                {'owner': 1, 'data.name': 1, 'data.picture': 1, '_id': 0}):
+            oauths.setdefault(raw['owner'], raw['data'])
+
+        cards = {}
+        for user in UsersDB().find({'_id': {'$in': uids}}, {'profile.badge_name': 1}):
+            oauth = oauths.get(user['_id'])
+            if not oauth:
+                raise LookupError(f"no user's oauth: {user['_id']}")
+
+            cards[user['_id']] = UserCard(
+                uid=user['_id'],
+                badge_name=user.get('profile', {}).get('badge_name', oauth['name']),
+                picture=oauth['picture'],
+            )
+
+        return cards
+
+    @staticmethod
+    def resolve_uids(keys: list[str]) -> dict[str, str]:
+        ''' Resolve the mails or the uids to the uids
+
+        The mails are resolved from the OAuth records in one query, and
+        the uids are checked in one query.
+
+        Args:
+            keys (list): List of the mail (with `@`) or the `uid`.
+
+        Returns:
+            Return `{'<key>': '<uid>', ...}`, without the unknown keys.
+
+        '''
+        mails = {key.lower(): key for key in keys if '@' in key}
+        uids = [key for key in keys if '@' not in key]
+
+        result = {}
+        if mails:
+            for raw in OAuthDB().find(
+                    {'_id': {'$in': list(set(mails) | set(mails.values()))}}, {'owner': 1}):
+                if raw.get('owner'):
+                    result[mails[raw['_id'].lower()]] = raw['owner']
+
+        if uids:
+            for user in UsersDB().find({'_id': {'$in': uids}}, {'_id': 1}):
+                result[user['_id']] = user['_id']
+
+        return result
+
     @staticmethod
     def get_bank(uid: str) -> dict[str, Any]:
         ''' Get bank info
@@ -284,30 +362,119 @@ class TobeVolunteer:
         return TobeVolunteerStruct.parse_obj(data).dict()
 
     @staticmethod
-    def query(query: dict[str, Any]) -> Generator[dict[str, Any], None, None]:
-        ''' query
+    def match(query: dict[str, Any]) -> dict[str, Any]:
+        ''' The filter of the query, any of the criteria
 
         Args:
-            query (dict): Query data
+            query (dict): Query data in [module.skill.RecruitQuery][].
 
-        Bug:
-            Need to verify and filter.
+        Returns:
+            Return the filter, each branch of the `$or` is on the index.
 
         '''
         _query: dict[str, Any] = {'ok': True}
         _or: list[dict[str, Any]] = []
 
-        if query['skill']:
-            _or.append({'skill': {'$in': query['skill']}})
+        for field in ('skill', 'teams', 'status'):
+            if query[field]:
+                _or.append({field: {'$in': query[field]}})
+
+        if _or:
+            _query['$or'] = _or
+
+        return _query
+
+    @staticmethod
+    def query(query: dict[str, Any], after: Optional[str] = None,
+              limit: int = 50) -> tuple[list[dict[str, Any]], Optional[str]]:
+        ''' query
+
+        Ranked by the `score`, the numbers of the matched criteria in
+        `skill`, `teams` and `status`, then by the `uid`. The `score` is
+        computed in the aggregation, only the page is returned.
 
-        if query['teams']:
-            _or.append({'teams': {'$in': query['teams']}})
+        Args:
+            query (dict): Query data in [module.skill.RecruitQuery][].
+            after (str): The cursor from the last page, `<score>|<uid>`.
+            limit (int): The numbers of the page.
+
+        Returns:
+            Return the datas with the `score`, and the cursor of the next
+            page, or `None` if it is the last page.
+
+        Raises:
+            ValueError: Invalid cursor in `after`.
+
+        '''
+        scores = []
+        for field in ('skill', 'teams'):
+            if query[field]:
+                scores.append({'$cond': [{'$gt': [{'$size': {'$filter': {
+                    'input': {'$ifNull': [f'${field}', []]}, 'as': 'value',
+                    'cond': {'$in': ['$$value', query[field]]}}}}, 0]}, 1, 0]})
 
         if query['status']:
-            _or.append({'status': {'$in': query['status']}})
+            scores.append({'$cond': [
+                {'$in': [{'$ifNull': ['$status', None]}, query['status']]}, 1, 0]})
+
+        pipeline: list[dict[str, Any]] = [
+            {'$match': TobeVolunteer.match(query)},
+            {'$addFields': {'score': {'$add': scores or [0]}}},
+        ]
+
+        if after:
+            try:
+                score, uid = after.split('|', 1)
+                last = int(score)
+            except (AttributeError, ValueError) as error:
+                raise ValueError(f'Invalid cursor `{after}`') from error
+
+            pipeline.append({'$match': {'$or': [
+                {'score': {'$lt': last}},
+                {'score': last, '_id': {'$gt': uid}},
+            ]}})
+
+        pipeline.extend([
+            {'$sort': {'score': -1, '_id': 1}},
+            {'$limit': limit + 1},
+        ])
+
+        datas = list(TobeVolunteerDB().aggregate(pipeline))
+        if len(datas) <= limit:
+            return datas, None
+
+        datas = datas[:limit]
+        return datas, f"{datas[-1]['score']}|{datas[-1]['_id']}"
 
-        if _or:
-            _query['$or'] = _or
+    @staticmethod
+    def count(query: dict[str, Any]) -> dict[str, Any]:
+        ''' Count the matched of each value in the query
+
+        Args:
+            query (dict): Query data in [module.skill.RecruitQuery][].
 
-        for raw in TobeVolunteerDB().find(_query):
-            yield raw
+        Returns:
+            Return `{'total': <int>, 'skill': {'<value>': <int>, ...},
+            'teams': {...}, 'status': {...}}`, in one aggregation.
+
+        '''
+        facets: dict[str, list[dict[str, Any]]] = {
+            'total': [{'$count': 'count'}]}
+        for field in ('skill', 'teams', 'status'):
+            facets[field] = [
+                {'$match': {field: {'$in': query[field]}}},
+                {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+            ]
+            if field != 'status':
+                facets[field].insert(0, {'$unwind': f'${field}'})
+
+        result: dict[str, Any] = {'total': 0, 'skill': {}, 'teams': {}, 'status': {}}
+        for raw in TobeVolunteerDB().aggregate([
+                {'$match': TobeVolunteer.match(query)}, {'$facet': facets}]):
+            if raw['total']:
+                result['total'] = raw['total'][0]['count']
+
+            for field in ('skill', 'teams', 'status'):
+                result[field] = {item['_id']: item['count'] for item in raw[field]}
+
+        return result
@@ -4,7 +4,7 @@ from typing import Any, Generator, Optional
 
 from pymongo.results import InsertOneResult, UpdateResult
 
-from models.usessiondb import USessionDB
+from models.usessiondb import USessionArchiveDB, USessionDB
 from module.mc import MC
 
 
@@ -63,6 +63,21 @@ class USession:
         USessionDB().find_one_and_update(
             {'_id': sid}, {'$set': {'ipinfo': data}})
 
+    @staticmethod
+    def update_ipinfo_many(sids: list[str], data: dict[str, Any]) -> UpdateResult:
+        ''' Update sessions ipinfo in the same IP
+
+        Args:
+            sids (list): List of usession id.
+            data (dict): The ipinfo response data.
+
+        Returns:
+            Return the [pymongo.results.UpdateResult][] object.
+
+        '''
+        return USessionDB().update_many(
+            {'_id': {'$in': sids}}, {'$set': {'ipinfo': data}})
+
     @staticmethod
     def get_recently(uid: str, limit: int = 25) -> Generator[dict[str, Any], None, None]:
         ''' Get recently record
@@ -88,11 +103,13 @@ class USession:
             uid (str): User id.
 
         Yields:
-            Return the datas.
+            Return the datas, those are alive and not expired.
 
         '''
-        for raw in USessionDB(token='').find({'uid': uid, 'alive': True},
-                                             sort=(('created_at', -1), )):
+        for raw in USessionDB(token='').find(
+                {'uid': uid, 'alive': True,
+                 'created_at': {'$gt': time() - 86400*USessionDB.alive_days}},
+                sort=(('created_at', -1), )):
             yield raw
 
     @staticmethod
@@ -113,20 +130,33 @@ class USession:
         MC.get_client().delete(f'sid:{sid}')
 
     @staticmethod
-    def clean(days: int = 3) -> UpdateResult:
-        ''' Make expired
+    def archive(days: int = 30, batch: int = 1000) -> int:
+        ''' Move the past sessions into [models.usessiondb.USessionArchiveDB][]
 
-        :param int days: days
+        The sessions were expired by the `expires_at`, so there is no need to
+        mark them dead. Only the sessions created before `days` will be moved.
 
         Args:
-            days (int): The long days to clean.
+            days (int): The sessions created before the days.
+            batch (int): Numbers of sessions per batch.
 
         Returns:
-            Return the [pymongo.results.UpdateResult][] object.
+            Return the numbers of archived sessions.
 
         '''
-        target = time() - 86400*days
-        return USessionDB(token='').update_many(
-            {'alive': True, 'created_at': {'$lte': target}},
-            {'$set': {'alive': False}},
-        )
+        usession_db = USessionDB(token='')
+        usession_archive_db = USessionArchiveDB()
+        query = {'created_at': {'$lte': time() - 86400*days}}
+
+        total = 0
+        while True:
+            datas = list(usession_db.find(query, limit=batch))
+            if not datas:
+                break
+
+            usession_archive_db.add_many(datas=datas)
+            usession_db.delete_many(
+                {'_id': {'$in': [data['_id'] for data in datas]}})
+            total += len(datas)
+
+        return total
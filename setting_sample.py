@@ -39,6 +39,23 @@ AWS_LIST_UNSUBSCRIBE = '<mailto:{{YOUR_MAIL}}>'
 # for alert/error mail, send to admin
 ADMIN_To = {'name': '{{YOUR_NAME}}', 'mail': '{{YOUR_MAIL}}'}
 
+# ----- Slow request ----- #
+# log the request in `WARNING` with the time breakdown, in milliseconds
+SLOW_REQUEST_MS = 1000
+
+# ----- Metrics ----- #
+# the directory for the multiprocess metrics, empty for single process
+METRICS_DIR = './log/metrics'
+# the bearer token for `/metrics`, empty to allow localhost only
+METRICS_TOKEN = ''
+# the port of the Celery worker exporter on localhost, `0` to disable
+METRICS_CELERY_PORT = 9808
+
+# ----- Profiler ----- #
+# the directory of the sampled profiles, empty to disable,
+# enable it by `cmdtools profile enable`
+PROFILE_DIR = './log/profile'
+
 # ----- IPINFO ----- #
 # ipinfo.io api token, for parse ip info
 IPINFO_TOKEN = '{{IPINFO_TOKEN}}'
@@ -0,0 +1,96 @@
+''' The fixtures for tests
+
+- `max_queries`: Assert the upper bound of the MongoDB commands in a block,
+  by the same [models.base.record_commands][] as the instrumentation.
+- `app`, `login`: The flask app with the fake memcached, and the test client
+  login as a user.
+- `mem_cache`: The fake memcached for all tests.
+
+'''
+import os
+from contextlib import contextmanager
+from typing import Any, Callable, Generator
+
+import pytest
+
+from models.base import CommandStats, record_commands
+from models.usessiondb import USessionDB
+from module.mc import MC
+from tests.fakes import FakeMemcached
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Generator[CommandStats, None, None]:
+    ''' Assert the numbers of the MongoDB commands in this context
+
+    Args:
+        limit (int): The upper bound.
+
+    Yields:
+        Return the [models.base.CommandStats][].
+
+    Examples:
+        ```python
+        def test_get_info(max_queries):
+            with max_queries(2):
+                User.get_info(uids=uids)
+        ```
+
+    '''
+    with record_commands() as stats:
+        yield stats
+
+    assert stats.count <= limit, \
+        f'{stats.count} commands, over {limit}: {stats.by_collection()}'
+
+
+@pytest.fixture
+def max_queries() -> Callable[[int], Any]:
+    ''' The [assert_max_queries][tests.conftest.assert_max_queries] '''
+    return assert_max_queries
+
+
+@pytest.fixture(autouse=True)
+def mem_cache(monkeypatch: pytest.MonkeyPatch) -> FakeMemcached:
+    ''' The fake memcached for all tests '''
+    client = FakeMemcached()
+    monkeypatch.setattr(MC, 'get_client', staticmethod(lambda: client))
+    return client
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory: pytest.TempPathFactory) -> Generator[Any, None, None]:
+    ''' The flask app with the fake memcached
+
+    `main.py` writes the log into `./log/`, so run it in a temporary directory.
+
+    '''
+    workdir = tmp_path_factory.mktemp('app')
+    (workdir / 'log').mkdir()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    with pytest.MonkeyPatch.context() as patch:
+        fake_cache = FakeMemcached()
+        patch.setattr(MC, 'get_client', staticmethod(lambda: fake_cache))
+
+        import main  # pylint: disable=import-outside-toplevel
+        main.app.config['TESTING'] = True
+
+        yield main.app
+
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def login(app: Any) -> Callable[[str], Any]:  # pylint: disable=redefined-outer-name
+    ''' Make the test client login as the user with the alive session '''
+    def make_client(uid: str) -> Any:
+        client = app.test_client()
+        client.environ_base['wsgi.url_scheme'] = 'https'
+        with client.session_transaction() as session:
+            session['sid'] = USessionDB().find_one({'uid': uid, 'alive': True})['_id']
+
+        return client
+
+    return make_client
@@ -0,0 +1,87 @@
+''' The in-process fakes shared by the tests and the benchmarks '''
+from typing import Any, Optional
+
+
+class FakeMemcached:
+    ''' The in-memory client in the same interface of [pylibmc.Client][]
+
+    The expire time is ignored.
+
+    Attributes:
+        store (dict): The datas.
+        hits (int): The numbers of the hit keys.
+        misses (int): The numbers of the missed keys.
+
+    '''
+
+    def __init__(self) -> None:
+        self.store: dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        ''' get '''
+        if key in self.store:
+            self.hits += 1
+            return self.store[key]
+
+        self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any, time: int = 0) -> bool:  # pylint: disable=unused-argument
+        ''' set '''
+        self.store[key] = value
+        return True
+
+    def add(self, key: str, value: Any, time: int = 0) -> bool:
+        ''' add '''
+        if key in self.store:
+            return False
+
+        return self.set(key, value, time)
+
+    def delete(self, key: str) -> bool:
+        ''' delete '''
+        return self.store.pop(key, None) is not None
+
+    def get_multi(self, keys: list[str], key_prefix: str = '') -> dict[str, Any]:
+        ''' get multi '''
+        result = {}
+        for key in keys:
+            if f'{key_prefix}{key}' in self.store:
+                self.hits += 1
+                result[key] = self.store[f'{key_prefix}{key}']
+            else:
+                self.misses += 1
+
+        return result
+
+    def set_multi(self, mapping: dict[str, Any], time: int = 0,  # pylint: disable=unused-argument
+                  key_prefix: str = '') -> list[str]:
+        ''' set multi '''
+        for key, value in mapping.items():
+            self.store[f'{key_prefix}{key}'] = value
+
+        return []
+
+    def delete_multi(self, keys: list[str], key_prefix: str = '') -> bool:
+        ''' delete multi '''
+        for key in keys:
+            self.store.pop(f'{key_prefix}{key}', None)
+
+        return True
+
+    def incr(self, key: str, delta: int = 1) -> int:
+        ''' incr '''
+        self.store[key] = int(self.store[key]) + delta
+        return int(self.store[key])
+
+    def decr(self, key: str, delta: int = 1) -> int:
+        ''' decr '''
+        self.store[key] = max(0, int(self.store[key]) - delta)
+        return int(self.store[key])
+
+    def flush_all(self) -> bool:
+        ''' flush all '''
+        self.store.clear()
+        return True
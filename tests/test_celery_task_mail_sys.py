@@ -0,0 +1,116 @@
+''' test celery_task/task_mail_sys '''
+from datetime import datetime
+from time import time
+
+from celery_task import task_mail_sys
+from celery_task.celery_main import app
+from celery_task.task_mail_sys import (mail_member_deny, mail_tasks_star,
+                                       mail_tasks_star_batch)
+from cmdtools.seed import Seeder
+from models.tasksdb import TasksStarNotifyDB
+from models.teamdb import TeamMemberChangedDB
+from module.outbox import MEMBER_CHANGED, Outbox
+from module.tasks import Tasks, TasksStar
+from module.users import User
+
+
+class FakeMail(str):
+    ''' Fake mail, only the recipient '''
+
+    def as_string(self):
+        ''' as string '''
+        return str(self)
+
+
+class FakeSES:
+    ''' Fake SES, fail in `fails` calls from the `fail_at` call '''
+
+    def __init__(self, fail_at=None, fails=1):
+        self.fail_at = fail_at
+        self.fails = fails
+        self.calls = 0
+        self.sent = []
+
+    @staticmethod
+    def raw_mail(to_addresses, subject, body):  # pylint: disable=unused-argument
+        ''' raw mail '''
+        return FakeMail(to_addresses[0]['mail'])
+
+    def send_raw_email(self, data=None, data_str=None):
+        ''' send raw email '''
+        self.calls += 1
+        if self.fail_at and self.fail_at <= self.calls < self.fail_at + self.fails:
+            raise ConnectionError('ses is down')
+
+        self.sent.append(data or data_str)
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+def test_mail_tasks_star_batch_retry_unsent(monkeypatch):
+    ''' test the retry only sends to the users not sent '''
+    task = Tasks.add(pid='ms2022', body={
+        'title': 'Booth', 'cate': '', 'desc': '', 'limit': 1,
+        'starttime': datetime(2022, 7, 30, 9, 0), 'created_by': 'c1'})
+
+    ses = FakeSES(fail_at=2)
+    monkeypatch.setattr(task_mail_sys.MailTemplate, 'awsses', lambda: ses)
+
+    mail_tasks_star_batch.apply(kwargs={
+        'pid': 'ms2022', 'task_ids': [task['_id']],
+        'users': [{'name': name, 'mail': f'{name}@example.org'} for name in 'abc']})
+
+    assert ses.sent == ['a@example.org', 'b@example.org', 'c@example.org']
+
+
+def test_mail_tasks_star_claim_after_resolved(monkeypatch):
+    ''' test the pending tasks are not claimed if it fails in resolving '''
+    TasksStarNotifyDB().insert_one(
+        {'pid': 'mc2022', 'task_id': 't1', 'created_at': time() - 7200})
+    TasksStar.add(pid='mc2022', uid='u1')
+
+    def get_info(uids):
+        raise ConnectionError(f'no users: {uids}')
+
+    monkeypatch.setattr(app.conf, 'task_eager_propagates', False)
+    monkeypatch.setattr(task_mail_sys.User, 'get_info', get_info)
+    assert mail_tasks_star.apply(kwargs={'pid': 'mc2022'}).failed()
+
+    assert TasksStar.claim_notify(pid='mc2022') == ['t1']
+
+
+def test_mail_member_deny_retry_unsent(monkeypatch):
+    ''' test the failed mail is kept in the outbox, and sent once in the retry '''
+    seeded = Seeder(seed=44, users=5, projects=1, teams=1, prefix='md').run()
+    pid, tid = seeded['teams'][0]
+    uids = seeded['uids'][:3]
+    Outbox(name=MEMBER_CHANGED, consumer='mail.member.deny').skip()
+    TeamMemberChangedDB().make_record(pid=pid, tid=tid, action={'deny': uids})
+
+    ses = FakeSES(fail_at=2)
+    monkeypatch.setattr(task_mail_sys.MailTemplate, 'awsses', lambda: ses)
+    mail_member_deny.apply()
+
+    users = User.get_info(uids=uids)
+    assert ses.sent == [users[uid]['oauth']['email'] for uid in uids]
+    assert not Outbox(name=MEMBER_CHANGED, consumer='mail.member.deny').read(cases=('deny', ))
+
+
+def test_mail_member_deny_keep_unsent(monkeypatch):
+    ''' test the unsent mails are kept in the outbox, after the retries are exhausted '''
+    seeded = Seeder(seed=44, users=5, projects=1, teams=1, prefix='mk').run()
+    pid, tid = seeded['teams'][0]
+    uids = seeded['uids'][:3]
+    Outbox(name=MEMBER_CHANGED, consumer='mail.member.deny').skip()
+    TeamMemberChangedDB().make_record(pid=pid, tid=tid, action={'deny': uids})
+
+    ses = FakeSES(fail_at=2, fails=6)
+    monkeypatch.setattr(app.conf, 'task_eager_propagates', False)
+    monkeypatch.setattr(task_mail_sys.MailTemplate, 'awsses', lambda: ses)
+    assert mail_member_deny.apply().failed()
+    assert [raw['uid'] for raw in Outbox(
+        name=MEMBER_CHANGED, consumer='mail.member.deny').read(cases=('deny', ))] == uids[1:]
+
+    mail_member_deny.apply()
+    users = User.get_info(uids=uids)
+    assert ses.sent == [users[uid]['oauth']['email'] for uid in uids]
+    assert not Outbox(name=MEMBER_CHANGED, consumer='mail.member.deny').read(cases=('deny', ))
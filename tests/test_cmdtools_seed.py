@@ -0,0 +1,27 @@
+''' test cmdtools/seed '''
+from cmdtools.seed import ALIVE_UNTIL, Seeder
+from models.teamdb import TeamDB
+from models.usessiondb import USessionDB
+from module.users import User
+
+
+def test_seed_deterministic():
+    ''' test the same seed makes the same datas '''
+    first = Seeder(seed=7, users=40, projects=2, teams=3, prefix='t7', now=1660000000).run()
+    second = Seeder(seed=7, users=40, projects=2, teams=3, prefix='t7', now=1660000000).run()
+
+    assert first == second
+    assert first['pids'] == ['t72021', 't72022']
+    assert TeamDB(pid='', tid='').count_documents({'pid': {'$in': first['pids']}}) == 6
+
+    users = User.get_info(uids=first['uids'])
+    assert len(users) == 40
+
+
+def test_seed_default_now():
+    ''' test the default `now` is the fixed epoch, not the current time '''
+    seeded = Seeder(seed=8, users=5, projects=1, teams=1, prefix='t8').run()
+
+    assert seeded['pids'] == ['t82022']
+    assert USessionDB().find_one({'uid': seeded['uids'][0], 'alive': True})['expires_at'] == \
+        ALIVE_UNTIL
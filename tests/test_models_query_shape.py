@@ -0,0 +1,63 @@
+''' test models/query_shape '''
+from models.query_shape import (QueryShape, advise, make_shapes, match_index,
+                                record_shapes, redundant_indexes)
+from models.tasksdb import TasksDB
+from models.waitlistdb import WaitListDB
+
+
+def test_make_shapes():
+    ''' test normalize the filters '''
+    shapes = make_shapes('waitlist', 'find', {
+        'pid': 'p', 'uid': {'$in': ['a']}, 'result': {'$exists': False},
+        'created_at': {'$gte': 1}, '$or': [{'tid': 't'}, {'note': {'$ne': ''}}]})
+
+    assert [(shape.equality, shape.ranges) for shape in shapes] == [
+        (('pid', 'result', 'tid', 'uid'), ('created_at', )),
+        (('pid', 'result', 'uid'), ('created_at', 'note')),
+    ]
+    assert shapes[1].suggest() == (
+        ('pid', 1), ('result', 1), ('uid', 1), ('created_at', 1), ('note', 1))
+
+
+def test_match_index():
+    ''' test match the shapes with the indexes '''
+    shape = QueryShape('tasks', 'find', ('pid', ), (), (('starttime', 1), ))
+    assert match_index(shape, []) == ('missing', None)
+    assert match_index(shape, [((('pid', 1), ), {})])[0] == 'partial'
+    assert match_index(shape, [((('pid', 1), ('starttime', 1)), {})])[0] == 'covered'
+
+    shape = QueryShape('usession', 'find', (), ('created_at', ), ())
+    assert match_index(shape, [((('bar', 1), ), {})]) == ('missing', None)
+    assert match_index(shape, [((('created_at', 1), ), {})])[0] == 'covered'
+
+    shape = QueryShape('tasks', 'find', ('pid', ), ('endtime', ), ())
+    assert match_index(shape, [((('pid', 1), ('starttime', 1)), {})])[0] == 'partial'
+    assert match_index(shape, [((('pid', 1), ('endtime', 1)), {})])[0] == 'covered'
+
+    shape = QueryShape('tasks', 'find', ('pid', ), ('starttime', ), (('starttime', 1), ))
+    assert match_index(shape, [((('pid', 1), ('starttime', 1)), {})])[0] == 'covered'
+
+    shape = QueryShape('team', 'find', ('chiefs', 'pid', 'tid'), (), ())
+    assert match_index(shape, [((('pid', 1), ('tid', 1)), {'unique': True})])[0] == 'covered'
+
+    assert redundant_indexes([
+        ((('pid', 1), ), {}), ((('pid', 1), ('tid', 1)), {}), ((('uid', 1), ), {'unique': True}),
+    ]) == [((('pid', 1), ), (('pid', 1), ('tid', 1)))]
+
+
+def test_record_shapes():
+    ''' test record the shapes and advise '''
+    with record_shapes() as stats:
+        list(TasksDB().find({'pid': 'qs2022'}).sort('starttime', 1))
+        WaitListDB().join_to(pid='qs2022', tid='web', uid='u1')
+
+    assert set(stats.shapes) == {
+        QueryShape('tasks', 'find', ('pid', ), (), (('starttime', 1), )),
+        QueryShape('waitlist', 'find_one_and_update', ('pid', 'result', 'tid', 'uid'), (), ()),
+    }
+
+    advices = {advice.collection: advice for advice in advise(stats, explain=False)}
+    assert [status for _, _, status, _, _ in advices['tasks'].shapes] == ['covered']
+    assert [status for _, _, status, _, _ in advices['waitlist'].shapes] == ['covered']
+    assert not advices['tasks'].missing
+    assert advices['waitlist'].unused == [(('uid', 1), )]
@@ -0,0 +1,59 @@
+''' test models/teamdb '''
+from models.teamdb import (TeamDB, TeamMemberChangedDB, TeamPlanCalendarDB,
+                           TeamPlanDB)
+
+
+def test_plan_calendar(max_queries):
+    ''' test the plans expanded into the calendar when saved '''
+    TeamPlanDB().add(pid='pc2022', tid='web', data=[
+        {'title': 'Design', 'start': '2022-06-29', 'end': '2022-07-02', 'desc': ''},
+        {'title': 'Launch', 'start': '2022-07-01', 'end': '', 'desc': ''},
+    ])
+    TeamPlanDB().add(pid='pc2022', tid='doc', data=[
+        {'title': 'Review', 'start': '2022-07-02', 'end': '', 'desc': ''},
+    ])
+
+    with max_queries(1):
+        dates = TeamPlanCalendarDB().find_dates(pid='pc2022')
+
+    assert [(day, [plan['title'] for plan in plans]) for day, plans in dates] == [
+        ('2022-06-29', ['Design']),
+        ('2022-06-30', ['Design']),
+        ('2022-07-01', ['Design', 'Launch']),
+        ('2022-07-02', ['Review', 'Design']),
+    ]
+    assert [day for day, _ in TeamPlanCalendarDB().find_dates(
+        pid='pc2022', tid='web', start='2022-07-01', end='2022-07-31')] == \
+        ['2022-07-01', '2022-07-02']
+
+    calendar = TeamPlanCalendarDB()
+    assert not calendar.sync(pid='pc2022', tid='doc', data=[
+        {'title': 'Review', 'start': '2022-07-02', 'end': '', 'desc': ''}])
+
+    TeamPlanDB().add(pid='pc2022', tid='web', data=[
+        {'title': 'Launch', 'start': '2022-07-01', 'end': '', 'desc': ''}])
+    assert [day for day, _ in calendar.find_dates(pid='pc2022', tid='web')] == ['2022-07-01']
+
+    calendar.delete_many({'pid': 'pc2022'})
+    assert TeamPlanDB().rebuild_calendar(pid='pc2022') == 2
+    assert len(calendar.find_dates(pid='pc2022')) == 2
+
+
+def test_team_index():
+    ''' test the `pid` index is replaced by the `pid`, `tid` index '''
+    team_db = TeamDB('', '')
+    team_db.create_index([('pid', 1), ])
+    team_db.index()
+
+    assert 'pid_1' not in team_db.index_information()
+    assert 'pid_1_tid_1' in team_db.index_information()
+
+
+def test_member_changed_index():
+    ''' test the `case` index is dropped '''
+    changed_db = TeamMemberChangedDB()
+    changed_db.create_index([('case', 1), ])
+    changed_db.index()
+
+    assert 'case_1' not in changed_db.index_information()
+    assert 'seq_1' in changed_db.index_information()
@@ -0,0 +1,46 @@
+''' test module/budget '''
+from models.budgetdb import BudgetDB
+from module.budget import Budget
+
+
+def make_row(action: str, bid: str, **kwargs: str) -> dict[str, str]:
+    ''' make a row in the csv '''
+    row = {'action': action, 'bid': bid, 'tid': 'web', 'uid': 'Alice', 'name': bid,
+           'desc': '', 'total': 'NT$1,200', 'currency': 'TWD', 'paydate': '2022/07/30',
+           'estimate': ''}
+    row.update(kwargs)
+    return row
+
+
+def test_import_batch(max_queries):
+    ''' test verify and import the batch items in bulk '''
+    Budget.add(pid='bi2022', tid='web', data={'uid': 'Bob', 'bid': 'B-1', 'name': 'old'})
+    Budget.add(pid='bi2022', tid='web', data={'uid': 'Bob', 'bid': 'B-4', 'name': 'old'})
+
+    items = [
+        make_row('add', 'B-2'),
+        make_row('add', 'B-4'),
+        make_row('update', 'B-1', total='300.5', paydate='next week'),
+        make_row('update', 'B-9'),
+        make_row('add', 'B-2'),
+        make_row('remove', 'B-3'),
+    ]
+
+    with max_queries(2):
+        report = Budget.import_batch(pid='bi2022', items=items, save=True)
+
+    assert [row['status'] for row in report] == \
+        ['added', 'existed', 'updated', 'missing', 'duplicated', 'invalid']
+    assert report[0]['item']['total'] == 1200
+    assert report[0]['item']['paydate'] == '2022-07-30'
+    assert report[5]['errors'][0]['loc'] == ('action', )
+
+    budgets = {raw['bid']: raw for raw in BudgetDB().find({'pid': 'bi2022'})}
+    assert sorted(budgets) == ['B-1', 'B-2', 'B-4']
+    assert budgets['B-1']['total'] == 300.5
+    assert budgets['B-1']['desc'] == '預計付款時間：next week\n'
+    assert budgets['B-2']['code'].startswith('B-')
+
+    report = Budget.import_batch(pid='bi2022', items=items[:1], save=True)
+    assert report[0]['status'] == 'existed'
+    assert BudgetDB().count_documents({'pid': 'bi2022'}) == 3
@@ -0,0 +1,70 @@
+''' test module/ipinfo '''
+from models.ipinfodb import IPInfoDB
+from module.ipinfo import IPInfo
+
+
+class FakeResponse:  # pylint: disable=too-few-public-methods
+    ''' Fake response '''
+
+    def __init__(self, data, ok=True):  # pylint: disable=invalid-name
+        self.data = data
+        self.ok = ok  # pylint: disable=invalid-name
+
+    def json(self):
+        ''' json '''
+        return self.data
+
+
+class StubIPInfo(IPInfo):
+    ''' IPInfo stub, record the batch requests '''
+
+    def __init__(self):
+        super().__init__(token='token')
+        self.requested = []
+
+    def get_batch(self, ip_addresses):
+        self.requested.append(list(ip_addresses))
+        return FakeResponse({ip: {'ip': ip, 'city': 'Taipei'} for ip in ip_addresses})
+
+
+def test_lookup_dedup(mem_cache):
+    ''' test lookup in distinct IP and cached '''
+    stub = StubIPInfo()
+    result = stub.lookup(
+        ip_addresses=['192.0.2.1', '192.0.2.1', '192.0.2.2'])
+
+    assert len(stub.requested) == 1
+    assert sorted(stub.requested[0]) == ['192.0.2.1', '192.0.2.2']
+    assert result['192.0.2.1']['city'] == 'Taipei'
+    assert 'ipinfo:192.0.2.2' in mem_cache.store
+
+    stub.lookup(ip_addresses=['192.0.2.1', '192.0.2.2'])
+    assert len(stub.requested) == 1
+
+
+def test_lookup_from_db(mem_cache):  # pylint: disable=unused-argument
+    ''' test lookup from the db cache '''
+    IPInfoDB().add(ip_address='192.0.2.9', data={'ip': '192.0.2.9'})
+
+    stub = StubIPInfo()
+    result = stub.lookup(ip_addresses=['192.0.2.9', '192.0.2.10'])
+
+    assert stub.requested == [['192.0.2.10']]
+    assert result['192.0.2.9'] == {'ip': '192.0.2.9'}
+
+
+def test_lookup_skip_errors(mem_cache):
+    ''' test the failed batch and the error entries are not cached '''
+    stub = StubIPInfo()
+    stub.get_batch = lambda ip_addresses: FakeResponse(
+        {'error': {'title': 'Rate limit exceeded'}}, ok=False)
+    assert not stub.lookup(ip_addresses=['192.0.2.21'])
+
+    stub.get_batch = lambda ip_addresses: FakeResponse({
+        '192.0.2.21': {'ip': '192.0.2.21'}, '192.0.2.22': {'error': 'Wrong ip'},
+        '192.0.2.23': 'Not found'})
+    result = stub.lookup(ip_addresses=['192.0.2.21', '192.0.2.22', '192.0.2.23'])
+
+    assert list(result) == ['192.0.2.21']
+    assert not IPInfoDB().get_by_ips(ips=['192.0.2.22', '192.0.2.23'])
+    assert 'ipinfo:192.0.2.22' not in mem_cache.store
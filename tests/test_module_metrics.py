@@ -0,0 +1,72 @@
+''' test module/metrics '''
+import json
+
+from models.base import record_commands
+from models.usessiondb import USessionDB
+from module.mc import RecordedClient, record_calls
+from module.metrics import Registry, render
+
+
+class FakeClient:
+    ''' Fake memcached client '''
+
+    def get(self, key):
+        ''' get '''
+        return {'sid:hit': 1}.get(key)
+
+    def get_multi(self, keys, key_prefix=''):
+        ''' get multi '''
+        return {key: 1 for key in keys if f'{key_prefix}{key}' == 'ipinfo:hit'}
+
+
+def test_render():
+    ''' test the text format '''
+    registry = Registry()
+    registry.inc('http_requests_total', endpoint='index', method='GET', status=200)
+    registry.inc('http_requests_total', endpoint='index', method='GET', status=200)
+    registry.observe('http_request_duration_seconds', 0.02, endpoint='index')
+    registry.observe('http_request_duration_seconds', 100, endpoint='index')
+
+    text = render(registry.snapshot())
+    assert '# TYPE http_requests_total counter' in text
+    assert 'http_requests_total{endpoint="index",method="GET",status="200"} 2' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="index",le="0.01"} 0' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="index",le="0.025"} 1' in text
+    assert 'http_request_duration_seconds_bucket{endpoint="index",le="+Inf"} 2' in text
+    assert 'http_request_duration_seconds_sum{endpoint="index"} 100.02' in text
+    assert 'http_request_duration_seconds_count{endpoint="index"} 2' in text
+
+
+def test_multiprocess(tmp_path):
+    ''' test merge the snapshots of the processes '''
+    other = Registry()
+    other.inc('celery_tasks_total', task='a', state='SUCCESS')
+    (tmp_path / '1.json').write_text(json.dumps(other.snapshot()))
+
+    registry = Registry(directory=str(tmp_path))
+    registry.inc('celery_tasks_total', task='a', state='SUCCESS')
+    registry.observe('celery_task_duration_seconds', 1, task='a')
+
+    text = render(registry.collect())
+    assert 'celery_tasks_total{state="SUCCESS",task="a"} 2' in text
+    assert 'celery_task_duration_seconds_count{task="a"} 1' in text
+
+
+def test_observe_commands_and_cache():
+    ''' test the MongoDB commands and the memcached hits '''
+    registry = Registry()
+    with record_commands() as mongo, record_calls() as mem_cache:
+        USessionDB().find_one({'_id': 'metrics'})
+        client = RecordedClient(FakeClient())
+        client.get('sid:hit')
+        client.get('sid:miss')
+        client.get_multi(['hit', 'miss'], key_prefix='ipinfo:')
+
+    registry.observe_commands(mongo)
+    registry.observe_cache(mem_cache)
+
+    text = render(registry.snapshot())
+    assert 'mongo_commands_total{collection="usession",command="find"} 1' in text
+    assert 'memcached_gets_total{prefix="sid",result="hit"} 1' in text
+    assert 'memcached_gets_total{prefix="sid",result="miss"} 1' in text
+    assert 'memcached_gets_total{prefix="ipinfo",result="hit"} 1' in text
@@ -0,0 +1,136 @@
+''' test module/outbox '''
+from time import time
+
+import pytest
+
+from models.outboxdb import OutboxCheckpointDB, SequenceDB
+from models.teamdb import TeamMemberChangedDB
+from module.outbox import MEMBER_CHANGED, MEMBER_CHANGED_CONSUMERS, Outbox
+
+
+def test_outbox(max_queries):
+    ''' test read the member changes after the checkpoint '''
+    for consumer in MEMBER_CHANGED_CONSUMERS:
+        Outbox(name=MEMBER_CHANGED, consumer=consumer).skip()
+
+    start = SequenceDB().last(name=MEMBER_CHANGED)
+    TeamMemberChangedDB().make_record(pid='ob2022', tid='web', action={
+        'add': ['u1', 'u2'], 'del': ['u3'], 'waiting': ['u4']})
+
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mail.member.add')
+    with max_queries(2):
+        raws = outbox.read(cases=('add', ))
+
+    assert [(raw['seq'], raw['uid']) for raw in raws] == [(start + 1, 'u1'), (start + 2, 'u2')]
+    assert outbox.last == start + 4
+
+    outbox.save()
+    assert not Outbox(name=MEMBER_CHANGED, consumer='mail.member.add').read()
+    assert [raw['uid'] for raw in Outbox(
+        name=MEMBER_CHANGED, consumer='gsuite.team').read(cases=('add', 'del'))] == \
+        ['u1', 'u2', 'u3']
+
+    # the reserved seq is not inserted yet, wait for it until the grace
+    seq = SequenceDB().reserve(name=MEMBER_CHANGED, num=2)
+    TeamMemberChangedDB().insert_one({'pid': 'ob2022', 'tid': 'web', 'case': 'add',
+                                      'uid': 'u5', 'seq': seq + 1, 'create_at': time()})
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mail.member.add')
+    assert not outbox.read()
+    assert outbox.last == start + 4
+
+    TeamMemberChangedDB().update_one({'seq': seq + 1}, {'$set': {'create_at': time() - 120}})
+    assert [raw['uid'] for raw in outbox.read()] == ['u5']
+    outbox.save()
+
+
+def test_compact_and_migrate():
+    ''' test compact the processed records and migrate the legacy records '''
+    TeamMemberChangedDB().delete_many({})
+    TeamMemberChangedDB().insert_many([
+        {'pid': 'mg2022', 'tid': 'web', 'case': 'add', 'uid': 'l1', 'create_at': 1,
+         'done': {'mail': True, 'gsuite_team': True, 'gsuite_staff': True}},
+        {'pid': 'mg2022', 'tid': 'web', 'case': 'add', 'uid': 'l2', 'create_at': 2,
+         'done': {'mail': True}},
+    ])
+    checkpoint_db = OutboxCheckpointDB()
+    checkpoint_db.delete_many({'outbox': MEMBER_CHANGED})
+
+    assert Outbox.migrate_member_changed() == 2
+    last = SequenceDB().last(name=MEMBER_CHANGED)
+    checkpoints = checkpoint_db.list_by_outbox(outbox=MEMBER_CHANGED)
+    assert checkpoints['mail.member.add'] == last
+    assert checkpoints['gsuite.team'] == last - 1
+    assert checkpoints['mattermost.channel'] == last
+
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='gsuite.team')
+    assert [raw['uid'] for raw in outbox.read()] == ['l2']
+    assert Outbox.compact(name=MEMBER_CHANGED, consumers=list(MEMBER_CHANGED_CONSUMERS)) == 1
+
+    outbox.save()
+    Outbox(name=MEMBER_CHANGED, consumer='gsuite.staff').skip()
+    assert Outbox.compact(name=MEMBER_CHANGED, consumers=list(MEMBER_CHANGED_CONSUMERS)) == 1
+    assert not TeamMemberChangedDB().count_documents({'pid': 'mg2022'})
+
+
+def test_migrate_after_checkpoints():
+    ''' test the records done before the migration are not processed again '''
+    for consumer in MEMBER_CHANGED_CONSUMERS:
+        Outbox(name=MEMBER_CHANGED, consumer=consumer).skip()
+
+    TeamMemberChangedDB().insert_many([
+        {'pid': 'ma2022', 'tid': 'web', 'case': 'add', 'uid': 'l1', 'create_at': 1,
+         'done': {'mail': True, 'gsuite_team': True}},
+        {'pid': 'ma2022', 'tid': 'web', 'case': 'add', 'uid': 'l2', 'create_at': 2,
+         'done': {'gsuite_team': True}},
+    ])
+    assert Outbox.migrate_member_changed() == 2
+
+    assert [raw['uid'] for raw in Outbox(
+        name=MEMBER_CHANGED, consumer='mail.member.add').read(cases=('add', ))] == ['l2']
+    assert not Outbox(name=MEMBER_CHANGED, consumer='gsuite.team').read()
+    assert not Outbox(name=MEMBER_CHANGED, consumer='mattermost.channel').read()
+    assert [raw['uid'] for raw in Outbox(
+        name=MEMBER_CHANGED, consumer='gsuite.staff').read()] == ['l1', 'l2']
+
+
+def test_process_save_marked():
+    ''' test the checkpoint is saved at the last marked record if it raises '''
+    Outbox(name=MEMBER_CHANGED, consumer='mail.member.del').skip()
+    TeamMemberChangedDB().make_record(pid='op2022', tid='web', action={'del': ['u1', 'u2']})
+
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mail.member.del')
+    with pytest.raises(ConnectionError):
+        with outbox.process() as leased:
+            assert leased
+            for raw in outbox.read(cases=('del', )):
+                if raw['uid'] == 'u2':
+                    raise ConnectionError('ses is down')
+
+                outbox.mark(raw)
+
+    outbox = Outbox(name=MEMBER_CHANGED, consumer='mail.member.del')
+    with outbox.process() as leased:
+        assert leased
+        assert [raw['uid'] for raw in outbox.read(cases=('del', ))] == ['u2']
+
+    assert not Outbox(name=MEMBER_CHANGED, consumer='mail.member.del').read()
+
+
+def test_process_lease():
+    ''' test only one worker processes the same consumer at once '''
+    Outbox(name=MEMBER_CHANGED, consumer='gsuite.staff').skip()
+    TeamMemberChangedDB().make_record(pid='ol2022', tid='web', action={'add': ['u1']})
+
+    with Outbox(name=MEMBER_CHANGED, consumer='gsuite.staff').process() as leased:
+        assert leased
+        outbox = Outbox(name=MEMBER_CHANGED, consumer='gsuite.staff')
+        with outbox.process() as other:
+            assert not other
+
+        assert [raw['uid'] for raw in outbox.read()] == ['u1']
+
+    with outbox.process() as leased:
+        assert leased
+        assert [raw['uid'] for raw in outbox.read()] == ['u1']
+
+    assert not Outbox(name=MEMBER_CHANGED, consumer='gsuite.staff').read()
@@ -0,0 +1,48 @@
+''' test module/profiler '''
+from time import perf_counter
+
+from module.profiler import (ProfileConfig, Profiler, StackSampler, aggregate,
+                             top_frames)
+
+
+def busy_loop(seconds):
+    ''' busy loop '''
+    start = perf_counter()
+    while perf_counter() - start < seconds:
+        sum(range(100))
+
+
+def test_sampler_and_aggregate(tmp_path):
+    ''' test sample the current thread, then aggregate the files '''
+    profiler = Profiler(kind='web', directory=str(tmp_path))
+    for _ in range(2):
+        sampler = StackSampler(interval=0.001).start()
+        busy_loop(0.05)
+        profiler.save(sampler=sampler, name='team.members')
+
+    files = sorted(tmp_path.glob('web-*-team.members-*.folded'))
+    assert len(files) == 2
+
+    stacks = aggregate(files)
+    busy = sum(num for stack, num in stacks.items() if 'busy_loop (' in stack)
+    assert busy > sum(stacks.values()) / 2
+
+    frame, self_num, total_num = top_frames(stacks, limit=5)[0]
+    assert frame.startswith('busy_loop (')
+    assert self_num <= total_num
+
+
+def test_should_sample(monkeypatch):
+    ''' test 1-in-N and the pattern '''
+    config = {'every': 3, 'pattern': r'^/project/', 'tasks_every': 0, 'tasks_pattern': ''}
+    monkeypatch.setattr(ProfileConfig, 'get', classmethod(lambda cls: config))
+
+    web = Profiler(kind='web', directory='/tmp/profile')
+    assert [web.should_sample('/team') for _ in range(6)] == \
+        [False, False, True, False, False, True]
+    assert web.should_sample('/project/2022/')
+
+    task = Profiler(kind='task', directory='/tmp/profile')
+    assert not task.should_sample('mail.member.add')
+
+    assert not Profiler(kind='web', directory='').should_sample('/project/2022/')
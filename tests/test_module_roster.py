@@ -0,0 +1,66 @@
+''' test module/roster '''
+from cmdtools.seed import Seeder
+from models.oauth_db import OAuthDB
+from models.teamdb import TeamDB
+from models.users_db import UsersDB
+from module.oauth import OAuth
+from module.roster import Roster
+from module.team import Team
+from module.users import User
+
+
+def test_roster(max_queries, mem_cache):
+    ''' test the roster is rebuilt incrementally and cached '''
+    seeded = Seeder(seed=40, users=30, projects=1, teams=2, prefix='ro').run()
+    pid = seeded['pids'][0]
+    tid = seeded['teams'][0][1]
+    team = TeamDB(pid=pid, tid=tid).get()
+
+    roster = Roster.get(pid=pid)
+    assert {raw['uid'] for raw in roster} == set(Team.list_uids_by_pid(pid=pid))
+    with max_queries(0):
+        assert Roster.get(pid=pid) == roster
+
+    outsider = [uid for uid in seeded['uids'] if uid not in {raw['uid'] for raw in roster}][0]
+    Team.update_members(pid=pid, tid=tid, add_uids=[outsider])
+    assert 'roster:' + pid not in mem_cache.store
+    assert [raw['teams'] for raw in Roster.get(pid=pid) if raw['uid'] == outsider] == \
+        [[{'tid': tid, 'role': 'member'}]]
+    assert outsider in {raw['uid'] for raw in Roster.get_by_tids(pid=pid, tids=[tid])}
+
+    Team.update_members(pid=pid, tid=tid, del_uids=[outsider])
+    assert outsider not in {raw['uid'] for raw in Roster.get(pid=pid)}
+
+    chief = team['chiefs'][0]
+    User(uid=chief).update_profile({'badge_name': 'Renamed', 'intro': ''})
+    Roster.update_user(uid=chief)
+    mail = OAuthDB().find_one({'owner': chief})['_id']
+    OAuth.add(mail=mail, data={**OAuthDB().find_one({'_id': mail})['data'],
+                               'picture': 'https://example.org/new.png'})
+
+    chief_roster = [raw for raw in Roster.get(pid=pid) if raw['uid'] == chief][0]
+    assert chief_roster['badge_name'] == 'Renamed'
+    assert chief_roster['picture'] == 'https://example.org/new.png'
+    assert {'tid': tid, 'role': 'chief'} in chief_roster['teams']
+
+    Team.update_setting(pid=pid, tid=tid, data={'disabled': True})
+    assert not Roster.get_by_tids(pid=pid, tids=[tid])
+
+
+def test_roster_skip_no_oauth():
+    ''' test the users without the OAuth record do not fail the member changes '''
+    Team.create(pid='rn2022', tid='web', name='Web', owners=['owner'])
+    UsersDB().insert_one({'_id': 'no-oauth', 'mail': 'no-oauth@example.org'})
+
+    Team.update_members(pid='rn2022', tid='web', add_uids=['no-oauth'])
+    Roster.update_user(uid='no-oauth')
+
+    assert 'no-oauth' in Team.list_uids_by_pid(pid='rn2022')
+    assert not Roster.get(pid='rn2022')
+
+
+def test_roster_pick_tid():
+    ''' test the picked team doesn't depend on the order of the teams '''
+    teams = [{'tid': 'web', 'role': 'member'}, {'tid': 'doc', 'role': 'chief'}]
+    assert Roster.pick_tid({'teams': teams}) == 'doc'
+    assert Roster.pick_tid({'teams': teams[::-1]}) == 'doc'
@@ -0,0 +1,161 @@
+''' test module/tasks '''
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import time
+
+import pytest
+
+from cmdtools.seed import Seeder
+from models.tasksdb import TasksDB, TasksStarNotifyDB
+from module.mc import MC
+from module.tasks import Tasks, TasksStar
+
+
+def test_claim_notify_in_window():
+    ''' test the new tasks in window are not claimed '''
+    TasksStar.queue_notify(pid='p-window', task_id='t1')
+    assert not TasksStar.claim_notify(pid='p-window')
+
+
+def test_claim_notify_digest():
+    ''' test claim all pending tasks in one digest '''
+    for task_id in ('t1', 't2', 't2'):
+        TasksStar.queue_notify(pid='p-digest', task_id=task_id)
+
+    TasksStarNotifyDB().update_many(
+        {'pid': 'p-digest'},
+        {'$set': {'created_at': time() - TasksStar.notify_window - 1}})
+
+    assert TasksStar.claim_notify(pid='p-digest') == ['t1', 't2']
+    assert not TasksStar.claim_notify(pid='p-digest')
+
+
+def test_claim_notify_max_wait():
+    ''' test claim when the oldest one waits too long '''
+    TasksStar.queue_notify(pid='p-wait', task_id='t1')
+    TasksStarNotifyDB().update_many(
+        {'pid': 'p-wait'},
+        {'$set': {'created_at': time() - TasksStar.notify_max_wait - 1}})
+    TasksStar.queue_notify(pid='p-wait', task_id='t2')
+
+    assert TasksStar.claim_notify(pid='p-wait') == ['t1', 't2']
+
+
+def test_query_and_count(max_queries):
+    ''' test query the tasks in pages with the filters '''
+    start = datetime(2022, 7, 30, 9, 0)
+    for num in range(5):
+        Tasks.add(pid='tq2022', body={
+            'title': f'Task {num}', 'cate': 'stage' if num % 2 else 'booth', 'desc': '',
+            'limit': 2, 'starttime': start + timedelta(hours=num // 2),
+            'created_by': 'c1'})
+
+    task_ids = [task['_id'] for task in Tasks.get_by_pid(pid='tq2022')]
+    Tasks.join(pid='tq2022', task_id=task_ids[0], uid='u1')
+    Tasks.join(pid='tq2022', task_id=task_ids[0], uid='u2')
+    Tasks.join(pid='tq2022', task_id=task_ids[3], uid='u1')
+
+    pages = []
+    after = None
+    while True:
+        with max_queries(1):
+            tasks, after = Tasks.query(pid='tq2022', after=after, limit=2)
+
+        pages.append([task['_id'] for task in tasks])
+        if after is None:
+            break
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sorted(sum(pages, [])) == sorted(task_ids)
+
+    for after in ('none', f'{start.isoformat()}', f'2022-13-01|{task_ids[0]}'):
+        with pytest.raises(ValueError):
+            Tasks.query(pid='tq2022', after=after)
+
+    assert len(Tasks.query(pid='tq2022', cate='stage')[0]) == 2
+    assert len(Tasks.query(pid='tq2022', has_slots=True)[0]) == 4
+    assert [task['_id'] for task in Tasks.query(pid='tq2022', joined='u1')[0]] == \
+        [task_ids[0], task_ids[3]]
+    assert len(Tasks.query(pid='tq2022', start=start + timedelta(hours=1),
+                           end=start + timedelta(hours=2))[0]) == 2
+
+    with max_queries(1):
+        counts = Tasks.count(pid='tq2022', uid='u1')
+
+    assert counts == {'total': 5, 'has_slots': 4, 'joined': 2,
+                      'cates': {'booth': 3, 'stage': 2}}
+
+
+def test_join_capacity(max_queries):
+    ''' test join the task in the limit, and the cached slots '''
+    task = Tasks.add(pid='tj2022', body={
+        'title': 'Booth', 'cate': '', 'desc': '', 'limit': 2,
+        'starttime': datetime(2022, 7, 30, 9, 0), 'created_by': 'c1'})
+
+    assert Tasks.join(pid='tj2022', task_id=task['_id'], uid='u1')['people'] == ['u1']
+    assert Tasks.join(pid='tj2022', task_id=task['_id'], uid='u2')['people'] == ['u1', 'u2']
+    assert Tasks.join(pid='tj2022', task_id=task['_id'], uid='u1')['people'] == ['u1', 'u2']
+
+    with max_queries(1):
+        assert Tasks.join(pid='tj2022', task_id=task['_id'], uid='u3') is None
+
+    with max_queries(0):
+        assert Tasks.get_slots(pid='tj2022', task_ids=[task['_id']]) == {task['_id']: 0}
+
+    Tasks.cancel(pid='tj2022', task_id=task['_id'], uid='u1')
+    assert Tasks.get_slots(pid='tj2022', task_ids=[task['_id']]) == {task['_id']: 1}
+    assert Tasks.join(pid='tj2022', task_id=task['_id'], uid='u3')['people'] == ['u2', 'u3']
+
+    # the stale full in the cache is re-checked, the free slot is joined
+    Tasks.cancel(pid='tj2022', task_id=task['_id'], uid='u2')
+    MC.get_client().set(Tasks.slots_key(task_id=task['_id']), 0)
+    assert Tasks.join(pid='tj2022', task_id=task['_id'], uid='u4')['people'] == ['u3', 'u4']
+
+    with pytest.raises(LookupError):
+        Tasks.join(pid='tj2022', task_id='none', uid='u3')
+
+
+def test_join_concurrently():
+    ''' test the concurrent joins never overbook '''
+    task = Tasks.add(pid='tc2022', body={
+        'title': 'Booth', 'cate': '', 'desc': '', 'limit': 5,
+        'starttime': datetime(2022, 7, 30, 9, 0), 'created_by': 'c1'})
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(
+            lambda num: Tasks.join(pid='tc2022', task_id=task['_id'], uid=f'u{num}'),
+            range(50)))
+
+    assert sum(1 for result in results if result) == 5
+    assert len(Tasks.get_with_pid(pid='tc2022', _id=task['_id'])['people']) == 5
+
+
+def test_tasks_index():
+    ''' test the replaced `pid`, `starttime` index is dropped '''
+    TasksDB().create_index([('pid', 1), ('starttime', 1)])
+    TasksDB().index()
+
+    keys = [raw['key'] for raw in TasksDB().index_information().values()]
+    assert [('pid', 1), ('starttime', 1)] not in keys
+    assert [('pid', 1), ('starttime', 1), ('_id', 1)] in keys
+
+
+def test_board_bad_input(login):
+    ''' test the board api answers 400 for the bad input '''
+    seeded = Seeder(seed=48, users=3, projects=1, teams=1, prefix='tb').run()
+    client = login(seeded['uids'][0])
+    url = f"/tasks/{seeded['pids'][0]}"
+
+    for data in ({'casename': 'query', 'after': 'none'},
+                 {'casename': 'query', 'start': 'none'},
+                 {'casename': 'counts', 'start': 'none'},
+                 {'casename': 'slots'},
+                 {'casename': 'slots', 'task_ids': 't1'}):
+        assert client.post(url, json=data).status_code == 400, data
+
+    resp = client.post(url, json={'casename': 'counts'})
+    assert resp.status_code == 200
+    assert resp.get_json()['counts']['total'] == len(Tasks.query(
+        pid=seeded['pids'][0], limit=200)[0])
+    assert resp.get_json()['is_star'] is False
+    assert client.post(url, json={'casename': 'slots', 'task_ids': []}).get_json() == {'slots': {}}
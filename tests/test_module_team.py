@@ -0,0 +1,140 @@
+''' test module/team '''
+import pytest
+
+from cmdtools.seed import Seeder
+from models.projection import TeamRoster
+from models.teamdb import TeamDB, TeamMemberChangedDB, TeamMembershipDB
+from module.team import Team, TeamImport, TeamProjection
+from module.users import User
+
+
+def test_membership(max_queries):
+    ''' test the membership in sync with the team '''
+    Team.create(pid='ms2022', tid='web', name='Web', owners=['owner'])
+    Team.create(pid='ms2022', tid='doc', name='Doc', owners=['owner'])
+    Team.update_chiefs(pid='ms2022', tid='web', add_uids=['u1'])
+    Team.update_members(pid='ms2022', tid='web', add_uids=['u1', 'u2', 'u3'])
+    Team.update_members(pid='ms2022', tid='doc', add_uids=['u2'])
+    Team.update_members(pid='ms2022', tid='web', del_uids=['u3'])
+
+    assert TeamMembershipDB().count_documents({'pid': 'ms2022', 'tid': 'web'}) == 3
+    assert sorted(Team.list_uids_by_pid(pid='ms2022')) == ['u1', 'u2']
+
+    with max_queries(2):
+        teams = Team.participate_in(uid='u2')
+
+    assert sorted(team['tid'] for team in teams) == ['doc', 'web']
+    assert len(Team.participate_in(uid='u2', pid='ms2022')) == 2
+    assert not Team.participate_in(uid='u2', pid='ms2021')
+    assert not Team.participate_in(uid='u3', pid='ms2022')
+
+    Team.update_setting(pid='ms2022', tid='doc', data={'disabled': True})
+    assert [team['tid'] for team in Team.participate_in(uid='u2')] == ['web']
+    assert sorted(Team.list_uids_by_pid(pid='ms2022')) == ['u1', 'u2']
+
+    Team.update_setting(pid='ms2022', tid='web', data={'members': 'u2', 'chiefs': ''})
+    assert sorted(Team.list_uids_by_pid(pid='ms2022')) == ['u2']
+    assert not Team.is_participant(uid='u1')
+    assert Team.is_participant(uid='u2', pid='ms2022')
+
+
+def test_get_many():
+    ''' test get the teams in the pairs, not the cartesian product '''
+    for pid in ('gm2021', 'gm2022'):
+        for tid in ('web', 'doc'):
+            Team.create(pid=pid, tid=tid, name=tid, owners=['owner'])
+
+    teams = Team.get_many([('gm2021', 'web'), ('gm2022', 'doc'), ('gm2022', 'none')])
+    assert sorted(teams) == [('gm2021', 'web'), ('gm2022', 'doc')]
+    assert not Team.get_many([])
+
+
+def test_rebuild_membership():
+    ''' test rebuild the membership from the teams '''
+    TeamDB(pid='rb2022', tid='web').add(
+        {'name': 'Web', 'owners': [], 'chiefs': ['c1'], 'members': ['m1', 'm2']})
+    assert not Team.participate_in(uid='m1', pid='rb2022')
+
+    assert Team.rebuild_membership(pid='rb2022') == 1
+    assert [team['tid'] for team in Team.participate_in(uid='m1', pid='rb2022')] == ['web']
+    assert sorted(Team.list_uids_by_pid(pid='rb2022')) == ['c1', 'm1', 'm2']
+
+
+def test_get_users(max_queries):
+    ''' test get the users of teams in one query '''
+    Team.create(pid='gu2022', tid='web', name='Web', owners=['owner'])
+    Team.create(pid='gu2022', tid='doc', name='Doc', owners=['owner'])
+    Team.update_chiefs(pid='gu2022', tid='web', add_uids=['c1'])
+    Team.update_members(pid='gu2022', tid='doc', add_uids=['m1', 'm2'])
+
+    with max_queries(1):
+        users = Team.get_users(pid='gu2022', tids=['web', 'doc'])
+
+    assert users == {'web': ['c1'], 'doc': ['m1', 'm2']}
+
+    with pytest.raises(Exception) as error:
+        Team.get_users(pid='gu2022', tids=['web', 'none'])
+
+    assert str(error.value) == 'no team: none'
+
+
+def test_projections(max_queries):
+    ''' test list the teams and the users in projections '''
+    seeded = Seeder(seed=43, users=20, projects=1, teams=2, prefix='pj').run()
+    pid = seeded['pids'][0]
+    tid = seeded['teams'][0][1]
+    team = TeamDB(pid=pid, tid=tid).get()
+
+    summaries = TeamProjection.list_summaries(pid=pid)
+    assert sorted(summary.tid for summary in summaries) == \
+        sorted(team['tid'] for team in Team.list_by_pid(pid=pid))
+    assert not hasattr(summaries[0], 'members')
+
+    rosters = TeamProjection.get_projected(pid=pid, tids=[tid], model=TeamRoster)
+    assert rosters[tid].chiefs == team['chiefs']
+    assert rosters[tid].uids == list(dict.fromkeys(team['chiefs'] + team['members']))
+
+    with max_queries(2):
+        cards = User.get_cards(uids=rosters[tid].uids)
+
+    infos = User.get_info(uids=rosters[tid].uids)
+    assert {uid: (card.badge_name, card.picture) for uid, card in cards.items()} == \
+        {uid: (info['profile']['badge_name'], info['oauth']['picture'])
+         for uid, info in infos.items()}
+
+
+def test_import_members(max_queries):
+    ''' test import the members by the mails or the uids in batch '''
+    seeded = Seeder(seed=45, users=10, projects=1, teams=1, prefix='im').run()
+    uids = seeded['uids']
+    Team.create(pid='ix2022', tid='web', name='Web', owners=['owner'])
+    Team.update_members(pid='ix2022', tid='web', add_uids=[uids[0]])
+
+    keys = TeamImport.parse(
+        f'email\nIM-000001@example.org\n{uids[2]},{uids[0]}\nnone@example.org,{uids[2]}\n')
+    assert keys == ['IM-000001@example.org', uids[2], uids[0], 'none@example.org']
+
+    with max_queries(3):
+        result = TeamImport.resolve(pid='ix2022', tid='web', keys=keys)
+
+    assert result == {'added': [uids[1], uids[2]], 'existed': [uids[0]],
+                      'unknown': ['none@example.org']}
+
+    start = TeamMemberChangedDB().count_documents({'pid': 'ix2022', 'case': 'add'})
+    TeamDB('ix2022', 'web').update_one(
+        {'pid': 'ix2022', 'tid': 'web'}, {'$set': {'headcount': 3}})
+    with max_queries(9):
+        assert TeamImport.save(pid='ix2022', tid='web', uids=result['added'])
+
+    assert TeamMemberChangedDB().count_documents(
+        {'pid': 'ix2022', 'case': 'add'}) == start + 2
+    assert sorted(Team.list_uids_by_pid(pid='ix2022')) == sorted(uids[:3])
+
+    # over the headcount, nothing is added or recorded
+    assert not TeamImport.save(pid='ix2022', tid='web', uids=[uids[3]])
+    assert TeamMemberChangedDB().count_documents(
+        {'pid': 'ix2022', 'case': 'add'}) == start + 2
+    assert sorted(Team.list_uids_by_pid(pid='ix2022')) == sorted(uids[:3])
+
+    with pytest.raises(LookupError):
+        TeamImport.resolve(pid='ix2022', tid='none', keys=keys)
@@ -0,0 +1,45 @@
+''' test module/timing '''
+from models.usessiondb import USessionDB
+from module.mc import RecordedClient
+from module.timing import RequestTiming
+
+
+class FakeClient:  # pylint: disable=too-few-public-methods
+    ''' Fake memcached client '''
+
+    def get(self, key):  # pylint: disable=unused-argument
+        ''' get '''
+        return None
+
+
+def test_request_timing():
+    ''' test the breakdown of the request '''
+    timing = RequestTiming()
+    USessionDB().find_one({'_id': 'timing'})
+    RecordedClient(FakeClient()).get('sid:timing')
+    timing.render_start()
+    timing.render_start()
+    timing.render_end()
+    timing.render_end()
+    timing.stop()
+
+    USessionDB().find_one({'_id': 'timing'})
+    assert timing.mongo.count == 1
+    assert timing.mc.calls[0][0] == 'get'
+    assert timing.template > 0
+    assert timing.server_timing().startswith('mongo;dur=')
+    assert 'desc="1 queries"' in timing.server_timing()
+
+
+def test_log_slow():
+    ''' test the slow request log '''
+    timing = RequestTiming()
+    USessionDB().find_one({'_id': 'timing'})
+    timing.stop()
+
+    assert timing.log_slow(threshold_ms=60000, endpoint='index') is None
+
+    data = timing.log_slow(threshold_ms=0, endpoint='index', pid='2022', tid='team')
+    assert data is not None
+    assert data['pid'] == '2022'
+    assert data['mongo_collections'] == {'usession': 1}
@@ -2,7 +2,9 @@
 import pytest
 
 from models.oauth_db import OAuthDB
-from module.users import User
+from models.users_db import TobeVolunteerDB
+from module.skill import RecruitQuery
+from module.users import TobeVolunteer, User
 
 
 @pytest.fixture(scope='module', params=[None, 'coscup'])
@@ -81,3 +83,48 @@ class TestUser:  # pylint: disable=too-few-public-methods
         suspend_user = User(uid=created_user['_id']).property_suspend()
 
         assert suspend_user['property']['suspend']
+
+
+def test_tobe_volunteer_query(max_queries):
+    ''' test query the volunteers in the ranking and pages '''
+    TobeVolunteerDB().delete_many({})
+    for uid, teams, skill, status in (
+            ('v1', [1], ['L001'], 1), ('v2', [1, 3], ['L002'], 2),
+            ('v3', [], ['L001', 'L003'], 1), ('v4', [3], [], 3), ('v5', [1], ['L001'], 2)):
+        TobeVolunteer.save(data={'uid': uid, 'ok': True, 'teams': teams,
+                                 'skill': skill, 'status': status})
+
+    TobeVolunteer.save(data={'uid': 'v6', 'ok': False, 'teams': [1], 'skill': [], 'status': 1})
+
+    query = RecruitQuery.parse_obj({'teams': [1], 'skill': ['L001'], 'status': [1]}).dict()
+    with max_queries(1):
+        datas, after = TobeVolunteer.query(query, limit=2)
+
+    assert [(data['uid'], data['score']) for data in datas] == [('v1', 3), ('v3', 2)]
+
+    datas, after = TobeVolunteer.query(query, after=after, limit=2)
+    assert [(data['uid'], data['score']) for data in datas] == [('v5', 2), ('v2', 1)]
+    assert after is None
+
+    with max_queries(1):
+        counts = TobeVolunteer.count(query)
+
+    assert counts == {'total': 4, 'teams': {1: 3}, 'skill': {'L001': 3}, 'status': {1: 2}}
+
+    datas, after = TobeVolunteer.query(
+        RecruitQuery.parse_obj({}).dict(), limit=10)
+    assert [data['uid'] for data in datas] == ['v1', 'v2', 'v3', 'v4', 'v5']
+
+    for after in ('v1', 'x|v1', 3):
+        with pytest.raises(ValueError):
+            TobeVolunteer.query(query, after=after)
+
+
+def test_oauth_index():
+    ''' test the `owner` index is replaced by the compound index '''
+    oauth_db = OAuthDB()
+    oauth_db.create_index([('owner', 1), ])
+    oauth_db.index()
+
+    assert 'owner_1' not in oauth_db.index_information()
+    assert not oauth_db.drop_index_by_keys([('owner', 1), ])
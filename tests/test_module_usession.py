@@ -0,0 +1,55 @@
+''' test module/usession '''
+from datetime import datetime, timedelta
+from time import time
+
+from models.usessiondb import USessionArchiveDB, USessionDB
+from module.usession import USession
+
+
+def test_get_expired():
+    ''' test get the expired session '''
+    sid = USession.make_new(uid='u-expired', header={}).inserted_id
+    assert USession.get(sid)['uid'] == 'u-expired'
+
+    USessionDB().update_one(
+        {'_id': sid}, {'$set': {'expires_at': datetime.utcnow() - timedelta(seconds=1)}})
+    assert USession.get(sid) is None
+
+
+def test_get_legacy_without_expires_at():
+    ''' test the session without `expires_at` '''
+    USessionDB(token='legacy-alive').insert_one(
+        {'_id': 'legacy-alive', 'uid': 'u-legacy', 'alive': True, 'created_at': time()})
+    USessionDB(token='legacy-old').insert_one(
+        {'_id': 'legacy-old', 'uid': 'u-legacy', 'alive': True,
+         'created_at': time() - 86400*10})
+
+    assert USession.get('legacy-alive')
+    assert USession.get('legacy-old') is None
+    assert [raw['_id'] for raw in USession.get_alive(uid='u-legacy')] == ['legacy-alive']
+
+
+def test_archive():
+    ''' test archive '''
+    sid = USession.make_new(uid='u-archive', header={}).inserted_id
+    USessionDB().update_one(
+        {'_id': sid}, {'$set': {'created_at': time() - 86400*31}})
+    keep = USession.make_new(uid='u-archive', header={}).inserted_id
+
+    assert USession.archive(days=30, batch=1) >= 1
+    assert USessionDB().find_one({'_id': sid}) is None
+    assert USessionDB().find_one({'_id': keep})
+
+    archived = USessionArchiveDB().find_one({'_id': sid})
+    assert archived['uid'] == 'u-archive'
+    assert 'archived_at' in archived
+
+
+def test_index():
+    ''' test the `uid` index is replaced by the `uid`, `alive`, `created_at` index '''
+    usession_db = USessionDB()
+    usession_db.create_index([('uid', 1), ])
+    usession_db.index()
+
+    assert 'uid_1' not in usession_db.index_information()
+    assert 'uid_1_alive_1_created_at_-1' in usession_db.index_information()
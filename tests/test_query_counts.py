@@ -0,0 +1,83 @@
+''' test the numbers of MongoDB commands not to scale with the members '''
+import pytest
+
+from cmdtools.seed import Seeder
+from models.mattermost_link_db import MattermostLinkDB
+from models.mattermostdb import MattermostUsersDB
+from models.projectdb import ProjectDB
+from models.teamdb import TeamDB
+from module.expense import Expense
+from module.sender import SenderReceiver
+from module.users import User
+
+
+@pytest.fixture(scope='module')
+def seeded():
+    ''' Seed 500 users, the members of the first team are linked to Mattermost
+    in half by the link, in half by the email.
+
+    '''
+    datas = Seeder(seed=38, users=500, projects=1, teams=2, prefix='qc').run()
+    pid = datas['pids'][0]
+    team = TeamDB(pid=pid, tid=datas['teams'][0][1]).get()
+    uids = team['chiefs'] + team['members']
+
+    for num, uid in enumerate(uids):
+        mid = f'mm{num:06d}'
+        if num % 2:
+            MattermostLinkDB().replace_one(
+                {'_id': uid},
+                {'_id': uid, 'code': '', 'data': {'user_id': mid, 'user_name': f'link{num}'}},
+                upsert=True)
+        else:
+            mail = User.get_info(uids=[uid])[uid]['oauth']['email']
+            MattermostUsersDB().replace_one(
+                {'_id': mid}, {'_id': mid, 'email': mail, 'username': f'user{num}'}, upsert=True)
+
+    datas['pid'] = pid
+    datas['tid'] = team['tid']
+    datas['members'] = len(uids)
+    datas['owner'] = ProjectDB(pid='').find_one({'_id': pid})['owners'][0]
+    return datas
+
+
+def test_user_get_info(seeded, max_queries):  # pylint: disable=redefined-outer-name
+    ''' test `User.get_info` for 500 users '''
+    with max_queries(2):
+        users = User.get_info(uids=seeded['uids'])
+
+    assert len(users) == 500
+
+
+def test_team_members(seeded, max_queries, login):  # pylint: disable=redefined-outer-name
+    ''' test the team members page and the members api '''
+    client = login(seeded['owner'])
+    url = f"/team/{seeded['pid']}/{seeded['tid']}/members"
+
+    with max_queries(8):
+        assert client.get(url).status_code == 200
+
+    with max_queries(12):
+        resp = client.post(url, json={'casename': 'get'})
+
+    members = resp.get_json()['members']
+    assert len(members) == seeded['members']
+    assert all(member['chat']['name'] for member in members)
+
+
+def test_sender_get_from_user(seeded, max_queries):  # pylint: disable=redefined-outer-name
+    ''' test `SenderReceiver.get_from_user` '''
+    tids = [tid for _, tid in seeded['teams']]
+    with max_queries(1):
+        _, raws = SenderReceiver.get_from_user(pid=seeded['pid'], tids=tids)
+
+    assert len(raws) >= seeded['members']
+
+
+def test_expense_dl_format(seeded, max_queries):  # pylint: disable=redefined-outer-name
+    ''' test `Expense.dl_format` '''
+    with max_queries(2):
+        raws = Expense.dl_format(pid=seeded['pid'])
+
+    assert raws
+    assert all(raw['budget.bid'] for raw in raws)
@@ -1,10 +1,8 @@
 ''' API '''
-import hashlib
-
 from flask import Blueprint, jsonify, request
 
-from module.team import Team
-from module.users import User
+from module.roster import Roster
+from module.team import TeamProjection
 
 VIEW_API = Blueprint('api', __name__, url_prefix='/api')
 
@@ -20,35 +18,24 @@ def project_members():
     ''' List all members '''
     pid = request.args['pid']
 
+    chiefs: dict[str, list[dict[str, str]]] = {}
+    members: dict[str, list[dict[str, str]]] = {}
+    for raw in Roster.get(pid=pid):
+        user = {'name': raw['badge_name'], 'email_hash': raw['email_hash']}
+        chief_in = {team['tid'] for team in raw['teams'] if team['role'] == 'chief'}
+        for tid in chief_in:
+            chiefs.setdefault(tid, []).append(user)
+
+        for tid in {team['tid'] for team in raw['teams']} - chief_in:
+            members.setdefault(tid, []).append(user)
+
     result = []
-    for team in Team.list_by_pid(pid=pid):
-        data = {}
-        data['name'] = team['name']
-        data['tid'] = team['tid']
-
-        data['chiefs'] = []
-        chiefs_infos = User.get_info(uids=team['chiefs'])
-        for uid in team['chiefs']:
-            if uid not in chiefs_infos:
-                continue
-
-            user = chiefs_infos[uid]
-            h_msg = hashlib.md5()
-            h_msg.update(user['oauth']['email'].encode('utf-8'))
-            data['chiefs'].append({
-                'name': user['profile']['badge_name'],
-                'email_hash': h_msg.hexdigest(),
-            })
-
-        data['members'] = []
-        for user in User.get_info(uids=list(set(team['members']) - set(team['chiefs']))).values():
-            h_msg = hashlib.md5()
-            h_msg.update(user['oauth']['email'].encode('utf-8'))
-            data['members'].append({
-                'name': user['profile']['badge_name'],
-                'email_hash': h_msg.hexdigest(),
-            })
-
-        result.append(data)
+    for team in TeamProjection.list_summaries(pid=pid):
+        result.append({
+            'name': team.name,
+            'tid': team.tid,
+            'chiefs': chiefs.get(team.tid, []),
+            'members': members.get(team.tid, []),
+        })
 
     return jsonify({'data': result})
@@ -6,7 +6,7 @@ from flask import Blueprint, g, jsonify, redirect, render_template, request
 
 from module.budget import Budget
 from module.project import Project
-from module.team import Team
+from module.team import TeamProjection
 
 VIEW_BUDGET = Blueprint('budget', __name__, url_prefix='/budget')
 
@@ -32,8 +32,8 @@ def batch(pid):
 
             if data and data.get('casename') == 'get':
                 teams = [
-                    {'name': team['name'], 'tid': team['tid']}
-                    for team in Team.list_by_pid(pid=project['_id'])
+                    {'name': team.name, 'tid': team.tid}
+                    for team in TeamProjection.list_summaries(pid=project['_id'])
                 ]
 
                 return jsonify({'teams': teams})
@@ -42,47 +42,19 @@ def batch(pid):
             csv_file = list(csv.DictReader(io.StringIO('\n'.join(
                 request.files['file'].read().decode('utf8').split('\n')[1:]))))
 
-            result, error_result = Budget.verify_batch_items(items=csv_file)
+            report = Budget.import_batch(
+                pid=pid, items=csv_file, save=request.form['casename'] == 'save')
 
-            dedup_result = []
-            dup_bids = []
-
-            # Pylint unnecessary-lambda-assignment / C3001
-            # Lambda expression assigned to a variable.
-            # Define a function using the "def" keyword instead.
-            def has_bid_in_budget(
-                bid): return Budget.get_by_bid(pid=pid, bid=bid)
-
-            def has_added(item): return item['action'] == 'add' and has_bid_in_budget(
-                item['bid'])
-
-            def did_update_nonexisted_entry(item): return \
-                item['action'] == 'update' and not has_bid_in_budget(
-                    item['bid'])
-
-            for item in result:
-                if has_added(item) or did_update_nonexisted_entry(item):
-                    dup_bids.append(item['bid'])
-                else:
-                    dedup_result.append(item)
-
-            if request.form['casename'] == 'verify':
-                return jsonify({
-                    'file': csv_file,
-                    'confirmed': dedup_result,
-                    'error_items': error_result,
-                    'dup_bids': dup_bids,
-                })
-
-            if request.form['casename'] == 'save':
-                for item in dedup_result:
-                    if item['action'] == 'add':
-                        Budget.add(pid=pid, tid=item['tid'], data=item)
-                    elif item['action'] == 'update':
-                        budget_id = Budget.get_by_bid(pid=pid, bid=item['bid'])
-                        if budget_id:
-                            item['_id'] = budget_id
-                            Budget.edit(pid=pid, data=item)
+            return jsonify({
+                'file': csv_file,
+                'confirmed': [row['item'] for row in report
+                              if row['status'] in ('ok', 'added', 'updated')],
+                'error_items': [(row['row'], row['errors'])
+                                for row in report if row['status'] == 'invalid'],
+                'dup_bids': [row['bid'] for row in report
+                             if row['status'] in ('existed', 'missing', 'duplicated')],
+                'report': report,
+            })
 
     return jsonify({})
 
@@ -108,8 +80,8 @@ def by_project_index(pid):
 
         if data['casename'] == 'get':
             teams = []
-            for team in Team.list_by_pid(pid=project['_id']):
-                teams.append({'name': team['name'], 'tid': team['tid']})
+            for team in TeamProjection.list_summaries(pid=project['_id']):
+                teams.append({'name': team.name, 'tid': team.tid})
 
             default_budget = {
                 'bid': '',
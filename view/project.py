@@ -8,16 +8,17 @@ import arrow
 from flask import (Blueprint, g, jsonify, redirect, render_template, request,
                    url_for)
 
-import setting
 from celery_task.task_service_sync import service_sync_mattermost_add_channel
 from models.oauth_db import OAuthDB
+from models.projection import TeamRoster
 from models.teamdb import TeamMemberChangedDB
 from models.users_db import UsersDB
 from module.dietary_habit import DietaryHabit
 from module.form import Form, FormAccommodation, FormTrafficFeeMapping
 from module.mattermost_bot import MattermostTools
 from module.project import Project
-from module.team import Team
+from module.roster import Roster
+from module.team import Team, TeamProjection
 from module.users import User
 
 VIEW_PROJECT = Blueprint('project', __name__, url_prefix='/project')
@@ -226,12 +227,8 @@ def project_form_api(pid):
                 return jsonify({'result': result})
 
         elif data['case'] == 'clothes':
-            all_users = {}
-            for team in Team.list_by_pid(pid=pid):
-                for uid in team['chiefs']+team['members']:
-                    all_users[uid] = {'tid': team['tid']}
-
-            user_info = User.get_info(uids=list(all_users.keys()))
+            all_users = {raw['uid']: {'tid': Roster.pick_tid(raw), 'roster': raw}
+                         for raw in Roster.get(pid=pid)}
 
             fieldnames = ('uid', 'picture', 'name',
                           '_has_data', 'tid', 'clothes', 'htg')
@@ -251,8 +248,8 @@ def project_form_api(pid):
                 for uid, value in all_users.items():
                     data = {
                         'uid': uid,
-                        'picture': user_info[uid]['oauth']['picture'],
-                        'name': user_info[uid]['profile']['badge_name'],
+                        'picture': value['roster']['picture'],
+                        'name': value['roster']['badge_name'],
                         '_has_data': bool(value.get('clothes', False)),
                         'tid': value['tid'],
                         'clothes': value.get('clothes'),
@@ -294,12 +291,8 @@ def project_form_api(pid):
                 return jsonify({'result': result})
 
         elif data['case'] == 'drink':
-            all_users = {}
-            for team in Team.list_by_pid(pid=pid):
-                for uid in team['chiefs']+team['members']:
-                    all_users[uid] = {'tid': team['tid']}
-
-            user_info = User.get_info(uids=list(all_users.keys()))
+            all_users = {raw['uid']: {'tid': Roster.pick_tid(raw), 'roster': raw}
+                         for raw in Roster.get(pid=pid)}
 
             fieldnames = ('uid', 'picture', 'name', '_has_data', 'tid', 'y18')
             with io.StringIO() as str_io:
@@ -315,8 +308,8 @@ def project_form_api(pid):
                 for uid, value in all_users.items():
                     data = {
                         'uid': uid,
-                        'picture': user_info[uid]['oauth']['picture'],
-                        'name': user_info[uid]['profile']['badge_name'],
+                        'picture': value['roster']['picture'],
+                        'name': value['roster']['badge_name'],
                         '_has_data': bool(value.get('y18')),
                         'tid': value['tid'],
                         'y18': value.get('y18'),
@@ -397,21 +390,23 @@ def team_page(pid):
     if not project:
         return 'no data', 404
 
-    data = list(Team.list_by_pid(project['_id']))
+    rosters = TeamProjection.list_projected(pid=project['_id'], model=TeamRoster)
     uids = []
-    for team in data:
-        uids.extend(team['chiefs'])
+    for roster in rosters:
+        uids.extend(roster.chiefs)
 
     total = 0
-    user_info = User.get_info(uids)
-    for team in data:
-        team['chiefs_name'] = []
-        for uid in team['chiefs']:
+    user_cards = User.get_cards(uids)
+    data = []
+    for roster in rosters:
+        team = {'tid': roster.tid, 'name': roster.name, 'chiefs_name': []}
+        for uid in roster.chiefs:
             team['chiefs_name'].append(
-                f'''<a href="/user/{uid}">{user_info[uid]['profile']['badge_name']}</a>''')
+                f'''<a href="/user/{uid}">{user_cards[uid].badge_name}</a>''')
 
-        team['count'] = len(set(team['chiefs'] + team['members']))
+        team['count'] = len(roster.uids)
         total += team['count']
+        data.append(team)
 
     # ----- group for layout ----- #
     per = 3
@@ -472,10 +467,8 @@ def project_form_accommodation(pid):
         post_data = request.get_json()
 
         if post_data['casename'] == 'get':
-            all_users = {}
-            for team in Team.list_by_pid(pid=pid):
-                for uid in team['chiefs']+team['members']:
-                    all_users[uid] = {'tid': team['tid']}
+            all_users = {raw['uid']: {'tid': Roster.pick_tid(raw)}
+                         for raw in Roster.get(pid=pid)}
 
             raws = []
             for raw in FormAccommodation.get(pid):
@@ -529,10 +522,8 @@ def project_dietary_habit(pid):
         post_data = request.get_json()
 
         if post_data['casename'] == 'get':
-            all_users = {}
-            for team in Team.list_by_pid(pid=pid):
-                for uid in team['chiefs']+team['members']:
-                    all_users[uid] = {'tid': team['tid']}
+            all_users = {raw['uid']: {'tid': Roster.pick_tid(raw)}
+                         for raw in Roster.get(pid=pid)}
 
             user_infos = User.get_info(
                 uids=list(all_users.keys()), need_sensitive=True)
@@ -572,16 +563,14 @@ def project_contact_book(pid):
         post_data = request.get_json()
 
         if post_data['casename'] == 'get':
-            all_users = {}
-            for team in Team.list_by_pid(pid=pid):
-                for uid in team['chiefs']+team['members']:
-                    all_users[uid] = {'tid': team['tid']}
+            all_users = {raw['uid']: {'tid': Roster.pick_tid(raw)}
+                         for raw in Roster.get(pid=pid)}
 
             user_infos = User.get_info(
                 uids=list(all_users.keys()), need_sensitive=True)
 
-            mmt = MattermostTools(
-                token=setting.MATTERMOST_BOT_TOKEN, base_url=setting.MATTERMOST_BASEURL)
+            mids = MattermostTools.find_possible_mids(uids=list(all_users))
+            user_names = MattermostTools.find_user_names(mids=list(mids.values()))
             datas = []
             for uid, value in all_users.items():
                 user_info = user_infos[uid]
@@ -596,8 +585,7 @@ def project_contact_book(pid):
                 if 'profile_real' in user_info:
                     data['phone'] = user_info['profile_real'].get('phone', '')
 
-                data['user_name'] = mmt.find_user_name(
-                    mmt.find_possible_mid(uid=uid))
+                data['user_name'] = user_names.get(mids.get(uid, ''), '')
                 datas.append(data)
 
             return jsonify({'datas': datas})
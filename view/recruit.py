@@ -12,6 +12,7 @@ VIEW_RECRUIT = Blueprint('recruit', __name__, url_prefix='/recruit')
 @VIEW_RECRUIT.route('/<pid>/<tid>/list', methods=('GET', 'POST'))
 def recurit_list(pid, tid):
     ''' List page '''
+    # pylint: disable=too-many-return-statements
     team, project, _redirect = check_the_team_and_project_are_existed(
         pid=pid, tid=tid)
     if _redirect:
@@ -46,16 +47,25 @@ def recurit_list(pid, tid):
             })
 
         if post_data['casename'] == 'query':
-            query = RecruitQuery.parse_obj(post_data['query']).dict()
-            data = list(TobeVolunteer.query(query))
+            try:
+                query = RecruitQuery.parse_obj(post_data['query']).dict()
+                data, after = TobeVolunteer.query(
+                    query, after=post_data.get('after'),
+                    limit=min(max(int(post_data.get('limit', 50)), 1), 200))
+            except ValueError as error:
+                return jsonify({'status': 'fail', 'message': str(error)}), 400
 
-            users_info = User.get_info(uids=[user['uid'] for user in data])
+            user_cards = User.get_cards(uids=[user['uid'] for user in data])
 
             for member in data:
                 member.update({
-                    'profile': {'badge_name': users_info[member['uid']]['profile']['badge_name']},
-                    'oauth': {'picture': users_info[member['uid']]['oauth']['picture']}})
+                    'profile': {'badge_name': user_cards[member['uid']].badge_name},
+                    'oauth': {'picture': user_cards[member['uid']].picture}})
 
-            return jsonify({'members': data})
+            result = {'members': data, 'next': after}
+            if not post_data.get('after'):
+                result['counts'] = TobeVolunteer.count(query)
+
+            return jsonify(result)
 
     return jsonify({})
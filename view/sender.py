@@ -8,7 +8,7 @@ from flask import Blueprint, g, jsonify, redirect, render_template, request
 
 from celery_task.task_sendermailer import sender_mailer_start
 from module.sender import SenderCampaign, SenderLogs, SenderReceiver
-from module.team import Team
+from module.team import TeamProjection
 from module.users import User
 from view.utils import check_the_team_and_project_are_existed
 
@@ -154,8 +154,8 @@ def campaign_receiver(pid, tid, cid):
 
         if data and 'casename' in data and data['casename'] == 'getinit':
             teams = []
-            for _team in Team.list_by_pid(pid=team['pid']):
-                teams.append({'tid': _team['tid'], 'name': _team['name']})
+            for _team in TeamProjection.list_summaries(pid=team['pid']):
+                teams.append({'tid': _team.tid, 'name': _team.name})
 
             team_w_tags = []
             if 'tag_members' in team:
@@ -178,7 +178,7 @@ def campaign_receiver(pid, tid, cid):
                             })
 
         if data and 'casename' in data and data['casename'] == 'save':
-            tids = [team['tid'] for team in Team.list_by_pid(pid=team['pid'])]
+            tids = [_team.tid for _team in TeamProjection.list_summaries(pid=team['pid'])]
 
             _result = []
             for tid_info in tids:
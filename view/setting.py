@@ -13,6 +13,7 @@ from models.telegram_db import TelegramDB
 from module.dietary_habit import DietaryHabit
 from module.mattermost_link import MattermostLink
 from module.mc import MC
+from module.roster import Roster
 from module.skill import (SkillEnum, SkillEnumDesc, StatusEnum, StatusEnumDesc,
                           TeamsEnum, TeamsEnumDesc, TobeVolunteerStruct)
 from module.users import TobeVolunteer, User
@@ -91,6 +92,7 @@ def profile_page() -> Union[Text, Response]:
 
             if data:
                 User(uid=g.user['account']['_id']).update_profile(data)
+                Roster.update_user(uid=g.user['account']['_id'])
                 MC.get_client().delete(f"sid:{session['sid']}")
 
         return jsonify({})
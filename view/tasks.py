@@ -31,7 +31,7 @@ def project(pid):
 
     is_in_project = False
     if uid:
-        is_in_project = bool(Team.participate_in(uid, pid))
+        is_in_project = Team.is_participant(uid=uid, pid=pid)
 
     if request.method == 'GET':
         return render_template('./tasks_project.html', project=project_info)
@@ -51,18 +51,45 @@ def project(pid):
                 if uid in data['people']:
                     data['_joined'] = True
 
-        if post_data['casename'] == 'get':
-            datas = []
-
-            for data in Tasks.get_by_pid(pid=pid):
+        if post_data['casename'] == 'query':
+            try:
+                start = arrow.get(post_data['start']).datetime if post_data.get('start') else None
+                end = arrow.get(post_data['end']).datetime if post_data.get('end') else None
+                datas, after = Tasks.query(
+                    pid=pid, cate=post_data.get('cate'), start=start, end=end,
+                    has_slots=bool(post_data.get('has_slots')),
+                    joined=uid if uid and post_data.get('joined') else None,
+                    after=post_data.get('after'),
+                    limit=min(max(int(post_data.get('limit', 50)), 1), 200))
+            except ValueError as error:
+                return jsonify({'status': 'fail', 'message': str(error)}), 400
+
+            creators = Tasks.get_creators(tasks=datas)
+            for data in datas:
                 page_args(data=data, uid=uid)
-                datas.append(data)
+                data['_creator'] = creators[data['created_by']]
+
+            return jsonify({'datas': datas, 'next': after, 'is_in_project': is_in_project})
+
+        if post_data['casename'] == 'counts':
+            try:
+                start = arrow.get(post_data['start']).datetime if post_data.get('start') else None
+            except ValueError as error:
+                return jsonify({'status': 'fail', 'message': str(error)}), 400
 
             is_star = False
             if uid:
                 is_star = TasksStar.status(pid, uid)['add']
 
-            return jsonify({'datas': datas, 'is_in_project': is_in_project, 'is_star': is_star})
+            return jsonify({'counts': Tasks.count(pid=pid, uid=uid, start=start),
+                            'is_in_project': is_in_project, 'is_star': is_star})
+
+        if post_data['casename'] == 'slots':
+            if not isinstance(post_data.get('task_ids'), list):
+                return jsonify({'status': 'fail', 'message': 'Need `task_ids` list.'}), 400
+
+            return jsonify({'slots': Tasks.get_slots(
+                pid=pid, task_ids=[str(task_id) for task_id in post_data['task_ids']][:500])})
 
         if post_data['casename'] == 'star':
             if not uid:
@@ -76,7 +103,14 @@ def project(pid):
             if not uid:
                 return jsonify({'info': 'Need login'}), 401
 
-            data = Tasks.join(pid=pid, task_id=post_data['task_id'], uid=uid)
+            try:
+                data = Tasks.join(pid=pid, task_id=post_data['task_id'], uid=uid)
+            except LookupError:
+                return jsonify({}), 404
+
+            if data is None:
+                return jsonify({'info': 'Full'}), 409
+
             page_args(data=data, uid=uid)
 
             return jsonify({'data': data})
@@ -110,9 +144,8 @@ def project(pid):
 
             creator = {}
             if task_data:
-                user_info = User.get_info(uids=[task_data['created_by'], ])
-                creator['name'] = user_info[task_data['created_by']
-                                            ]['profile']['badge_name']
+                user_cards = User.get_cards(uids=[task_data['created_by'], ])
+                creator['name'] = user_cards[task_data['created_by']].badge_name
                 creator['uid'] = task_data['created_by']
 
                 mid = MattermostTools.find_possible_mid(
@@ -126,20 +159,17 @@ def project(pid):
 
             users_info = Tasks.get_peoples_info(
                 pid=pid, task_id=post_data['task_id'])
+            mids = MattermostTools.find_possible_mids(uids=list(users_info))
+            user_names = MattermostTools.find_user_names(mids=list(mids.values()))
             peoples = {}
             for uid, user in users_info.items():
                 peoples[uid] = {
                     'name': user['profile']['badge_name'],
                     'mail': user['oauth']['email'],
                     'picture': user['oauth']['picture'],
-                    'mattermost_uid': None,
+                    'mattermost_uid': user_names.get(mids.get(uid, '')) or None,
                 }
 
-                mid = MattermostTools.find_possible_mid(uid=uid)
-                if mid:
-                    peoples[uid]['mattermost_uid'] = MattermostTools.find_user_name(
-                        mid=mid)
-
             return jsonify({'peoples': peoples, 'creator': creator})
 
     return jsonify({}), 404
@@ -154,7 +184,7 @@ def add(pid, task_id=None):
     if not uid:
         return jsonify({'info': 'Need login'}), 401
 
-    is_in_project = bool(Team.participate_in(uid, pid))
+    is_in_project = Team.is_participant(uid=uid, pid=pid)
     if not is_in_project:
         return jsonify({'info': 'Not in project'}), 401
 
@@ -198,8 +228,9 @@ def add(pid, task_id=None):
                             endtime=endtime, task_id=task_id)
 
             if send_star:
+                TasksStar.queue_notify(pid=pid, task_id=raw['_id'])
                 mail_tasks_star.apply_async(
-                    kwargs={'pid': pid, 'task_id': raw['_id']})
+                    kwargs={'pid': pid}, countdown=TasksStar.notify_window+5)
 
             return jsonify({'data': raw})
 
@@ -236,6 +267,7 @@ def add(pid, task_id=None):
 @VIEW_TASKS.route('/<pid>/r/<task_id>', methods=('GET', 'POST'))
 def read(pid, task_id):
     ''' Read '''
+    # pylint: disable=too-many-return-statements
     project_info = Project.get(pid=pid)
     if not project_info:
         return '404', 404
@@ -253,8 +285,8 @@ def read(pid, task_id):
     uid = g.get('user', {}).get('account', {}).get('_id')
     if request.method == 'GET':
         creator = {}
-        user_info = User.get_info(uids=[task['created_by'], ])
-        creator['name'] = user_info[task['created_by']]['profile']['badge_name']
+        user_cards = User.get_cards(uids=[task['created_by'], ])
+        creator['name'] = user_cards[task['created_by']].badge_name
         creator['uid'] = task['created_by']
 
         mid = MattermostTools.find_possible_mid(uid=task['created_by'])
@@ -269,7 +301,11 @@ def read(pid, task_id):
 
         post_data = request.get_json()
         if post_data['casename'] == 'join':
-            Tasks.join(pid=pid, task_id=task['_id'], uid=uid)
+            try:
+                if Tasks.join(pid=pid, task_id=task['_id'], uid=uid) is None:
+                    return jsonify({'info': 'Full'}), 409
+            except LookupError:
+                return jsonify({}), 404
 
         elif post_data['casename'] == 'cancel':
             Tasks.cancel(pid=pid, task_id=task['_id'], uid=uid)
@@ -11,12 +11,13 @@ from flask import (Blueprint, g, jsonify, redirect, render_template, request,
 from markdown import markdown
 
 from celery_task.task_expense import expense_create
-from models.teamdb import TeamMemberChangedDB, TeamPlanDB
+from models.projection import TeamSummary
+from models.teamdb import TeamMemberChangedDB, TeamPlanCalendarDB, TeamPlanDB
 from module.budget import Budget
 from module.expense import Expense
 from module.form import Form, FormAccommodation, FormTrafficFeeMapping
 from module.mattermost_bot import MattermostTools
-from module.team import Team
+from module.team import Team, TeamImport, TeamProjection
 from module.users import User
 from module.waitlist import WaitList
 from view.utils import check_the_team_and_project_are_existed
@@ -102,33 +103,33 @@ def members(pid, tid):
                 team = Team.get(pid=pid, tid=post_data['tid'])
 
             else:
-                for lteam in Team.list_by_pid(pid=pid):
-                    list_teams.append(
-                        {'_id': lteam['tid'], 'name': lteam['name']})
+                for lteam in TeamProjection.list_summaries(pid=pid):
+                    list_teams.append({'_id': lteam.tid, 'name': lteam.name})
 
             uids = []
             uids.extend(team['chiefs'])
             uids.extend(team['members'])
 
             uids = list(set(uids))
-            users_info = User.get_info(uids=uids)
+            user_cards = User.get_cards(uids=uids)
+            mids = MattermostTools.find_possible_mids(uids=uids)
+            user_names = MattermostTools.find_user_names(mids=list(mids.values()))
 
             result_members = []
             for uid in uids:
-                if uid in users_info:
+                if uid in user_cards:
                     user = {'_id': uid,
-                            'profile': {'badge_name': users_info[uid]['profile']['badge_name']},
-                            'oauth': {'picture': users_info[uid]['oauth']['picture']}}
+                            'profile': {'badge_name': user_cards[uid].badge_name},
+                            'oauth': {'picture': user_cards[uid].picture}}
 
                     user['is_chief'] = False
                     if uid in team['chiefs']:
                         user['is_chief'] = True
 
                     user['chat'] = {}
-                    mid = MattermostTools.find_possible_mid(uid=uid)
+                    mid = mids.get(uid)
                     if mid:
-                        user['chat'] = {
-                            'mid': mid, 'name': MattermostTools.find_user_name(mid=mid)}
+                        user['chat'] = {'mid': mid, 'name': user_names.get(mid, '')}
 
                     result_members.append(user)
 
@@ -219,6 +220,15 @@ def team_edit_user(pid, tid):
 
         if data['case'] == 'deluser':
             Team.update_members(pid=pid, tid=tid, del_uids=[data['uid'], ])
+        elif data['case'] == 'import':
+            result = TeamImport.resolve(
+                pid=pid, tid=tid, keys=TeamImport.parse(data['data']))
+
+            if data.get('save') and result['added']:
+                if not TeamImport.save(pid=pid, tid=tid, uids=result['added']):
+                    return jsonify({'status': 'fail', 'message': 'over headcount.'}), 406
+
+            return jsonify(result)
         elif data['case'] == 'history':
             history = []
             for raw in WaitList.find_history_in_team(uid=data['uid'], pid=pid, tid=tid):
@@ -234,12 +244,13 @@ def team_edit_user(pid, tid):
                 for uid in _all_uids:
                     result_members.append(users_info[uid])
 
+                mids = MattermostTools.find_possible_mids(uids=list(_all_uids))
+                user_names = MattermostTools.find_user_names(mids=list(mids.values()))
                 for user in result_members:
                     user['chat'] = {}
-                    mid = MattermostTools.find_possible_mid(uid=user['_id'])
+                    mid = mids.get(user['_id'])
                     if mid:
-                        user['chat'] = {
-                            'mid': mid, 'name': MattermostTools.find_user_name(mid=mid)}
+                        user['chat'] = {'mid': mid, 'name': user_names.get(mid, '')}
 
                     user['phone'] = {'country_code': '', 'phone': ''}
                     if 'phone' in user['profile_real'] and user['profile_real']['phone']:
@@ -254,6 +265,7 @@ def team_edit_user(pid, tid):
 
                 return jsonify({
                     'members': result_members,
+                    'in_headcount': len(_all_uids),
                     'tags': team.get('tag_members', []),
                     'members_tags': Team.get_members_tags(pid=pid, tid=tid),
                 })
@@ -311,11 +323,11 @@ def team_edit_user_api(pid, tid):
         if not user_waitting:
             return jsonify({})
 
-        users_info = User.get_info([user['_id'], ])
+        user_card = User.get_cards([user['_id'], ])[user['_id']]
 
         user_data = {
-            'badge_name': users_info[user['_id']]['profile']['badge_name'],
-            'picture': users_info[user['_id']]['oauth']['picture'],
+            'badge_name': user_card.badge_name,
+            'picture': user_card.picture,
             'uid': user['_id'],
             'note': user_waitting['note'],
             'wid': f"{user_waitting['_id']}",
@@ -834,41 +846,23 @@ def team_plan_edit(pid, tid):
 
             others = []
             if 'import_others' in data and data['import_others']:
-                for team_plan in team_plan_db.find({'pid': pid, 'tid': {'$nin': [tid, ]}}):
-                    team_info = Team.get(pid=pid, tid=team_plan['tid'])
-
+                team_plans = list(team_plan_db.find({'pid': pid, 'tid': {'$nin': [tid, ]}}))
+                team_infos = TeamProjection.get_projected(
+                    pid=pid, tids=[team_plan['tid'] for team_plan in team_plans],
+                    model=TeamSummary)
+                for team_plan in team_plans:
                     for raw in team_plan['data']:
                         raw['tid'] = tid
-                        raw['team_name'] = team_info['name']
+                        raw['team_name'] = team_infos[team_plan['tid']].name
 
                         others.append(raw)
 
             return jsonify({'data': plan_data['data'], 'default': default, 'others': others})
 
         if 'case' in data and data['case'] == 'get_schedular':
-            query = {'pid': pid}
-            if not data['import_others']:
-                query['tid'] = tid
-
-            dates = {}
-            team_plan = list(team_plan_db.find(query))
-            for raw in team_plan:
-                for plan in raw['data']:
-                    if not plan['end']:
-                        if plan['start'] not in dates:
-                            dates[plan['start']] = []
-
-                        dates[plan['start']].append(plan)
-                    else:
-                        for date in arrow.Arrow.range('day',
-                                                      arrow.get(plan['start']),
-                                                      arrow.get(plan['end'])):
-                            d_format = date.format('YYYY-MM-DD')
-                            if d_format not in dates:
-                                dates[d_format] = []
-                            dates[d_format].append(plan)
-
-            return jsonify({'data': list(dates.items())})
+            return jsonify({'data': TeamPlanCalendarDB().find_dates(
+                pid=pid, tid=None if data['import_others'] else tid,
+                start=data.get('start'), end=data.get('end'))})
 
         if 'case' in data and data['case'] == 'post':
             if 'data' in data:
@@ -898,12 +892,14 @@ def team_plan_edit(pid, tid):
 
                 others = []
                 if 'import_others' in data and data['import_others']:
-                    for team_plan in team_plan_db.find({'pid': pid, 'tid': {'$nin': [tid, ]}}):
-                        team_info = Team.get(pid=pid, tid=team_plan['tid'])
-
+                    team_plans = list(team_plan_db.find({'pid': pid, 'tid': {'$nin': [tid, ]}}))
+                    team_infos = TeamProjection.get_projected(
+                        pid=pid, tids=[team_plan['tid'] for team_plan in team_plans],
+                        model=TeamSummary)
+                    for team_plan in team_plans:
                         for raw in team_plan['data']:
                             raw['tid'] = tid
-                            raw['team_name'] = team_info['name']
+                            raw['team_name'] = team_infos[team_plan['tid']].name
                             raw['start_timestamp'] = arrow.get(
                                 raw['start']).timestamp()
 
@@ -933,8 +929,8 @@ def team_expense_index(pid, tid):
 
         if data['casename'] == 'get':
             teams = []
-            for _team in Team.list_by_pid(pid=project['_id']):
-                teams.append({'name': _team['name'], 'tid': _team['tid']})
+            for _team in TeamProjection.list_summaries(pid=project['_id']):
+                teams.append({'name': _team.name, 'tid': _team.tid})
 
             select_team = data['select_team']
             if select_team == '':
@@ -1007,8 +1003,8 @@ def team_expense_my(pid, tid):
 
         if data['casename'] == 'get':
             teams = []
-            for _team in Team.list_by_pid(pid=project['_id']):
-                teams.append({'name': _team['name'], 'tid': _team['tid']})
+            for _team in TeamProjection.list_summaries(pid=project['_id']):
+                teams.append({'name': _team.name, 'tid': _team.tid})
 
             buids = set()
             uids = set()